@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+from src.biblioteca import Biblioteca, LibroNoDisponibleError
+from src.libro import Libro
+from src.particionado import BibliotecaParticionada
+from src.usuario import Usuario
+
+
+def construir(libros: int, usuarios: int, particiones: int = 0) -> Biblioteca:
+    biblioteca = BibliotecaParticionada(particiones) if particiones else Biblioteca()
+    biblioteca.agregar_libros_lote(Libro(f"ISBN{i:08d}", f"Título {i}", f"Autor {i % 100}")
+                                   for i in range(libros))
+    biblioteca.registrar_usuarios_lote(Usuario(f"U{i:08d}", f"Usuario {i}") for i in range(usuarios))
+    return biblioteca
+
+
+def verificar(biblioteca: Biblioteca) -> None:
+    # Ningún ISBN con dos préstamos activos y estado coherente entre libros, usuarios e índices
+    activos = biblioteca.listar_prestamos_activos()
+    por_isbn = Counter(p.libro_isbn for p in activos)
+    dobles = [isbn for isbn, cantidad in por_isbn.items() if cantidad > 1]
+    if dobles:
+        raise AssertionError(f"Préstamos dobles: {dobles[:10]}")
+    for libro in biblioteca.buscar_libros():
+        if libro.disponible == (libro.isbn in por_isbn):
+            raise AssertionError(f"Disponibilidad incoherente para {libro.isbn}")
+    por_usuario = Counter(p.usuario_id for p in activos)
+    for usuario_id, cantidad in por_usuario.items():
+        if biblioteca.obtener_usuario(usuario_id).cantidad_prestamos() != cantidad:
+            raise AssertionError(f"Préstamos incoherentes para {usuario_id}")
+
+
+def ejecutar(hilos: int, operaciones: int, libros: int, usuarios: int, semilla: int,
+             particiones: int = 0, busquedas: float = 0.0) -> Dict[str, float]:
+    biblioteca = construir(libros, usuarios, particiones)
+    isbns = [f"ISBN{i:08d}" for i in range(libros)]
+    barrera = threading.Barrier(hilos + 1)
+    contadores = Counter()
+    cerrojo_contadores = threading.Lock()
+
+    def trabajar(indice: int) -> None:
+        aleatorio = random.Random(semilla + indice)
+        locales = Counter()
+        propios: List[str] = []
+        usuario_ids = [f"U{i:08d}" for i in range(indice, usuarios, hilos)]
+        barrera.wait()
+        for _ in range(operaciones):
+            if aleatorio.random() < busquedas:
+                # Título y disponibilidad: cada partición recorre sus libros y devuelve pocos
+                biblioteca.buscar_libros(titulo=str(aleatorio.randrange(libros)), disponible=True)
+                locales['busquedas'] += 1
+                continue
+            if propios and (len(propios) >= 3 or aleatorio.random() < 0.4):
+                biblioteca.devolver_prestamo(propios.pop(aleatorio.randrange(len(propios))))
+                locales['devoluciones'] += 1
+                continue
+            try:
+                prestamo = biblioteca.crear_prestamo(aleatorio.choice(isbns), aleatorio.choice(usuario_ids))
+            except LibroNoDisponibleError:
+                locales['conflictos'] += 1
+            except ValueError:
+                locales['limite'] += 1
+            else:
+                propios.append(prestamo.id)
+                locales['prestamos'] += 1
+        with cerrojo_contadores:
+            contadores.update(locales)
+
+    trabajadores = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for trabajador in trabajadores:
+        trabajador.join()
+    duracion = time.perf_counter() - inicio
+
+    verificar(biblioteca)
+    if particiones:
+        biblioteca.cerrar()
+    total = hilos * operaciones
+    return {
+        'hilos': hilos,
+        'particiones': particiones,
+        'operaciones': total,
+        'segundos': round(duracion, 4),
+        'operaciones_por_segundo': round(total / duracion, 1),
+        **contadores,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Prueba de estrés de préstamos concurrentes")
+    parser.add_argument('--hilos', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--operaciones', type=int, default=20_000, help="operaciones por hilo")
+    parser.add_argument('--libros', type=int, default=1_000)
+    parser.add_argument('--usuarios', type=int, default=2_000)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--particiones', type=int, nargs='+', default=[0],
+                        help="procesos de BibliotecaParticionada (0: una Biblioteca en este proceso); "
+                             "con varios valores la escala se mide respecto al primero")
+    parser.add_argument('--busquedas', type=float, default=0.0,
+                        help="fracción de operaciones que son búsquedas por título y disponibilidad")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    filas = [ejecutar(h, args.operaciones, args.libros, args.usuarios, args.semilla, p, args.busquedas)
+             for p in args.particiones for h in args.hilos]
+    if args.json:
+        print(json.dumps(filas, indent=2))
+        return
+    if max(args.particiones) > (os.cpu_count() or 1):
+        # Los procesos se reparten los mismos núcleos: la escala no mide el reparto en particiones
+        print(f"Aviso: más particiones que CPU ({os.cpu_count()})")
+    base = filas[0]['operaciones_por_segundo']
+    print(f"{'Particiones':>11} {'Hilos':>5} {'Ops/s':>12} {'Escala':>7} {'Conflictos':>11}  Sin préstamos dobles")
+    for fila in filas:
+        print(f"{fila['particiones']:>11} {fila['hilos']:>5} {fila['operaciones_por_segundo']:>12} "
+              f"{fila['operaciones_por_segundo'] / base:>6.2f}x {fila.get('conflictos', 0):>11}  sí")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import gc
+import json
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from src.libro import Libro
+from src.prestamo import Prestamo
+from src.usuario import Usuario
+
+
+def clase_con_dict(cls: type) -> type:
+    # Reconstruye la clase sin __slots__, con el mismo __init__ y propiedades,
+    # para medir la disposición anterior basada en __dict__
+    atributos = {nombre: valor for nombre, valor in vars(cls).items()
+                 if nombre not in ('__slots__', '__dict__', '__weakref__')
+                 and nombre not in getattr(cls, '__slots__', ())}
+    return type(f"{cls.__name__}ConDict", (), atributos)
+
+
+def bytes_por_instancia(fabrica: Callable[[int], object], cantidad: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    instancias = [fabrica(i) for i in range(cantidad)]
+    fin = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Se descuenta la lista contenedora: un puntero por instancia
+    contenedor = instancias.__sizeof__()
+    del instancias
+    return (fin - inicio - contenedor) / cantidad
+
+
+def fabrica(entidad: type, cls: type, cantidad: int) -> Callable[[int], object]:
+    ids = [f"ID-{i:09d}" for i in range(cantidad)]
+    fecha = datetime(2025, 10, 1, 10, 0, 0)
+    if entidad is Libro:
+        return lambda i: cls(ids[i], "Título de ejemplo", "Autor de ejemplo")
+    if entidad is Usuario:
+        return lambda i: cls(ids[i], "Nombre de ejemplo")
+    return lambda i: cls(ids[i], "ISBN-EJEMPLO", "U-EJEMPLO", fecha_prestamo=fecha)
+
+
+def informe(cantidad: int) -> List[Dict[str, object]]:
+    filas = []
+    for cls in (Libro, Usuario, Prestamo):
+        antes = bytes_por_instancia(fabrica(cls, clase_con_dict(cls), cantidad), cantidad)
+        despues = bytes_por_instancia(fabrica(cls, cls, cantidad), cantidad)
+        filas.append({
+            'entidad': cls.__name__,
+            'bytes_con_dict': round(antes, 1),
+            'bytes_con_slots': round(despues, 1),
+            'ahorro_pct': round(100 * (antes - despues) / antes, 1),
+        })
+    return filas
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Bytes por entidad con __dict__ frente a __slots__")
+    parser.add_argument('--cantidad', type=int, default=100_000)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    filas = informe(args.cantidad)
+    if args.json:
+        print(json.dumps(filas, indent=2, ensure_ascii=False))
+        return
+    print(f"{'Entidad':<10} {'__dict__':>10} {'__slots__':>10} {'Ahorro':>8}")
+    for fila in filas:
+        print(f"{fila['entidad']:<10} {fila['bytes_con_dict']:>10} {fila['bytes_con_slots']:>10} "
+              f"{fila['ahorro_pct']:>7}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.biblioteca import Biblioteca, LibroNoDisponibleError
+from src.libro import Libro
+from src.usuario import Usuario
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+PALABRAS = [
+    "amor", "guerra", "paz", "código", "historia", "ciencia", "mar", "noche", "ciudad", "tiempo",
+    "sombra", "luz", "camino", "río", "montaña", "silencio", "memoria", "viaje", "fuego", "jardín",
+    "python", "datos", "sistema", "diseño", "patrón", "arquitectura", "limpio", "ágil", "red", "nube",
+]
+NOMBRES = ["Ana", "Luis", "Marta", "Jorge", "Lucía", "Pablo", "Elena", "Diego", "Sara", "Iván"]
+APELLIDOS = ["Pérez", "García", "López", "Martín", "Sánchez", "Gómez", "Ruiz", "Díaz", "Romero", "Torres"]
+
+
+def generar_libros(cantidad: int, semilla: int = 0) -> List['Libro']:
+    aleatorio = random.Random(semilla)
+    libros = []
+    for i in range(cantidad):
+        titulo = " ".join(aleatorio.choice(PALABRAS) for _ in range(aleatorio.randint(1, 4))).capitalize()
+        autor = f"{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} {i % 997}"
+        libros.append(Libro(f"ISBN-{i:010d}", f"{titulo} {i}", autor))
+    return libros
+
+
+def generar_usuarios(cantidad: int, semilla: int = 0) -> List['Usuario']:
+    aleatorio = random.Random(semilla + 1)
+    return [Usuario(f"U-{i:010d}", f"{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)}")
+            for i in range(cantidad)]
+
+
+def percentil(ordenados: Sequence[int], fraccion: float) -> int:
+    if not ordenados:
+        return 0
+    return ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))]
+
+
+def rss_pico_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa en bytes, Linux en kilobytes
+    return pico // 1024 if sys.platform == 'darwin' else pico
+
+
+def cronometrar(funcion: Callable[..., Any], argumentos: Sequence[Tuple[Any, ...]]) -> List[int]:
+    reloj = time.perf_counter_ns
+    latencias = []
+    for args in argumentos:
+        inicio = reloj()
+        funcion(*args)
+        latencias.append(reloj() - inicio)
+    return latencias
+
+
+def resumir(latencias: List[int]) -> Dict[str, Any]:
+    ordenadas = sorted(latencias)
+    total = sum(ordenadas)
+    return {
+        'operaciones': len(ordenadas),
+        'segundos': round(total / 1e9, 6),
+        'operaciones_por_segundo': round(len(ordenadas) / (total / 1e9), 1) if total else None,
+        'p50_us': round(percentil(ordenadas, 0.50) / 1e3, 2),
+        'p90_us': round(percentil(ordenadas, 0.90) / 1e3, 2),
+        'p99_us': round(percentil(ordenadas, 0.99) / 1e3, 2),
+        'max_us': round(ordenadas[-1] / 1e3, 2) if ordenadas else 0,
+        'rss_pico_kb': rss_pico_kb(),
+    }
+
+
+def ejecutar_tamano(tamano: int, consultas: int, semilla: int) -> Dict[str, Dict[str, Any]]:
+    aleatorio = random.Random(semilla)
+    libros = generar_libros(tamano, semilla)
+    usuarios = generar_usuarios(max(2, tamano // 5), semilla)
+    resultados: Dict[str, Dict[str, Any]] = {}
+
+    biblioteca = Biblioteca()
+    resultados['agregar_libro'] = resumir(cronometrar(biblioteca.agregar_libro, [(l,) for l in libros]))
+    biblioteca.registrar_usuarios_lote(usuarios)
+
+    palabras = [(aleatorio.choice(PALABRAS),) for _ in range(consultas)]
+    apellidos = [(aleatorio.choice(APELLIDOS),) for _ in range(consultas)]
+    buscar = biblioteca.buscar_libros
+    resultados['buscar_titulo'] = resumir(cronometrar(lambda t: buscar(titulo=t), palabras))
+    resultados['buscar_autor'] = resumir(cronometrar(lambda a: buscar(autor=a), apellidos))
+
+    ciclos = min(tamano, consultas * 10)
+    pares = [(libros[aleatorio.randrange(tamano)].isbn, usuarios[i % len(usuarios)].id) for i in range(ciclos)]
+
+    # Cada préstamo se devuelve en el acto, así que ninguno debería fallar; si alguno falla
+    # no cuenta como una operación rápida más sino aparte, en `fallos`
+    correctos: List[bool] = []
+
+    def ciclo(isbn: str, usuario_id: str) -> None:
+        try:
+            prestamo = biblioteca.crear_prestamo(isbn, usuario_id)
+        except (LibroNoDisponibleError, ValueError):
+            correctos.append(False)
+            return
+        biblioteca.devolver_prestamo(prestamo.id)
+        correctos.append(True)
+
+    latencias = cronometrar(ciclo, pares)
+    resultados['ciclo_prestamo_devolucion'] = resumir([l for l, correcto in zip(latencias, correctos) if correcto])
+    resultados['ciclo_prestamo_devolucion']['fallos'] = correctos.count(False)
+
+    # Deja prestado aproximadamente un libro de cada diez para las consultas siguientes
+    activos = 0
+    for i, libro in enumerate(libros[::10]):
+        usuario = usuarios[i % len(usuarios)]
+        if usuario.puede_prestar():
+            biblioteca.crear_prestamo(libro.isbn, usuario.id)
+            activos += 1
+
+    disponibles = [(bool(i % 2),) for i in range(max(1, consultas // 10))]
+    resultados['buscar_disponible'] = resumir(cronometrar(lambda d: buscar(disponible=d), disponibles))
+    resultados['buscar_titulo_autor'] = resumir(cronometrar(
+        lambda t, a: buscar(titulo=t, autor=a), list(zip([p for (p,) in palabras], [a for (a,) in apellidos]))))
+    resultados['buscar_titulo_disponible'] = resumir(cronometrar(
+        lambda t: buscar(titulo=t, disponible=True), palabras))
+
+    ahora = datetime.now()
+    fechas = [(ahora,), (ahora + timedelta(days=15),)] * 5
+    resultados['listar_prestamos_vencidos'] = resumir(cronometrar(biblioteca.listar_prestamos_vencidos, fechas))
+    resultados['listar_prestamos_vencidos']['prestamos_activos'] = activos
+
+    sin_prestamos = [(u.id,) for u in usuarios if u.cantidad_prestamos() == 0][:consultas * 10]
+    resultados['eliminar_usuario'] = resumir(cronometrar(biblioteca.eliminar_usuario, sin_prestamos))
+    return resultados
+
+
+def ejecutar(tamanos: Sequence[int], consultas: int, semilla: int) -> Dict[str, Any]:
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semilla': semilla,
+        'resultados': {str(t): ejecutar_tamano(t, consultas, semilla) for t in tamanos},
+    }
+
+
+def comparar(actual: Dict[str, Any], base: Dict[str, Any], tolerancia: float) -> List[str]:
+    regresiones = []
+    for tamano, escenarios in actual['resultados'].items():
+        for escenario, medida in escenarios.items():
+            referencia = base.get('resultados', {}).get(tamano, {}).get(escenario)
+            if referencia is None:
+                continue
+            if (referencia.get('operaciones_por_segundo') and medida.get('operaciones_por_segundo')
+                    and medida['operaciones_por_segundo'] < referencia['operaciones_por_segundo'] * (1 - tolerancia)):
+                regresiones.append(f"{tamano}/{escenario}: {medida['operaciones_por_segundo']} ops/s "
+                                   f"frente a {referencia['operaciones_por_segundo']}")
+            if referencia.get('p99_us') and medida['p99_us'] > referencia['p99_us'] * (1 + tolerancia):
+                regresiones.append(f"{tamano}/{escenario}: p99 {medida['p99_us']} us "
+                                   f"frente a {referencia['p99_us']}")
+            if medida.get('fallos', 0) > referencia.get('fallos', 0):
+                regresiones.append(f"{tamano}/{escenario}: {medida['fallos']} operaciones fallidas "
+                                   f"frente a {referencia.get('fallos', 0)}")
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Suite de rendimiento de Biblioteca")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--consultas', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default='benchmarks/resultados.json')
+    parser.add_argument('--base', help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    informe = ejecutar(args.tamanos, args.consultas, args.semilla)
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+
+    for tamano, escenarios in informe['resultados'].items():
+        print(f"\n== {tamano} libros ==")
+        print(f"{'Escenario':<28} {'Ops/s':>12} {'p50 us':>9} {'p99 us':>9} {'RSS KB':>10} {'Fallos':>7}")
+        for escenario, medida in escenarios.items():
+            print(f"{escenario:<28} {str(medida['operaciones_por_segundo']):>12} {medida['p50_us']:>9} "
+                  f"{medida['p99_us']:>9} {str(medida['rss_pico_kb']):>10} {medida.get('fallos', ''):>7}")
+
+    if args.base:
+        with open(args.base, encoding='utf-8') as archivo:
+            regresiones = comparar(informe, json.load(archivo), args.tolerancia)
+        if regresiones:
+            print("\nRegresiones:")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            return 1
+        print("\nSin regresiones respecto a la base")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,431 @@
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.libro import Libro
+from src.usuario import Usuario
+from src.prestamo import Prestamo
+from src.biblioteca import LibroNoDisponibleError, UsuarioNoExisteError, LibroNoExisteError
+from src.paginacion import Pagina, paginar
+from src.normalizacion import normalizar
+from src.autocompletado import limite_superior
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS libros (
+    ordinal INTEGER PRIMARY KEY AUTOINCREMENT,
+    isbn TEXT NOT NULL UNIQUE,
+    titulo TEXT NOT NULL,
+    autor TEXT NOT NULL,
+    titulo_busqueda TEXT NOT NULL,
+    autor_busqueda TEXT NOT NULL,
+    disponible INTEGER NOT NULL,
+    ejemplares INTEGER NOT NULL DEFAULT 1,
+    disponibles INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS libros_disponible ON libros (disponible, ordinal);
+CREATE INDEX IF NOT EXISTS libros_titulo_busqueda ON libros (titulo_busqueda);
+CREATE INDEX IF NOT EXISTS libros_autor_busqueda ON libros (autor_busqueda);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS prestamos (
+    ordinal INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    libro_isbn TEXT NOT NULL,
+    usuario_id TEXT NOT NULL,
+    fecha_prestamo TEXT NOT NULL,
+    fecha_limite TEXT NOT NULL,
+    fecha_devolucion TEXT
+);
+CREATE INDEX IF NOT EXISTS prestamos_activos_usuario
+    ON prestamos (usuario_id, ordinal) WHERE fecha_devolucion IS NULL;
+CREATE INDEX IF NOT EXISTS prestamos_activos_limite
+    ON prestamos (fecha_limite) WHERE fecha_devolucion IS NULL;
+"""
+
+ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS libros_fts USING fts5 (
+    titulo_busqueda, autor_busqueda,
+    content='libros', content_rowid='ordinal', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS libros_fts_alta AFTER INSERT ON libros BEGIN
+    INSERT INTO libros_fts (rowid, titulo_busqueda, autor_busqueda)
+    VALUES (new.ordinal, new.titulo_busqueda, new.autor_busqueda);
+END;
+CREATE TRIGGER IF NOT EXISTS libros_fts_baja AFTER DELETE ON libros BEGIN
+    INSERT INTO libros_fts (libros_fts, rowid, titulo_busqueda, autor_busqueda)
+    VALUES ('delete', old.ordinal, old.titulo_busqueda, old.autor_busqueda);
+END;
+"""
+
+# Versión 1: claves de búsqueda sin tildes ni mayúsculas (normalizar)
+VERSION_ESQUEMA = 1
+
+COLUMNAS_LIBRO = "isbn, titulo, autor, ejemplares, disponibles"
+INSERTAR_LIBRO = ("INTO libros (isbn, titulo, autor, titulo_busqueda, autor_busqueda, disponible, "
+                  "ejemplares, disponibles) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+COLUMNAS_PRESTAMO = "id, libro_isbn, usuario_id, fecha_prestamo, fecha_devolucion"
+
+
+def _fecha_a_texto(fecha: Optional[datetime]) -> Optional[str]:
+    # Precisión fija para que el orden lexicográfico coincida con el cronológico
+    return fecha.isoformat(timespec='microseconds') if fecha is not None else None
+
+
+def _texto_a_fecha(texto: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(texto) if texto is not None else None
+
+
+def _frase_fts(texto: str) -> str:
+    return '"' + texto.replace('"', '""') + '"'
+
+
+class BibliotecaSQLite:
+
+    LONGITUD_TRIGRAMA = 3
+    TAMANO_LOTE = 500
+
+    def __init__(self, ruta: str = ':memory:'):
+        self._conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False,
+                                         cached_statements=256)
+        self._cerrojo = threading.RLock()
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute("PRAGMA foreign_keys=OFF")
+        self._conexion.create_function('normalizar', 1, normalizar, deterministic=True)
+        self._conexion.executescript(ESQUEMA)
+        self._migrar()
+        try:
+            self._conexion.executescript(ESQUEMA_FTS)
+            self._fts = True
+        except sqlite3.OperationalError:
+            # SQLite sin FTS5 o sin el tokenizador trigram: se busca con instr()
+            self._fts = False
+        self._renormalizar()
+
+    def _migrar(self) -> None:
+        # Bases creadas antes del inventario por ejemplares: un ejemplar por título
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(libros)")}
+        if 'ejemplares' not in columnas:
+            self._conexion.executescript("""
+                BEGIN;
+                ALTER TABLE libros ADD COLUMN ejemplares INTEGER NOT NULL DEFAULT 1;
+                ALTER TABLE libros ADD COLUMN disponibles INTEGER NOT NULL DEFAULT 1;
+                UPDATE libros SET disponibles = disponible;
+                COMMIT;
+            """)
+
+    def _renormalizar(self) -> None:
+        # Las bases anteriores guardaban solo lower(): se recalculan las claves y el índice FTS,
+        # que es de contenido externo y no tiene disparador de actualización
+        (version,) = self._conexion.execute("PRAGMA user_version").fetchone()
+        if version >= VERSION_ESQUEMA:
+            return
+        with self._transaccion() as conexion:
+            conexion.execute("UPDATE libros SET titulo_busqueda = normalizar(titulo), "
+                             "autor_busqueda = normalizar(autor)")
+            if self._fts:
+                conexion.execute("INSERT INTO libros_fts (libros_fts) VALUES ('rebuild')")
+            conexion.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+
+    def cerrar(self) -> None:
+        self._conexion.close()
+
+    def __enter__(self) -> 'BibliotecaSQLite':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    @contextmanager
+    def _transaccion(self) -> Iterator[sqlite3.Connection]:
+        with self._cerrojo:
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conexion
+            except BaseException:
+                self._conexion.execute("ROLLBACK")
+                raise
+            self._conexion.execute("COMMIT")
+
+    def _consultar(self, sql: str, parametros: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        with self._cerrojo:
+            return self._conexion.execute(sql, parametros).fetchall()
+
+    @staticmethod
+    def _fila_a_libro(fila: Tuple[Any, ...]) -> 'Libro':
+        isbn, titulo, autor, ejemplares, disponibles = fila
+        return Libro(isbn, titulo, autor, ejemplares=ejemplares, disponibles=disponibles)
+
+    @staticmethod
+    def _valores_libro(libro: 'Libro') -> Tuple[Any, ...]:
+        return (libro.isbn, libro.titulo, libro.autor, libro.titulo_busqueda, libro.autor_busqueda,
+                int(libro.disponible), libro.ejemplares, libro.ejemplares_disponibles)
+
+    @staticmethod
+    def _fila_a_prestamo(fila: Tuple[Any, ...]) -> 'Prestamo':
+        id, libro_isbn, usuario_id, fecha_prestamo, fecha_devolucion = fila
+        return Prestamo(id, libro_isbn, usuario_id,
+                        fecha_prestamo=_texto_a_fecha(fecha_prestamo),
+                        fecha_devolucion=_texto_a_fecha(fecha_devolucion))
+
+    def agregar_libro(self, libro: 'Libro') -> bool:
+        try:
+            with self._transaccion() as conexion:
+                conexion.execute("INSERT " + INSERTAR_LIBRO, self._valores_libro(libro))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def agregar_libros_lote(self, libros: Iterable['Libro']) -> List[bool]:
+        resultados = []
+        with self._transaccion() as conexion:
+            for libro in libros:
+                cursor = conexion.execute("INSERT OR IGNORE " + INSERTAR_LIBRO, self._valores_libro(libro))
+                resultados.append(cursor.rowcount > 0)
+        return resultados
+
+    def obtener_libro(self, isbn: str) -> Optional['Libro']:
+        filas = self._consultar(f"SELECT {COLUMNAS_LIBRO} FROM libros WHERE isbn = ?", (isbn,))
+        return self._fila_a_libro(filas[0]) if filas else None
+
+    def actualizar_libro(self, isbn: str, **kwargs) -> bool:
+        return bool(self._consultar("SELECT 1 FROM libros WHERE isbn = ?", (isbn,)))
+
+    def eliminar_libro(self, isbn: str) -> bool:
+        with self._transaccion() as conexion:
+            cursor = conexion.execute("DELETE FROM libros WHERE isbn = ? AND disponibles = ejemplares", (isbn,))
+            return cursor.rowcount > 0
+
+    def agregar_ejemplares(self, isbn: str, cantidad: int) -> bool:
+        if not isinstance(cantidad, int) or cantidad < 1:
+            raise ValueError("La cantidad de ejemplares debe ser un entero positivo")
+        with self._transaccion() as conexion:
+            cursor = conexion.execute(
+                "UPDATE libros SET ejemplares = ejemplares + ?, disponibles = disponibles + ?, disponible = 1 "
+                "WHERE isbn = ?", (cantidad, cantidad, isbn))
+            return cursor.rowcount > 0
+
+    def buscar_libros(self, **criterios) -> List['Libro']:
+        condiciones, parametros = self._condiciones_busqueda(criterios)
+        sql = f"SELECT {COLUMNAS_LIBRO} FROM libros"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY ordinal"
+        return [self._fila_a_libro(fila) for fila in self._consultar(sql, tuple(parametros))]
+
+    def autocompletar(self, prefijo: str, campo: str = 'titulo', limite: int = 10) -> List[str]:
+        if campo not in ('titulo', 'autor'):
+            raise ValueError(f"Campo de autocompletado desconocido: {campo}")
+        if limite < 1:
+            raise ValueError("El límite debe ser al menos 1")
+        prefijo = normalizar(prefijo)
+        columna = f"{campo}_busqueda"
+        condicion = f"{columna} >= ?"
+        parametros: List[Any] = [prefijo]
+        if prefijo:
+            # Rango sobre el índice de la clave: solo se leen las filas que empiezan por el prefijo
+            condicion += f" AND {columna} < ?"
+            parametros.append(limite_superior(prefijo))
+        # MIN() fija qué forma original representa a la clave ("Árbol" y "arbol" comparten clave)
+        filas = self._consultar(f"SELECT MIN({campo}) FROM libros WHERE {condicion} "
+                                f"GROUP BY {columna} ORDER BY {columna} LIMIT ?", (*parametros, limite))
+        return [fila[0] for fila in filas]
+
+    def iterar_libros(self, cursor: Optional[int] = None, **criterios) -> Iterator['Libro']:
+        return (libro for _, libro in self._entradas_libros(cursor, criterios))
+
+    def paginar_libros(self, limite: int = 20, cursor: Optional[int] = None, **criterios) -> Pagina:
+        return paginar(self._entradas_libros(cursor, criterios, limite + 1), limite)
+
+    def _entradas_libros(self, cursor: Optional[int], criterios: Dict[str, Any],
+                         limite: Optional[int] = None) -> Iterator[Tuple[int, 'Libro']]:
+        condiciones, parametros = self._condiciones_busqueda(criterios)
+        return self._recorrer(f"SELECT ordinal, {COLUMNAS_LIBRO} FROM libros", condiciones, parametros,
+                              self._fila_a_libro, cursor, limite)
+
+    def _recorrer(self, sql: str, condiciones: List[str], parametros: List[Any],
+                  convertir: Callable[[Tuple[Any, ...]], Any], cursor: Optional[int],
+                  limite: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+        # Paginación por clave: cada lote continúa tras el último ordinal leído, sin OFFSET
+        # y sin mantener el cerrojo de la conexión entre lotes
+        sql += " WHERE " + " AND ".join(condiciones + ["ordinal > ?"]) + " ORDER BY ordinal LIMIT ?"
+        ultimo = -1 if cursor is None else cursor
+        lote = limite if limite is not None else self.TAMANO_LOTE
+        while True:
+            filas = self._consultar(sql, (*parametros, ultimo, lote))
+            for fila in filas:
+                ultimo = fila[0]
+                yield ultimo, convertir(fila[1:])
+            if len(filas) < lote:
+                return
+
+    def _condiciones_busqueda(self, criterios: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+        condiciones: List[str] = []
+        parametros: List[Any] = []
+        coincidencias: List[str] = []
+
+        for criterio, columna in (('titulo', 'titulo_busqueda'), ('autor', 'autor_busqueda')):
+            if criterio not in criterios:
+                continue
+            consulta = normalizar(criterios[criterio])
+            if not consulta:
+                continue
+            condiciones.append(f"instr({columna}, ?) > 0")
+            parametros.append(consulta)
+            if self._fts and len(consulta) >= self.LONGITUD_TRIGRAMA:
+                coincidencias.append(f"{columna} : {_frase_fts(consulta)}")
+
+        if 'disponible' in criterios:
+            condiciones.append("disponible = ?")
+            parametros.append(int(bool(criterios['disponible'])))
+
+        if coincidencias:
+            condiciones.insert(0, "ordinal IN (SELECT rowid FROM libros_fts WHERE libros_fts MATCH ?)")
+            parametros.insert(0, ' AND '.join(coincidencias))
+        return condiciones, parametros
+
+    def registrar_usuario(self, usuario: 'Usuario') -> bool:
+        try:
+            with self._transaccion() as conexion:
+                conexion.execute("INSERT INTO usuarios (id, nombre) VALUES (?, ?)",
+                                 (usuario.id, usuario.nombre))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def registrar_usuarios_lote(self, usuarios: Iterable['Usuario']) -> List[bool]:
+        resultados = []
+        with self._transaccion() as conexion:
+            for usuario in usuarios:
+                cursor = conexion.execute("INSERT OR IGNORE INTO usuarios (id, nombre) VALUES (?, ?)",
+                                          (usuario.id, usuario.nombre))
+                resultados.append(cursor.rowcount > 0)
+        return resultados
+
+    def obtener_usuario(self, id: str) -> Optional['Usuario']:
+        with self._cerrojo:
+            filas = self._consultar("SELECT id, nombre FROM usuarios WHERE id = ?", (id,))
+            if not filas:
+                return None
+            usuario = Usuario(*filas[0])
+            for (isbn,) in self._consultar(
+                    "SELECT libro_isbn FROM prestamos WHERE usuario_id = ? AND fecha_devolucion IS NULL "
+                    "ORDER BY ordinal", (id,)):
+                usuario.agregar_prestamo(isbn)
+            return usuario
+
+    def eliminar_usuario(self, id: str) -> bool:
+        with self._transaccion() as conexion:
+            if conexion.execute("SELECT 1 FROM prestamos WHERE usuario_id = ? AND fecha_devolucion IS NULL "
+                                "LIMIT 1", (id,)).fetchone():
+                return False
+            cursor = conexion.execute("DELETE FROM usuarios WHERE id = ?", (id,))
+            return cursor.rowcount > 0
+
+    def crear_prestamo(self, libro_isbn: str, usuario_id: str) -> 'Prestamo':
+        with self._transaccion() as conexion:
+            fila = conexion.execute("SELECT titulo, disponibles FROM libros WHERE isbn = ?",
+                                    (libro_isbn,)).fetchone()
+            if fila is None:
+                raise LibroNoExisteError(f"Libro con ISBN {libro_isbn} no existe")
+            titulo, disponibles = fila
+            if not disponibles:
+                raise LibroNoDisponibleError(f"Libro {titulo} no está disponible")
+
+            if conexion.execute("SELECT 1 FROM usuarios WHERE id = ?", (usuario_id,)).fetchone() is None:
+                raise UsuarioNoExisteError(f"Usuario con ID {usuario_id} no existe")
+            (activos,) = conexion.execute(
+                "SELECT COUNT(*) FROM prestamos WHERE usuario_id = ? AND fecha_devolucion IS NULL",
+                (usuario_id,)).fetchone()
+            if activos >= Usuario.MAX_LIBROS:
+                raise ValueError(f"Usuario ha alcanzado el límite de préstamos")
+            if conexion.execute("SELECT 1 FROM prestamos WHERE usuario_id = ? AND libro_isbn = ? "
+                                "AND fecha_devolucion IS NULL", (usuario_id, libro_isbn)).fetchone():
+                raise ValueError(f"Usuario ya tiene un ejemplar de {titulo}")
+
+            prestamo = Prestamo(str(uuid.uuid4()), libro_isbn, usuario_id)
+            conexion.execute(
+                "INSERT INTO prestamos (id, libro_isbn, usuario_id, fecha_prestamo, fecha_limite) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (prestamo.id, libro_isbn, usuario_id, _fecha_a_texto(prestamo.fecha_prestamo),
+                 _fecha_a_texto(prestamo.fecha_limite)))
+            # Las expresiones de SET se evalúan con los valores anteriores de la fila
+            conexion.execute("UPDATE libros SET disponibles = disponibles - 1, disponible = disponibles > 1 "
+                             "WHERE isbn = ?", (libro_isbn,))
+        return prestamo
+
+    def devolver_prestamo(self, prestamo_id: str) -> bool:
+        with self._transaccion() as conexion:
+            fila = conexion.execute(
+                "SELECT libro_isbn FROM prestamos WHERE id = ? AND fecha_devolucion IS NULL",
+                (prestamo_id,)).fetchone()
+            if fila is None:
+                return False
+            conexion.execute("UPDATE prestamos SET fecha_devolucion = ? WHERE id = ?",
+                             (_fecha_a_texto(datetime.now()), prestamo_id))
+            conexion.execute("UPDATE libros SET disponibles = disponibles + 1, disponible = 1 WHERE isbn = ?", fila)
+        return True
+
+    def obtener_prestamo(self, prestamo_id: str) -> Optional['Prestamo']:
+        filas = self._consultar(f"SELECT {COLUMNAS_PRESTAMO} FROM prestamos WHERE id = ?", (prestamo_id,))
+        return self._fila_a_prestamo(filas[0]) if filas else None
+
+    def listar_prestamos_activos(self) -> List['Prestamo']:
+        return [self._fila_a_prestamo(fila) for fila in self._consultar(
+            f"SELECT {COLUMNAS_PRESTAMO} FROM prestamos WHERE fecha_devolucion IS NULL ORDER BY ordinal")]
+
+    def listar_prestamos_usuario(self, usuario_id: str) -> List['Prestamo']:
+        return [self._fila_a_prestamo(fila) for fila in self._consultar(
+            f"SELECT {COLUMNAS_PRESTAMO} FROM prestamos WHERE usuario_id = ? AND fecha_devolucion IS NULL "
+            "ORDER BY ordinal", (usuario_id,))]
+
+    def listar_prestamos_vencidos(self, fecha_actual: Optional[datetime] = None) -> List['Prestamo']:
+        fecha = _fecha_a_texto(fecha_actual or datetime.now())
+        return [self._fila_a_prestamo(fila) for fila in self._consultar(
+            f"SELECT {COLUMNAS_PRESTAMO} FROM prestamos WHERE fecha_devolucion IS NULL AND fecha_limite < ? "
+            "ORDER BY ordinal", (fecha,))]
+
+    def iterar_prestamos_activos(self, cursor: Optional[int] = None) -> Iterator['Prestamo']:
+        return (prestamo for _, prestamo in self._entradas_prestamos([], [], cursor))
+
+    def paginar_prestamos_activos(self, limite: int = 20, cursor: Optional[int] = None) -> Pagina:
+        return paginar(self._entradas_prestamos([], [], cursor, limite + 1), limite)
+
+    def iterar_prestamos_usuario(self, usuario_id: str, cursor: Optional[int] = None) -> Iterator['Prestamo']:
+        return (prestamo for _, prestamo in self._entradas_prestamos(["usuario_id = ?"], [usuario_id], cursor))
+
+    def paginar_prestamos_usuario(self, usuario_id: str, limite: int = 20,
+                                  cursor: Optional[int] = None) -> Pagina:
+        return paginar(self._entradas_prestamos(["usuario_id = ?"], [usuario_id], cursor, limite + 1), limite)
+
+    def iterar_prestamos_vencidos(self, fecha_actual: Optional[datetime] = None,
+                                  cursor: Optional[int] = None) -> Iterator['Prestamo']:
+        fecha = _fecha_a_texto(fecha_actual or datetime.now())
+        return (prestamo for _, prestamo in self._entradas_prestamos(["fecha_limite < ?"], [fecha], cursor))
+
+    def paginar_prestamos_vencidos(self, limite: int = 20, fecha_actual: Optional[datetime] = None,
+                                   cursor: Optional[int] = None) -> Pagina:
+        fecha = _fecha_a_texto(fecha_actual or datetime.now())
+        return paginar(self._entradas_prestamos(["fecha_limite < ?"], [fecha], cursor, limite + 1), limite)
+
+    def _entradas_prestamos(self, condiciones: List[str], parametros: List[Any], cursor: Optional[int],
+                            limite: Optional[int] = None) -> Iterator[Tuple[int, 'Prestamo']]:
+        return self._recorrer(f"SELECT ordinal, {COLUMNAS_PRESTAMO} FROM prestamos",
+                              ["fecha_devolucion IS NULL"] + condiciones, parametros,
+                              self._fila_a_prestamo, cursor, limite)
+
+    def total_libros(self) -> int:
+        return self._consultar("SELECT COUNT(*) FROM libros")[0][0]
+
+    def total_usuarios(self) -> int:
+        return self._consultar("SELECT COUNT(*) FROM usuarios")[0][0]
+
+    def total_prestamos_activos(self) -> int:
+        return self._consultar("SELECT COUNT(*) FROM prestamos WHERE fecha_devolucion IS NULL")[0][0]
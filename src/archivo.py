@@ -0,0 +1,229 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.prestamo import Prestamo
+from src.serializacion import fecha_a_texto, texto_a_fecha
+
+# Cada bloque se guarda como longitud (4 bytes, big endian) seguida del contenido comprimido
+CABECERA = struct.Struct('>I')
+
+
+def _prestamo_a_fila(prestamo: 'Prestamo') -> list:
+    return [prestamo.id, prestamo.libro_isbn, prestamo.usuario_id,
+            fecha_a_texto(prestamo.fecha_prestamo), fecha_a_texto(prestamo.fecha_devolucion)]
+
+
+def _fila_a_prestamo(fila: list) -> 'Prestamo':
+    id, libro_isbn, usuario_id, fecha_prestamo, fecha_devolucion = fila
+    return Prestamo(id, libro_isbn, usuario_id,
+                    fecha_prestamo=texto_a_fecha(fecha_prestamo),
+                    fecha_devolucion=texto_a_fecha(fecha_devolucion))
+
+
+class ArchivoPrestamos:
+
+    def __init__(self, ruta: Optional[str] = None, prestamos_por_bloque: int = 256, nivel: int = 6):
+        if prestamos_por_bloque < 1:
+            raise ValueError("prestamos_por_bloque debe ser al menos 1")
+        self._ruta = ruta
+        self._prestamos_por_bloque = prestamos_por_bloque
+        self._nivel = nivel
+        self._cerrojo = threading.Lock()
+
+        # Préstamos aún sin sellar en un bloque, en orden de llegada
+        self._pendientes: Dict[str, 'Prestamo'] = {}
+        # Desplazamiento de cada bloque sellado y bloque que contiene cada préstamo
+        self._bloques: List[int] = []
+        self._indice: Dict[str, int] = {}
+        self._cache: Tuple[int, Dict[str, list]] = (-1, {})
+
+        self._datos = bytearray()
+        self._archivo = None
+        if ruta is not None:
+            self._archivo = open(ruta, 'a+b')
+            self._cargar()
+
+    def _cargar(self) -> None:
+        self._archivo.seek(0)
+        contenido = self._archivo.read()
+        desplazamiento = 0
+        while desplazamiento + CABECERA.size <= len(contenido):
+            (longitud,) = CABECERA.unpack_from(contenido, desplazamiento)
+            fin = desplazamiento + CABECERA.size + longitud
+            if fin > len(contenido):
+                break
+            try:
+                filas = self._descomprimir(contenido[desplazamiento + CABECERA.size:fin])
+            except (zlib.error, ValueError):
+                break
+            numero = len(self._bloques)
+            self._bloques.append(desplazamiento)
+            for id in filas:
+                self._indice[id] = numero
+            desplazamiento = fin
+        if desplazamiento < len(contenido):
+            # Bloque incompleto tras una caída durante la escritura
+            self._archivo.truncate(desplazamiento)
+        self._longitud = desplazamiento
+
+    def cerrar(self) -> None:
+        with self._cerrojo:
+            if self._archivo is not None:
+                self._sellar()
+                self._archivo.close()
+                self._archivo = None
+
+    def __enter__(self) -> 'ArchivoPrestamos':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def agregar(self, prestamo: 'Prestamo') -> bool:
+        if prestamo.esta_activo():
+            raise ValueError("Solo se archivan préstamos devueltos")
+        with self._cerrojo:
+            if prestamo.id in self._pendientes or prestamo.id in self._indice:
+                return False
+            self._pendientes[prestamo.id] = prestamo
+            if len(self._pendientes) >= self._prestamos_por_bloque:
+                self._sellar()
+            return True
+
+    def obtener(self, prestamo_id: str) -> Optional['Prestamo']:
+        with self._cerrojo:
+            prestamo = self._pendientes.get(prestamo_id)
+            if prestamo is not None:
+                return prestamo
+            numero = self._indice.get(prestamo_id)
+            if numero is None:
+                return None
+            return _fila_a_prestamo(self._leer_bloque(numero)[prestamo_id])
+
+    def sellar(self) -> None:
+        with self._cerrojo:
+            self._sellar()
+
+    def _sellar(self) -> None:
+        if not self._pendientes:
+            return
+        filas = [_prestamo_a_fila(p) for p in self._pendientes.values()]
+        bloque = zlib.compress(json.dumps(filas, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                               self._nivel)
+        registro = CABECERA.pack(len(bloque)) + bloque
+
+        numero = len(self._bloques)
+        if self._ruta is not None:
+            self._comprobar_abierto()
+            self._archivo.write(registro)
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self._bloques.append(self._longitud)
+            self._longitud += len(registro)
+        else:
+            self._bloques.append(len(self._datos))
+            self._datos += registro
+        for id in self._pendientes:
+            self._indice[id] = numero
+        self._pendientes = {}
+
+    def bloques(self) -> int:
+        return len(self._bloques)
+
+    def pendientes(self) -> List['Prestamo']:
+        with self._cerrojo:
+            return list(self._pendientes.values())
+
+    def exportar_bloques(self, desde: int = 0) -> bytes:
+        # Bloques sellados tal como están guardados, sin descomprimirlos
+        with self._cerrojo:
+            if desde >= len(self._bloques):
+                return b''
+            inicio = self._bloques[desde]
+            if self._ruta is None:
+                return bytes(self._datos[inicio:])
+            self._comprobar_abierto()
+            self._archivo.seek(inicio)
+            return self._archivo.read(self._longitud - inicio)
+
+    def importar_bloques(self, datos: bytes) -> int:
+        # Añade bloques exportados sin recomprimirlos; solo se descomprimen para indexar
+        with self._cerrojo:
+            desplazamiento = 0
+            numero = len(self._bloques)
+            indice: Dict[str, int] = {}
+            inicios: List[int] = []
+            while desplazamiento < len(datos):
+                if desplazamiento + CABECERA.size > len(datos):
+                    raise ValueError("Bloque de préstamos incompleto")
+                (longitud,) = CABECERA.unpack_from(datos, desplazamiento)
+                fin = desplazamiento + CABECERA.size + longitud
+                if fin > len(datos):
+                    raise ValueError("Bloque de préstamos incompleto")
+                for id in self._descomprimir(datos[desplazamiento + CABECERA.size:fin]):
+                    indice[id] = numero + len(inicios)
+                inicios.append(desplazamiento)
+                desplazamiento = fin
+
+            if self._ruta is not None:
+                self._comprobar_abierto()
+                self._archivo.write(datos)
+                self._archivo.flush()
+                os.fsync(self._archivo.fileno())
+                base = self._longitud
+                self._longitud += len(datos)
+            else:
+                base = len(self._datos)
+                self._datos += datos
+            self._bloques.extend(base + inicio for inicio in inicios)
+            self._indice.update(indice)
+            return len(inicios)
+
+    def _leer_bloque(self, numero: int) -> Dict[str, list]:
+        # Un bloque descomprimido en caché: las consultas de historial suelen ser contiguas
+        if self._cache[0] == numero:
+            return self._cache[1]
+        desplazamiento = self._bloques[numero]
+        if self._ruta is not None:
+            self._comprobar_abierto()
+            self._archivo.seek(desplazamiento)
+            (longitud,) = CABECERA.unpack(self._archivo.read(CABECERA.size))
+            comprimido = self._archivo.read(longitud)
+        else:
+            (longitud,) = CABECERA.unpack_from(self._datos, desplazamiento)
+            inicio = desplazamiento + CABECERA.size
+            comprimido = bytes(self._datos[inicio:inicio + longitud])
+        filas = self._descomprimir(comprimido)
+        self._cache = (numero, filas)
+        return filas
+
+    def _comprobar_abierto(self) -> None:
+        if self._archivo is None:
+            raise RuntimeError("El archivo de préstamos está cerrado")
+
+    @staticmethod
+    def _descomprimir(comprimido: bytes) -> Dict[str, list]:
+        return {fila[0]: fila for fila in json.loads(zlib.decompress(comprimido).decode('utf-8'))}
+
+    def __contains__(self, prestamo_id: str) -> bool:
+        return prestamo_id in self._pendientes or prestamo_id in self._indice
+
+    def __len__(self) -> int:
+        return len(self._indice) + len(self._pendientes)
+
+    def __iter__(self) -> Iterator['Prestamo']:
+        with self._cerrojo:
+            bloques = len(self._bloques)
+            pendientes = list(self._pendientes.values())
+        for numero in range(bloques):
+            with self._cerrojo:
+                filas = list(self._leer_bloque(numero).values())
+            for fila in filas:
+                yield _fila_a_prestamo(fila)
+        yield from pendientes
+
+    def bytes_comprimidos(self) -> int:
+        return self._longitud if self._ruta is not None else len(self._datos)
@@ -0,0 +1,56 @@
+from bisect import bisect_left, insort
+from typing import Dict, List
+from src.normalizacion import normalizar
+
+
+def limite_superior(prefijo: str) -> str:
+    # Menor cadena mayor que todas las que empiezan por `prefijo` (orden por punto de código)
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+class IndicePrefijos:
+
+    def __init__(self):
+        # Claves normalizadas ordenadas; cada una recuerda sus formas originales y cuántos libros la usan
+        self._claves: List[str] = []
+        self._formas: Dict[str, Dict[str, int]] = {}
+
+    def agregar(self, clave: str, texto: str) -> None:
+        formas = self._formas.get(clave)
+        if formas is None:
+            formas = self._formas[clave] = {}
+            if not self._claves or self._claves[-1] < clave:
+                self._claves.append(clave)
+            else:
+                insort(self._claves, clave)
+        formas[texto] = formas.get(texto, 0) + 1
+
+    def eliminar(self, clave: str, texto: str) -> bool:
+        formas = self._formas.get(clave)
+        if formas is None or texto not in formas:
+            return False
+        formas[texto] -= 1
+        if not formas[texto]:
+            del formas[texto]
+        if not formas:
+            del self._formas[clave]
+            del self._claves[bisect_left(self._claves, clave)]
+        return True
+
+    def completar(self, prefijo: str, limite: int = 10) -> List[str]:
+        if limite < 1:
+            raise ValueError("El límite debe ser al menos 1")
+        prefijo = normalizar(prefijo)
+        claves = self._claves
+        i = bisect_left(claves, prefijo)
+        resultado = []
+        # Las claves con el prefijo son contiguas: se leen las primeras `limite` y se para
+        for clave in claves[i:i + limite]:
+            if not clave.startswith(prefijo):
+                break
+            # Entre las formas originales de la clave se muestra la menor, igual que MIN() en SQLite
+            resultado.append(min(self._formas[clave]))
+        return resultado
+
+    def __len__(self) -> int:
+        return len(self._claves)
@@ -1,9 +1,24 @@
-from typing import List, Optional, Dict
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Dict, Set, Tuple
+from contextlib import contextmanager
 from datetime import datetime
+import heapq
+import os
+import threading
 import uuid
 from src.libro import Libro
 from src.usuario import Usuario
 from src.prestamo import Prestamo
+from src.indice import IndiceTexto
+from src.autocompletado import IndicePrefijos
+from src.vencimientos import ColaVencimientos, EvaluacionVencimientos
+from src.paginacion import Pagina, SecuenciaOrdenada, paginar
+from src.archivo import ArchivoPrestamos
+from src.reservas import ColaReservas, Reserva
+from src.concurrencia import CerrojosSegmentados, adquirir
+from src.instantaneas import RegistroVersiones, VistaBiblioteca
+from src.estadisticas import Estadisticas
+from src.serializacion import (libro_a_dict, libro_desde_dict, usuario_a_dict, usuario_desde_dict,
+                               prestamo_a_dict, prestamo_desde_dict, reserva_a_dict, fecha_a_texto, texto_a_fecha)
 
 class LibroNoDisponibleError(Exception):
     pass
@@ -14,19 +29,164 @@ class UsuarioNoExisteError(Exception):
 class LibroNoExisteError(Exception):
     pass
 
+class ResultadoLote(NamedTuple):
+    # Todo o nada: si algún elemento falla no se aplica ninguno y `errores` dice cuáles
+    elementos: List[Any]
+    errores: List[Optional[Exception]]
+    
+    @property
+    def aplicado(self) -> bool:
+        return all(error is None for error in self.errores)
+
+def _identificadores(cantidad: int) -> List[str]:
+    # Una sola lectura de os.urandom para todo el lote en lugar de una por préstamo
+    aleatorio = os.urandom(16 * cantidad)
+    return [str(uuid.UUID(bytes=aleatorio[i:i + 16], version=4)) for i in range(0, 16 * cantidad, 16)]
+
 class Biblioteca:
     
-    def __init__(self):
+    def __init__(self, archivo: Optional[ArchivoPrestamos] = None):
         self._catalogo: Dict[str, 'Libro'] = {} 
         self._usuarios: Dict[str, 'Usuario'] = {} 
         self._prestamos: Dict[str, 'Prestamo'] = {}  
+        # Los préstamos devueltos salen del conjunto de trabajo hacia el archivo comprimido
+        self._archivo = archivo if archivo is not None else ArchivoPrestamos()
+        self._prestamos_activos: Dict[str, 'Prestamo'] = {}
+        self._prestamos_por_usuario: Dict[str, Dict[str, 'Prestamo']] = {}
+        self._vencimientos = ColaVencimientos()
+        self._reservas = ColaReservas()
+        self._indice_titulos = IndiceTexto()
+        self._indice_autores = IndiceTexto()
+        self._prefijos_titulos = IndicePrefijos()
+        self._prefijos_autores = IndicePrefijos()
+        self._secuencia_libros = SecuenciaOrdenada()
+        self._secuencia_activos = SecuenciaOrdenada()
+        self._disponibles: Set[str] = set()
+        self._prestados: Set[str] = set()
+        self._observadores: List[Callable[[str, Dict[str, Any]], None]] = []
+        # Eventos retenidos por hilo mientras se aplica un lote, para publicarlo de una vez
+        self._lote_en_curso = threading.local()
+        self._cerrojos_libros = CerrojosSegmentados()
+        self._cerrojos_usuarios = CerrojosSegmentados()
+        self._cerrojo_catalogo = threading.Lock()
+        # Imágenes previas de los registros que cambian mientras hay instantáneas abiertas
+        self._versiones = RegistroVersiones()
+        self._estadisticas = Estadisticas()
     
-    def agregar_libro(self, libro: 'Libro') -> bool:
-        if libro.isbn in self._catalogo:
+    def _bloquear(self, isbns: Iterable[str] = (), usuario_ids: Iterable[str] = ()):
+        # Orden global: segmentos de libros, después segmentos de usuarios
+        return adquirir(self._cerrojos_libros.cerrojos(isbns) + self._cerrojos_usuarios.cerrojos(usuario_ids))
+    
+    def _bloquear_todo(self):
+        return adquirir(self._cerrojos_libros.todos() + self._cerrojos_usuarios.todos()
+                        + [self._cerrojo_catalogo])
+    
+    def instantanea(self) -> 'VistaBiblioteca':
+        # Solo espera a que terminen las escrituras en curso; después no bloquea a ninguna
+        with self._bloquear_todo():
+            version = self._versiones.abrir()
+        return VistaBiblioteca(self, self._versiones, version)
+    
+    def agregar_observador(self, observador: Callable[[str, Dict[str, Any]], None]) -> None:
+        self._observadores.append(observador)
+    
+    def quitar_observador(self, observador: Callable[[str, Dict[str, Any]], None]) -> bool:
+        if observador not in self._observadores:
             return False
-        self._catalogo[libro.isbn] = libro
+        self._observadores.remove(observador)
         return True
     
+    def _notificar(self, tipo: str, datos: Dict[str, Any]) -> None:
+        eventos = getattr(self._lote_en_curso, 'eventos', None)
+        if eventos is not None:
+            eventos.append({'t': tipo, 'd': datos})
+            return
+        for observador in self._observadores:
+            observador(tipo, datos)
+    
+    @contextmanager
+    def _agrupar_eventos(self):
+        # Los observadores reciben el lote como un único evento 'lote': el diario lo escribe en
+        # una sola línea y, tras una caída, se reproduce entero o nada
+        self._lote_en_curso.eventos = []
+        try:
+            yield
+        finally:
+            eventos = self._lote_en_curso.eventos
+            self._lote_en_curso.eventos = None
+            if eventos:
+                self._notificar('lote', {'eventos': eventos})
+    
+    def agregar_libro(self, libro: 'Libro') -> bool:
+        with self._bloquear([libro.isbn]), self._cerrojo_catalogo:
+            if libro.isbn in self._catalogo:
+                return False
+            self._insertar_libro(libro)
+            if self._observadores:
+                self._notificar('libro_agregado', libro_a_dict(libro))
+        return True
+    
+    def agregar_libros_lote(self, libros: Iterable['Libro']) -> List[bool]:
+        libros = list(libros)
+        resultados = []
+        with self._bloquear(libro.isbn for libro in libros), self._cerrojo_catalogo:
+            notificar = bool(self._observadores)
+            for libro in libros:
+                if libro.isbn in self._catalogo:
+                    resultados.append(False)
+                    continue
+                self._versiones.anotar('libros', libro.isbn, None)
+                self._catalogo[libro.isbn] = libro
+                resultados.append(True)
+            # Los índices derivados se construyen en una segunda pasada sobre el lote ya validado
+            for libro, agregado in zip(libros, resultados):
+                if not agregado:
+                    continue
+                self._indexar_libro(libro)
+                if notificar:
+                    self._notificar('libro_agregado', libro_a_dict(libro))
+        return resultados
+    
+    def _insertar_libro(self, libro: 'Libro') -> None:
+        self._versiones.anotar('libros', libro.isbn, None)
+        self._catalogo[libro.isbn] = libro
+        self._indexar_libro(libro)
+    
+    def _retirar_libro(self, isbn: str) -> None:
+        if self._versiones.abiertas:
+            self._versiones.anotar('libros', isbn, self._catalogo[isbn])
+            self._versiones.anotar('posiciones', isbn, self._secuencia_libros.posicion(isbn))
+        self._desindexar_libro(self._catalogo.pop(isbn))
+        self._reservas.retirar_libro(isbn)
+    
+    def _indexar_libro(self, libro: 'Libro') -> None:
+        self._indice_titulos.agregar_normalizado(libro.isbn, libro.titulo_busqueda)
+        self._indice_autores.agregar_normalizado(libro.isbn, libro.autor_busqueda)
+        self._prefijos_titulos.agregar(libro.titulo_busqueda, libro.titulo)
+        self._prefijos_autores.agregar(libro.autor_busqueda, libro.autor)
+        self._secuencia_libros.agregar(libro.isbn)
+        self._actualizar_disponibilidad(libro)
+        self._estadisticas.libro_agregado(libro.ejemplares, libro.ejemplares_prestados)
+    
+    def _desindexar_libro(self, libro: 'Libro') -> None:
+        isbn = libro.isbn
+        self._indice_titulos.eliminar(isbn)
+        self._indice_autores.eliminar(isbn)
+        self._prefijos_titulos.eliminar(libro.titulo_busqueda, libro.titulo)
+        self._prefijos_autores.eliminar(libro.autor_busqueda, libro.autor)
+        self._secuencia_libros.eliminar(isbn)
+        self._disponibles.discard(isbn)
+        self._prestados.discard(isbn)
+        self._estadisticas.libro_retirado(libro.ejemplares, libro.ejemplares_prestados)
+    
+    def _actualizar_disponibilidad(self, libro: 'Libro') -> None:
+        if libro.disponible:
+            self._prestados.discard(libro.isbn)
+            self._disponibles.add(libro.isbn)
+        else:
+            self._disponibles.discard(libro.isbn)
+            self._prestados.add(libro.isbn)
+    
     def obtener_libro(self, isbn: str) -> Optional['Libro']:
         return self._catalogo.get(isbn)
     
@@ -35,101 +195,557 @@ class Biblioteca:
             return False
         return True
     
+    def agregar_ejemplares(self, isbn: str, cantidad: int) -> bool:
+        with self._bloquear([isbn]):
+            libro = self._catalogo.get(isbn)
+            if libro is None:
+                return False
+            self._versiones.anotar('libros', isbn, libro)
+            libro.agregar_ejemplares(cantidad)
+            self._actualizar_disponibilidad(libro)
+            self._estadisticas.ejemplares_agregados(cantidad)
+            if self._observadores:
+                self._notificar('ejemplares_agregados', {'isbn': isbn, 'cantidad': cantidad})
+        self._entregar_reservas(isbn)
+        return True
+    
     def eliminar_libro(self, isbn: str) -> bool:
-        if isbn not in self._catalogo:
-            return False
-        if not self._catalogo[isbn].disponible:
-            return False
-        del self._catalogo[isbn]
+        with self._bloquear([isbn]), self._cerrojo_catalogo:
+            if isbn not in self._catalogo:
+                return False
+            if self._catalogo[isbn].ejemplares_prestados:
+                return False
+            self._retirar_libro(isbn)
+            if self._observadores:
+                self._notificar('libro_eliminado', {'isbn': isbn})
         return True
     
     def buscar_libros(self, **criterios) -> List['Libro']:
-        resultados = list(self._catalogo.values())
-        
-        if 'titulo' in criterios:
-            titulo = criterios['titulo'].lower()
-            resultados = [l for l in resultados if titulo in l.titulo.lower()]
-        
-        if 'autor' in criterios:
-            autor = criterios['autor'].lower()
-            resultados = [l for l in resultados if autor in l.autor.lower()]
+        # La misma selección y el mismo orden que la paginación, sin cursor ni límite
+        return [libro for _, libro in self._entradas_libros(None, criterios)]
+    
+    def autocompletar(self, prefijo: str, campo: str = 'titulo', limite: int = 10) -> List[str]:
+        if campo not in ('titulo', 'autor'):
+            raise ValueError(f"Campo de autocompletado desconocido: {campo}")
+        prefijos = self._prefijos_titulos if campo == 'titulo' else self._prefijos_autores
+        with self._cerrojo_catalogo:
+            return prefijos.completar(prefijo, limite)
+    
+    @staticmethod
+    def _intersecar(actual: Optional[Set[str]], nuevo: Optional[Set[str]]) -> Optional[Set[str]]:
+        if actual is None:
+            return nuevo
+        if nuevo is None:
+            return actual
+        return actual & nuevo
+    
+    def iterar_libros(self, cursor: Optional[int] = None, **criterios) -> Iterator['Libro']:
+        return (libro for _, libro in self._entradas_libros(cursor, criterios))
+    
+    def paginar_libros(self, limite: int = 20, cursor: Optional[int] = None, **criterios) -> Pagina:
+        return paginar(self._entradas_libros(cursor, criterios, limite + 1), limite)
+    
+    def _entradas_libros(self, cursor: Optional[int], criterios: Dict[str, Any],
+                         limite: Optional[int] = None) -> Iterator[Tuple[int, 'Libro']]:
+        with self._cerrojo_catalogo:
+            candidatos: Optional[Set[str]] = None
+            if 'titulo' in criterios:
+                candidatos = self._intersecar(candidatos, self._indice_titulos.buscar(criterios['titulo']))
+            if 'autor' in criterios:
+                candidatos = self._intersecar(candidatos, self._indice_autores.buscar(criterios['autor']))
+            
+            disponibilidad = None
+            if 'disponible' in criterios:
+                disponibilidad = self._disponibles if criterios['disponible'] else self._prestados
+                # Recorrer el catálogo en orden hasta reunir `limite` cuesta del orden de limite·n/k
+                # entradas y seleccionar del conjunto, k: se toma el conjunto si es lo más barato
+                total = len(self._catalogo)
+                if candidatos is None and len(disponibilidad) ** 2 < (limite or total) * total:
+                    candidatos = disponibilidad.copy()
+                elif candidatos is not None:
+                    candidatos = candidatos & disponibilidad
+                if candidatos is not None:
+                    disponibilidad = None
+            
+            if candidatos is not None:
+                posicion_de = self._secuencia_libros.posicion
+                seleccion = (candidatos if cursor is None
+                             else (isbn for isbn in candidatos if posicion_de(isbn) > cursor))
+                # Con límite basta una selección parcial de los k primeros en lugar de ordenar todo
+                isbns = (heapq.nsmallest(limite, seleccion, key=posicion_de) if limite is not None
+                         else sorted(seleccion, key=posicion_de))
+                entradas = list(zip(map(posicion_de, isbns), isbns))
         
-        if 'disponible' in criterios:
-            disponible = criterios['disponible']
-            resultados = [l for l in resultados if l.disponible == disponible]
+        if candidatos is None:
+            # Sin candidatos se recorre el catálogo en orden y se para en cuanto hay bastantes
+            entradas = self._secuencia_libros.desde(cursor)
         
-        return resultados
+        catalogo = self._catalogo
+        for posicion, isbn in entradas:
+            libro = catalogo.get(isbn)
+            if libro is None:
+                continue
+            if disponibilidad is not None and isbn not in disponibilidad:
+                continue
+            yield posicion, libro
     
     def registrar_usuario(self, usuario: 'Usuario') -> bool:
-        if usuario.id in self._usuarios:
-            return False
-        self._usuarios[usuario.id] = usuario
+        with self._bloquear(usuario_ids=[usuario.id]):
+            if usuario.id in self._usuarios:
+                return False
+            self._insertar_usuario(usuario)
+            if self._observadores:
+                self._notificar('usuario_registrado', usuario_a_dict(usuario))
         return True
     
+    def registrar_usuarios_lote(self, usuarios: Iterable['Usuario']) -> List[bool]:
+        usuarios = list(usuarios)
+        resultados = []
+        with self._bloquear(usuario_ids=[usuario.id for usuario in usuarios]):
+            notificar = bool(self._observadores)
+            for usuario in usuarios:
+                if usuario.id in self._usuarios:
+                    resultados.append(False)
+                    continue
+                self._insertar_usuario(usuario)
+                resultados.append(True)
+                if notificar:
+                    self._notificar('usuario_registrado', usuario_a_dict(usuario))
+        return resultados
+    
     def obtener_usuario(self, id: str) -> Optional['Usuario']:
         return self._usuarios.get(id)
     
     def eliminar_usuario(self, id: str) -> bool:
-        if id not in self._usuarios:
-            return False
-        if self._usuarios[id].cantidad_prestamos() > 0:
-            return False
-        del self._usuarios[id]
+        with self._bloquear(usuario_ids=[id]):
+            if id not in self._usuarios:
+                return False
+            if self._usuarios[id].cantidad_prestamos() > 0:
+                return False
+            self._retirar_usuario(id)
+            if self._observadores:
+                self._notificar('usuario_eliminado', {'id': id})
         return True
     
+    def _insertar_usuario(self, usuario: 'Usuario') -> None:
+        self._versiones.anotar('usuarios', usuario.id, None)
+        self._usuarios[usuario.id] = usuario
+    
+    def _retirar_usuario(self, id: str) -> None:
+        self._versiones.anotar('usuarios', id, self._usuarios[id])
+        del self._usuarios[id]
+        self._estadisticas.usuario_retirado(id)
+        self._reservas.retirar_usuario(id)
+    
     def crear_prestamo(self, libro_isbn: str, usuario_id: str) -> 'Prestamo':
-        libro = self.obtener_libro(libro_isbn)
+        with self._bloquear([libro_isbn], [usuario_id]):
+            libro, usuario = self._validar_prestamo(libro_isbn, usuario_id)
+            return self._prestar(libro, usuario)
+    
+    def _validar_prestamo(self, libro_isbn: str, usuario_id: str, apartados: int = 0,
+                          asignados: Set[str] = frozenset()) -> Tuple['Libro', 'Usuario']:
+        # `apartados` y `asignados`: ejemplares del libro y libros del usuario ya comprometidos
+        # por elementos anteriores del mismo lote
+        libro = self._validar_libro(libro_isbn, apartados)
+        usuario = self._validar_usuario(usuario_id, libro_isbn, libro.titulo, asignados)
+        self._validar_reservas(libro, usuario_id, apartados)
+        return libro, usuario
+    
+    # Las tres partes de la validación por separado: BibliotecaParticionada comprueba el libro
+    # y el usuario en procesos distintos
+    def _validar_libro(self, libro_isbn: str, apartados: int = 0) -> 'Libro':
+        libro = self._catalogo.get(libro_isbn)
         if libro is None:
             raise LibroNoExisteError(f"Libro con ISBN {libro_isbn} no existe")
-        if not libro.disponible:
+        if libro.ejemplares_disponibles - apartados <= 0:
             raise LibroNoDisponibleError(f"Libro {libro.titulo} no está disponible")
-        
-        usuario = self.obtener_usuario(usuario_id)
+        return libro
+    
+    def _validar_usuario(self, usuario_id: str, libro_isbn: str, titulo: str,
+                         asignados: Set[str] = frozenset()) -> 'Usuario':
+        usuario = self._usuarios.get(usuario_id)
         if usuario is None:
             raise UsuarioNoExisteError(f"Usuario con ID {usuario_id} no existe")
-        if not usuario.puede_prestar():
+        if usuario.cantidad_prestamos() + len(asignados) >= usuario.MAX_LIBROS:
             raise ValueError(f"Usuario ha alcanzado el límite de préstamos")
-        
-        prestamo_id = str(uuid.uuid4())
-        prestamo = Prestamo(prestamo_id, libro_isbn, usuario_id)
-        
-        libro.prestar()
-        usuario.agregar_prestamo(libro_isbn)
-        self._prestamos[prestamo_id] = prestamo
-        
+        if usuario.tiene_libro(libro_isbn) or libro_isbn in asignados:
+            raise ValueError(f"Usuario ya tiene un ejemplar de {titulo}")
+        return usuario
+    
+    def _validar_reservas(self, libro: 'Libro', usuario_id: str, apartados: int = 0) -> None:
+        if self._reservas.tiene(libro.isbn):
+            # Los ejemplares libres de un título con cola son de los primeros de la cola
+            self._retirar_reservas_vencidas(libro.isbn)
+            posicion = self._reservas.posicion(libro.isbn, usuario_id)
+            libres = libro.ejemplares_disponibles - apartados
+            if self._reservas.tiene(libro.isbn) and (posicion is None or posicion > libres):
+                raise LibroNoDisponibleError(f"Libro {libro.titulo} está reservado")
+    
+    def crear_prestamos_lote(self, pares: Iterable[Tuple[str, str]]) -> 'ResultadoLote':
+        pares = list(pares)
+        with self._bloquear({isbn for isbn, _ in pares}, {usuario_id for _, usuario_id in pares}):
+            # Una pasada valida la cesta entera contando lo que ya comprometen los elementos anteriores
+            validados: List[Optional[Tuple['Libro', 'Usuario']]] = []
+            errores: List[Optional[Exception]] = []
+            apartados: Dict[str, int] = {}
+            asignados: Dict[str, Set[str]] = {}
+            for isbn, usuario_id in pares:
+                try:
+                    validado = self._validar_prestamo(isbn, usuario_id, apartados.get(isbn, 0),
+                                                      asignados.get(usuario_id, frozenset()))
+                except (LibroNoExisteError, LibroNoDisponibleError, UsuarioNoExisteError, ValueError) as error:
+                    validados.append(None)
+                    errores.append(error)
+                    continue
+                apartados[isbn] = apartados.get(isbn, 0) + 1
+                asignados.setdefault(usuario_id, set()).add(isbn)
+                validados.append(validado)
+                errores.append(None)
+            
+            if any(error is not None for error in errores):
+                return ResultadoLote([None] * len(pares), errores)
+            with self._agrupar_eventos():
+                prestamos = [self._prestar(libro, usuario, prestamo_id)
+                             for (libro, usuario), prestamo_id in zip(validados, _identificadores(len(pares)))]
+        return ResultadoLote(prestamos, errores)
+    
+    def _prestar(self, libro: 'Libro', usuario: 'Usuario', prestamo_id: Optional[str] = None) -> 'Prestamo':
+        prestamo = Prestamo(prestamo_id or str(uuid.uuid4()), libro.isbn, usuario.id)
+        self._aplicar_prestamo(libro, usuario, prestamo)
+        if self._observadores:
+            self._notificar('prestamo_creado', prestamo_a_dict(prestamo))
+        reserva = self._reservas.retirar(libro.isbn, usuario.id)
+        if reserva is not None and self._observadores:
+            self._notificar('reserva_retirada', {'libro_isbn': libro.isbn, 'usuario_id': usuario.id})
         return prestamo
     
+    def _aplicar_prestamo(self, libro: 'Libro', usuario: 'Usuario', prestamo: 'Prestamo') -> None:
+        self._versiones.anotar('libros', libro.isbn, libro)
+        self._versiones.anotar('usuarios', usuario.id, usuario)
+        libro.prestar()
+        self._actualizar_disponibilidad(libro)
+        self._estadisticas.ejemplar_prestado()
+        usuario.agregar_prestamo(libro.isbn)
+        self._registrar_prestamo(prestamo)
+    
+    def _registrar_prestamo(self, prestamo: 'Prestamo') -> None:
+        if not prestamo.esta_activo():
+            self._estadisticas.prestamo_registrado(prestamo.id, prestamo.usuario_id, None, None)
+            self._archivo.agregar(prestamo)
+            return
+        self._estadisticas.prestamo_registrado(prestamo.id, prestamo.usuario_id,
+                                               self._autor_de(prestamo), prestamo.fecha_limite)
+        self._prestamos[prestamo.id] = prestamo
+        self._versiones.anotar('prestamos', prestamo.id, None)
+        self._prestamos_activos[prestamo.id] = prestamo
+        self._secuencia_activos.agregar(prestamo.id)
+        self._prestamos_por_usuario.setdefault(prestamo.usuario_id, {})[prestamo.id] = prestamo
+        self._vencimientos.agregar(prestamo)
+    
     def devolver_prestamo(self, prestamo_id: str) -> bool:
-        if prestamo_id not in self._prestamos:
+        prestamo = self._prestamos.get(prestamo_id)
+        if prestamo is None:
             return False
         
-        prestamo = self._prestamos[prestamo_id]
-        if not prestamo.esta_activo():
-            return False
+        with self._bloquear([prestamo.libro_isbn], [prestamo.usuario_id]):
+            if not prestamo.esta_activo():
+                return False
+            
+            self._aplicar_devolucion(prestamo)
+            if self._observadores:
+                self._notificar('prestamo_devuelto', {
+                    'id': prestamo.id,
+                    'fecha_devolucion': fecha_a_texto(prestamo.fecha_devolucion),
+                })
+        self._entregar_reservas(prestamo.libro_isbn)
+        # El usuario recupera cupo: puede recibir ejemplares libres que tuviera reservados
+        for reserva in self._reservas.de_usuario(prestamo.usuario_id):
+            self._entregar_reservas(reserva.libro_isbn)
+        return True
+    
+    def devolver_prestamos_lote(self, prestamo_ids: Iterable[str]) -> 'ResultadoLote':
+        prestamo_ids = list(prestamo_ids)
+        prestamos = [self._prestamos.get(prestamo_id) for prestamo_id in prestamo_ids]
+        encontrados = [prestamo for prestamo in prestamos if prestamo is not None]
+        
+        with self._bloquear({p.libro_isbn for p in encontrados}, {p.usuario_id for p in encontrados}):
+            errores: List[Optional[Exception]] = []
+            vistos: Set[str] = set()
+            for prestamo_id, prestamo in zip(prestamo_ids, prestamos):
+                if prestamo is None or not prestamo.esta_activo() or prestamo_id in vistos:
+                    errores.append(ValueError(f"Préstamo {prestamo_id} no existe o ya fue devuelto"))
+                    continue
+                vistos.add(prestamo_id)
+                errores.append(None)
+            if any(error is not None for error in errores):
+                return ResultadoLote([None] * len(prestamo_ids), errores)
+            
+            # Una sola fecha de devolución para toda la cesta
+            fecha = datetime.now()
+            with self._agrupar_eventos():
+                for prestamo in prestamos:
+                    self._aplicar_devolucion(prestamo, fecha)
+                    if self._observadores:
+                        self._notificar('prestamo_devuelto', {
+                            'id': prestamo.id,
+                            'fecha_devolucion': fecha_a_texto(prestamo.fecha_devolucion),
+                        })
+        
+        isbns = dict.fromkeys(prestamo.libro_isbn for prestamo in prestamos)
+        for usuario_id in dict.fromkeys(prestamo.usuario_id for prestamo in prestamos):
+            isbns.update(dict.fromkeys(reserva.libro_isbn for reserva in self._reservas.de_usuario(usuario_id)))
+        for isbn in isbns:
+            self._entregar_reservas(isbn)
+        return ResultadoLote(prestamos, errores)
+    
+    def reservar(self, libro_isbn: str, usuario_id: str, fecha: Optional[datetime] = None) -> 'Reserva':
+        with self._bloquear([libro_isbn], [usuario_id]):
+            libro = self._catalogo.get(libro_isbn)
+            if libro is None:
+                raise LibroNoExisteError(f"Libro con ISBN {libro_isbn} no existe")
+            usuario = self._usuarios.get(usuario_id)
+            if usuario is None:
+                raise UsuarioNoExisteError(f"Usuario con ID {usuario_id} no existe")
+            if usuario.tiene_libro(libro_isbn):
+                raise ValueError(f"Usuario ya tiene un ejemplar de {libro.titulo}")
+            if self._reservas.obtener(libro_isbn, usuario_id) is not None:
+                raise ValueError(f"Usuario ya tiene una reserva de {libro.titulo}")
+            if libro.disponible and not self._reservas.tiene(libro_isbn):
+                raise ValueError(f"Libro {libro.titulo} está disponible")
+            
+            reserva = self._reservas.agregar(libro_isbn, usuario_id, fecha)
+            if self._observadores:
+                self._notificar('reserva_creada', reserva_a_dict(reserva))
+            if libro.disponible:
+                # Hay ejemplares guardados para la cola y puede que alcancen a esta reserva
+                self._ofrecer_ejemplares(libro)
+                reserva = self._reservas.obtener(libro_isbn, usuario_id)
+        return reserva
+    
+    def cancelar_reserva(self, libro_isbn: str, usuario_id: str) -> bool:
+        with self._bloquear([libro_isbn], [usuario_id]):
+            if self._reservas.retirar(libro_isbn, usuario_id) is None:
+                return False
+            if self._observadores:
+                self._notificar('reserva_retirada', {'libro_isbn': libro_isbn, 'usuario_id': usuario_id})
+        self._entregar_reservas(libro_isbn)
+        return True
+    
+    def posicion_reserva(self, libro_isbn: str, usuario_id: str) -> Optional[int]:
+        return self._reservas.posicion(libro_isbn, usuario_id)
+    
+    def listar_reservas(self, libro_isbn: str) -> List['Reserva']:
+        return self._reservas.en_orden(libro_isbn)
+    
+    def listar_reservas_usuario(self, usuario_id: str) -> List['Reserva']:
+        return self._reservas.de_usuario(usuario_id)
+    
+    def _retirar_reservas_vencidas(self, libro_isbn: str) -> None:
+        retiradas = self._reservas.retirar_vencidas(libro_isbn, datetime.now())
+        for reserva in retiradas:
+            if self._observadores:
+                self._notificar('reserva_retirada', {'libro_isbn': libro_isbn, 'usuario_id': reserva.usuario_id})
+        libro = self._catalogo.get(libro_isbn)
+        if retiradas and libro is not None and libro.disponible:
+            # El ejemplar que no se recogió pasa a los siguientes de la cola
+            self._ofrecer_ejemplares(libro)
+    
+    def _ofrecer_ejemplares(self, libro: 'Libro') -> None:
+        for reserva in self._reservas.ofrecer(libro.isbn, libro.ejemplares_disponibles, datetime.now()):
+            if self._observadores:
+                self._notificar('reserva_ofrecida', {
+                    'libro_isbn': reserva.libro_isbn,
+                    'usuario_id': reserva.usuario_id,
+                    'fecha_limite': fecha_a_texto(reserva.fecha_limite),
+                })
+    
+    def _entregar_reservas(self, libro_isbn: str) -> None:
+        # Se elige candidato solo con el cerrojo del libro y después se toman libro y usuario
+        # juntos, en el orden global; mientras tanto crear_prestamo no puede llevarse el
+        # ejemplar porque está reservado para la cola
+        while self._reservas.tiene(libro_isbn):
+            with self._bloquear([libro_isbn]):
+                libro = self._catalogo.get(libro_isbn)
+                if libro is None or not libro.disponible:
+                    return
+                self._retirar_reservas_vencidas(libro_isbn)
+                candidato = self._reservas.primera(
+                    libro_isbn, lambda reserva: self._puede_recibir(reserva.usuario_id, libro_isbn))
+                if candidato is None:
+                    # Nadie de la cola puede llevárselo todavía: empieza su plazo para recogerlo
+                    self._ofrecer_ejemplares(libro)
+                    return
+            
+            with self._bloquear([libro_isbn], [candidato.usuario_id]):
+                libro = self._catalogo.get(libro_isbn)
+                if (libro is not None and libro.disponible
+                        and self._reservas.obtener(libro_isbn, candidato.usuario_id) is not None
+                        and self._puede_recibir(candidato.usuario_id, libro_isbn)):
+                    self._prestar(libro, self._usuarios[candidato.usuario_id])
+    
+    def _puede_recibir(self, usuario_id: str, libro_isbn: str) -> bool:
+        usuario = self._usuarios.get(usuario_id)
+        return usuario is not None and usuario.puede_prestar() and not usuario.tiene_libro(libro_isbn)
+    
+    def _aplicar_devolucion(self, prestamo: 'Prestamo', fecha: Optional[datetime] = None) -> None:
+        libro = self._catalogo.get(prestamo.libro_isbn)
+        usuario = self._usuarios.get(prestamo.usuario_id)
         
-        libro = self.obtener_libro(prestamo.libro_isbn)
-        usuario = self.obtener_usuario(prestamo.usuario_id)
+        if libro:
+            self._versiones.anotar('libros', libro.isbn, libro)
+        if usuario:
+            self._versiones.anotar('usuarios', usuario.id, usuario)
+        self._versiones.anotar('prestamos', prestamo.id, prestamo)
         
         if libro:
             libro.devolver()
+            self._actualizar_disponibilidad(libro)
+            self._estadisticas.ejemplar_devuelto()
         if usuario:
             usuario.remover_prestamo(prestamo.libro_isbn)
         
-        prestamo.devolver()
-        return True
+        prestamo.devolver(fecha)
+        self._desactivar_prestamo(prestamo)
+    
+    def _desactivar_prestamo(self, prestamo: 'Prestamo') -> None:
+        del self._prestamos_activos[prestamo.id]
+        self._secuencia_activos.eliminar(prestamo.id)
+        prestamos_usuario = self._prestamos_por_usuario[prestamo.usuario_id]
+        del prestamos_usuario[prestamo.id]
+        if not prestamos_usuario:
+            del self._prestamos_por_usuario[prestamo.usuario_id]
+        self._vencimientos.retirar(prestamo.id)
+        self._estadisticas.prestamo_cerrado(prestamo.id, self._autor_de(prestamo))
+        del self._prestamos[prestamo.id]
+        self._archivo.agregar(prestamo)
+    
+    def _autor_de(self, prestamo: 'Prestamo') -> Optional[str]:
+        libro = self._catalogo.get(prestamo.libro_isbn)
+        return libro.autor if libro is not None else None
+    
+    def _aplicar_evento(self, tipo: str, datos: Dict[str, Any]) -> None:
+        if tipo == 'lote':
+            for evento in datos['eventos']:
+                self._aplicar_evento(evento['t'], evento['d'])
+        elif tipo == 'libro_agregado':
+            self._insertar_libro(libro_desde_dict(datos))
+        elif tipo == 'libro_eliminado':
+            self._retirar_libro(datos['isbn'])
+        elif tipo == 'ejemplares_agregados':
+            libro = self._catalogo[datos['isbn']]
+            libro.agregar_ejemplares(datos['cantidad'])
+            self._actualizar_disponibilidad(libro)
+            self._estadisticas.ejemplares_agregados(datos['cantidad'])
+        elif tipo == 'reserva_creada':
+            self._reservas.agregar(datos['libro_isbn'], datos['usuario_id'],
+                                   texto_a_fecha(datos['fecha_reserva']), datos['ticket'],
+                                   texto_a_fecha(datos.get('fecha_limite')))
+        elif tipo == 'reserva_ofrecida':
+            self._reservas.abrir_plazo(datos['libro_isbn'], datos['usuario_id'],
+                                       texto_a_fecha(datos['fecha_limite']))
+        elif tipo == 'reserva_retirada':
+            self._reservas.retirar(datos['libro_isbn'], datos['usuario_id'])
+        elif tipo == 'usuario_registrado':
+            self._insertar_usuario(usuario_desde_dict(datos))
+        elif tipo == 'usuario_eliminado':
+            self._retirar_usuario(datos['id'])
+        elif tipo == 'prestamo_creado':
+            prestamo = prestamo_desde_dict(datos)
+            self._aplicar_prestamo(self._catalogo[prestamo.libro_isbn],
+                                   self._usuarios[prestamo.usuario_id], prestamo)
+        elif tipo == 'prestamo_devuelto':
+            self._aplicar_devolucion(self._prestamos[datos['id']], texto_a_fecha(datos['fecha_devolucion']))
+        else:
+            raise ValueError(f"Tipo de evento desconocido: {tipo}")
     
     def obtener_prestamo(self, prestamo_id: str) -> Optional['Prestamo']:
-        return self._prestamos.get(prestamo_id)
+        prestamo = self._prestamos.get(prestamo_id)
+        if prestamo is None:
+            return self._archivo.obtener(prestamo_id)
+        return prestamo
     
     def listar_prestamos_activos(self) -> List['Prestamo']:
-        return [p for p in self._prestamos.values() if p.esta_activo()]
+        return list(self._prestamos_activos.values())
     
     def listar_prestamos_usuario(self, usuario_id: str) -> List['Prestamo']:
-        return [p for p in self._prestamos.values() 
-                if p.usuario_id == usuario_id and p.esta_activo()]
+        return list(self._prestamos_por_usuario.get(usuario_id, {}).values())
+    
+    def listar_prestamos_vencidos(self, fecha_actual: Optional[datetime] = None) -> List['Prestamo']:
+        return self._vencimientos.vencidos(fecha_actual or datetime.now())
+    
+    def evaluar_vencimientos(self, fecha_actual: Optional[datetime] = None) -> 'EvaluacionVencimientos':
+        # Días restantes, días de retraso y multa de todos los préstamos activos con un solo reloj
+        return self._vencimientos.evaluar(fecha_actual or datetime.now())
+    
+    def iterar_prestamos_activos(self, cursor: Optional[int] = None) -> Iterator['Prestamo']:
+        return (prestamo for _, prestamo in self._entradas_activos(cursor))
+    
+    def paginar_prestamos_activos(self, limite: int = 20, cursor: Optional[int] = None) -> Pagina:
+        return paginar(self._entradas_activos(cursor), limite)
+    
+    def _entradas_activos(self, cursor: Optional[int]) -> Iterator[Tuple[int, 'Prestamo']]:
+        for posicion, prestamo_id in self._secuencia_activos.desde(cursor):
+            prestamo = self._prestamos_activos.get(prestamo_id)
+            if prestamo is not None:
+                yield posicion, prestamo
+    
+    def iterar_prestamos_usuario(self, usuario_id: str, cursor: Optional[int] = None) -> Iterator['Prestamo']:
+        return (prestamo for _, prestamo in self._entradas_usuario(usuario_id, cursor))
+    
+    def paginar_prestamos_usuario(self, usuario_id: str, limite: int = 20,
+                                  cursor: Optional[int] = None) -> Pagina:
+        return paginar(self._entradas_usuario(usuario_id, cursor), limite)
+    
+    def _entradas_usuario(self, usuario_id: str, cursor: Optional[int]) -> Iterator[Tuple[int, 'Prestamo']]:
+        # Un usuario tiene como mucho Usuario.MAX_LIBROS préstamos activos
+        inicio = -1 if cursor is None else cursor
+        for prestamo in list(self._prestamos_por_usuario.get(usuario_id, {}).values()):
+            try:
+                posicion = self._secuencia_activos.posicion(prestamo.id)
+            except KeyError:
+                continue
+            if posicion > inicio:
+                yield posicion, prestamo
+    
+    def iterar_prestamos_vencidos(self, fecha_actual: Optional[datetime] = None,
+                                  cursor: Optional[int] = None) -> Iterator['Prestamo']:
+        return (prestamo for _, prestamo in self._entradas_vencidas(fecha_actual or datetime.now(), cursor))
+    
+    def paginar_prestamos_vencidos(self, limite: int = 20, fecha_actual: Optional[datetime] = None,
+                                   cursor: Optional[int] = None) -> Pagina:
+        return paginar(self._entradas_vencidas(fecha_actual or datetime.now(), cursor, limite + 1), limite)
+    
+    def _entradas_vencidas(self, fecha_actual: datetime, cursor: Optional[int],
+                           limite: Optional[int] = None) -> Iterator[Tuple[int, 'Prestamo']]:
+        # La cola de vencimientos da solo los vencidos, sin recorrer los demás préstamos activos;
+        # el cursor es su posición en el orden de alta, como en el resto de listados
+        inicio = -1 if cursor is None else cursor
+        entradas = []
+        for prestamo in self._vencimientos.vencidos(fecha_actual):
+            try:
+                posicion = self._secuencia_activos.posicion(prestamo.id)
+            except KeyError:
+                continue
+            if posicion > inicio:
+                entradas.append((posicion, prestamo))
+        orden = lambda entrada: entrada[0]
+        yield from (heapq.nsmallest(limite, entradas, key=orden) if limite is not None
+                    else sorted(entradas, key=orden))
+    
+    def prestamos_por_autor(self, autor: str) -> int:
+        return self._estadisticas.prestamos_por_autor(autor)
     
-    def listar_prestamos_vencidos(self) -> List['Prestamo']:
-        return [p for p in self._prestamos.values() if p.esta_vencido()]
+    def estadisticas(self, limite: int = 5, fecha_actual: Optional[datetime] = None) -> Dict[str, Any]:
+        resumen = self._estadisticas.resumen(limite)
+        if fecha_actual is not None:
+            # El recuento incremental sigue al reloj real; otra fecha se consulta en la cola
+            resumen['prestamos_vencidos'] = len(self._vencimientos.vencidos(fecha_actual))
+        return {
+            'libros': len(self._catalogo),
+            'usuarios': len(self._usuarios),
+            'prestamos_activos': len(self._prestamos_activos),
+            **resumen,
+        }
     
     def total_libros(self) -> int:
         return len(self._catalogo)
@@ -138,4 +754,4 @@ class Biblioteca:
         return len(self._usuarios)
     
     def total_prestamos_activos(self) -> int:
-        return len(self.listar_prestamos_activos())
\ No newline at end of file
+        return len(self._prestamos_activos)
@@ -0,0 +1,233 @@
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src.libro import Libro
+from src.normalizacion import normalizar
+
+# Disposición del archivo (secciones alineadas a 8 bytes; cabecera y registros en little endian,
+# arreglos de enteros sin signo de 32 bits en el orden nativo para leerlos sin copiar):
+#   cabecera | registros | índice hash | ejemplares | disponibles |
+#   desplazamientos de claves de título | de autor | claves de título | de autor | cadenas
+MAGIA = b'BIBC'
+VERSION = 1
+CABECERA = struct.Struct('<4sHxxII10Q')
+# Cada libro: (desplazamiento, longitud) de ISBN, título y autor en la tabla de cadenas
+REGISTRO = struct.Struct('<IHIHIH')
+SEPARADOR = b'\x00'
+
+
+def _alinear(datos: bytearray) -> None:
+    datos.extend(bytes(-len(datos) % 8))
+
+
+def _ranuras_para(cantidad: int) -> int:
+    # Potencia de dos con ocupación máxima del 50 %: sondeo lineal corto
+    ranuras = 8
+    while ranuras < 2 * cantidad:
+        ranuras *= 2
+    return ranuras
+
+
+def escribir_catalogo(ruta: str, libros: Iterable['Libro']) -> int:
+    cadenas = bytearray()
+    posiciones: Dict[str, int] = {}
+
+    def cadena(texto: str) -> Tuple[int, int]:
+        codificado = texto.encode('utf-8')
+        if len(codificado) > 0xFFFF:
+            raise ValueError(f"Cadena demasiado larga para el catálogo binario: {texto[:40]}...")
+        # Las cadenas repetidas (autores, sobre todo) se guardan una sola vez
+        desplazamiento = posiciones.get(texto)
+        if desplazamiento is None:
+            desplazamiento = posiciones[texto] = len(cadenas)
+            cadenas.extend(codificado)
+        return desplazamiento, len(codificado)
+
+    registros = bytearray()
+    isbns: List[bytes] = []
+    vistos: Set[str] = set()
+    ejemplares = array('I')
+    disponibles = array('I')
+    claves = (bytearray(), bytearray())
+    desplazamientos = (array('I'), array('I'))
+    for libro in libros:
+        if libro.isbn in vistos:
+            continue
+        vistos.add(libro.isbn)
+        registros.extend(REGISTRO.pack(*cadena(libro.isbn), *cadena(libro.titulo), *cadena(libro.autor)))
+        isbns.append(libro.isbn.encode('utf-8'))
+        ejemplares.append(libro.ejemplares)
+        disponibles.append(libro.ejemplares_disponibles)
+        for blob, indice, clave in zip(claves, desplazamientos, (libro.titulo_busqueda, libro.autor_busqueda)):
+            indice.append(len(blob))
+            blob.extend(clave.encode('utf-8') + SEPARADOR)
+    for blob, indice in zip(claves, desplazamientos):
+        indice.append(len(blob))
+
+    ranuras = _ranuras_para(len(isbns))
+    mascara = ranuras - 1
+    indice_hash = array('I', bytes(4 * ranuras))
+    for numero, isbn in enumerate(isbns):
+        ranura = zlib.crc32(isbn) & mascara
+        while indice_hash[ranura]:
+            ranura = (ranura + 1) & mascara
+        # 0 marca una ranura vacía: se guarda el número de registro más uno
+        indice_hash[ranura] = numero + 1
+
+    cuerpo = bytearray()
+    secciones = []
+    for seccion in (registros, indice_hash, ejemplares, disponibles, desplazamientos[0], desplazamientos[1],
+                    claves[0], claves[1], cadenas):
+        _alinear(cuerpo)
+        secciones.append(CABECERA.size + len(cuerpo))
+        cuerpo.extend(seccion.tobytes() if isinstance(seccion, array) else seccion)
+    cabecera = CABECERA.pack(MAGIA, VERSION, len(isbns), ranuras, *secciones, CABECERA.size + len(cuerpo))
+
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(cabecera)
+        archivo.write(cuerpo)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+    return len(isbns)
+
+
+class CatalogoBinario:
+    # Catálogo de solo lectura sobre un archivo proyectado en memoria: abrirlo no lee los libros,
+    # las páginas las comparte la caché del sistema entre procesos y cada Libro se crea al pedirlo
+
+    def __init__(self, ruta: str):
+        self._archivo = open(ruta, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._archivo.close()
+            raise ValueError(f"{ruta} no es un catálogo binario")
+        if len(self._mapa) < CABECERA.size:
+            self.cerrar()
+            raise ValueError(f"{ruta} no es un catálogo binario")
+        (magia, version, self._cantidad, self._ranuras, self._registros, indice, ejemplares, disponibles,
+         desplazamientos_titulo, desplazamientos_autor, self._claves_titulo, self._claves_autor,
+         self._cadenas, fin) = CABECERA.unpack_from(self._mapa)
+        if magia != MAGIA or version != VERSION or fin != len(self._mapa):
+            self.cerrar()
+            raise ValueError(f"{ruta} no es un catálogo binario de la versión {VERSION}")
+
+        vista = memoryview(self._mapa)
+        self._vistas = [vista]
+        self._indice = self._enteros(vista, indice, self._ranuras)
+        self._ejemplares = self._enteros(vista, ejemplares, self._cantidad)
+        self._disponibles = self._enteros(vista, disponibles, self._cantidad)
+        self._desplazamientos_titulo = self._enteros(vista, desplazamientos_titulo, self._cantidad + 1)
+        self._desplazamientos_autor = self._enteros(vista, desplazamientos_autor, self._cantidad + 1)
+
+    def _enteros(self, vista: memoryview, inicio: int, cantidad: int) -> memoryview:
+        enteros = vista[inicio:inicio + 4 * cantidad].cast('I')
+        self._vistas.append(enteros)
+        return enteros
+
+    def cerrar(self) -> None:
+        # Las vistas exportadas impiden cerrar el mmap: se liberan primero
+        for vista in reversed(getattr(self, '_vistas', [])):
+            vista.release()
+        self._vistas = []
+        if not self._mapa.closed:
+            self._mapa.close()
+        self._archivo.close()
+
+    def __enter__(self) -> 'CatalogoBinario':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def _cadena(self, desplazamiento: int, longitud: int) -> str:
+        inicio = self._cadenas + desplazamiento
+        return self._mapa[inicio:inicio + longitud].decode('utf-8')
+
+    def _libro(self, numero: int) -> 'Libro':
+        (isbn, largo_isbn, titulo, largo_titulo, autor,
+         largo_autor) = REGISTRO.unpack_from(self._mapa, self._registros + numero * REGISTRO.size)
+        return Libro(self._cadena(isbn, largo_isbn), self._cadena(titulo, largo_titulo),
+                     self._cadena(autor, largo_autor), ejemplares=self._ejemplares[numero],
+                     disponibles=self._disponibles[numero])
+
+    def _buscar_registro(self, isbn: str) -> Optional[int]:
+        buscado = isbn.encode('utf-8')
+        mascara = self._ranuras - 1
+        ranura = zlib.crc32(buscado) & mascara
+        while True:
+            numero = self._indice[ranura]
+            if not numero:
+                return None
+            desplazamiento, longitud = REGISTRO.unpack_from(self._mapa, self._registros + (numero - 1) * REGISTRO.size)[:2]
+            inicio = self._cadenas + desplazamiento
+            if self._mapa[inicio:inicio + longitud] == buscado:
+                return numero - 1
+            ranura = (ranura + 1) & mascara
+
+    def obtener_libro(self, isbn: str) -> Optional['Libro']:
+        numero = self._buscar_registro(isbn)
+        return self._libro(numero) if numero is not None else None
+
+    def __contains__(self, isbn: str) -> bool:
+        return self._buscar_registro(isbn) is not None
+
+    def _coincidencias(self, inicio: int, desplazamientos: memoryview, consulta: str) -> Optional[List[int]]:
+        patron = normalizar(consulta).encode('utf-8')
+        if not patron:
+            return None
+        if SEPARADOR in patron:
+            return []
+        # Búsqueda en C sobre las claves contiguas; cada coincidencia salta al registro siguiente
+        fin = inicio + desplazamientos[self._cantidad]
+        numeros = []
+        posicion = self._mapa.find(patron, inicio, fin)
+        while posicion != -1:
+            numero = bisect_right(desplazamientos, posicion - inicio) - 1
+            numeros.append(numero)
+            posicion = self._mapa.find(patron, inicio + desplazamientos[numero + 1], fin)
+        return numeros
+
+    def iterar_libros(self, **criterios) -> Iterator['Libro']:
+        numeros: Optional[List[int]] = None
+        for criterio, inicio, desplazamientos in (
+                ('titulo', self._claves_titulo, self._desplazamientos_titulo),
+                ('autor', self._claves_autor, self._desplazamientos_autor)):
+            if criterio not in criterios:
+                continue
+            encontrados = self._coincidencias(inicio, desplazamientos, criterios[criterio])
+            if encontrados is None:
+                continue
+            if numeros is None:
+                numeros = encontrados
+            else:
+                conjunto = set(encontrados)
+                numeros = [numero for numero in numeros if numero in conjunto]
+        if numeros is None:
+            numeros = range(self._cantidad)
+
+        disponibles = self._disponibles
+        filtrar = 'disponible' in criterios
+        disponible = bool(criterios.get('disponible'))
+        for numero in numeros:
+            if filtrar and (disponibles[numero] > 0) != disponible:
+                continue
+            yield self._libro(numero)
+
+    def buscar_libros(self, **criterios) -> List['Libro']:
+        return list(self.iterar_libros(**criterios))
+
+    def __iter__(self) -> Iterator['Libro']:
+        return self.iterar_libros()
+
+    def __len__(self) -> int:
+        return self._cantidad
+
+    def total_libros(self) -> int:
+        return self._cantidad
@@ -0,0 +1,37 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
+
+
+class CerrojosSegmentados:
+
+    def __init__(self, segmentos: int = 64):
+        if segmentos < 1:
+            raise ValueError("Debe haber al menos un segmento")
+        self._cerrojos = [threading.Lock() for _ in range(segmentos)]
+
+    def segmento(self, clave: str) -> int:
+        return hash(clave) % len(self._cerrojos)
+
+    def cerrojos(self, claves: Iterable[str]) -> List[threading.Lock]:
+        # Orden fijo por índice de segmento para que dos hilos nunca se esperen en ciclo
+        return [self._cerrojos[i] for i in sorted({self.segmento(c) for c in claves})]
+
+    def todos(self) -> List[threading.Lock]:
+        return list(self._cerrojos)
+
+    def __len__(self) -> int:
+        return len(self._cerrojos)
+
+
+@contextmanager
+def adquirir(cerrojos: Iterable[threading.Lock]) -> Iterator[None]:
+    adquiridos = []
+    try:
+        for cerrojo in cerrojos:
+            cerrojo.acquire()
+            adquiridos.append(cerrojo)
+        yield
+    finally:
+        for cerrojo in reversed(adquiridos):
+            cerrojo.release()
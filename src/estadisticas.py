@@ -0,0 +1,204 @@
+import heapq
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class Ranking:
+    # Claves agrupadas en cubos por cuenta y cubos enlazados en orden, como en una caché LFU:
+    # sumar o restar uno mueve la clave a un cubo vecino en O(1) y los k primeros se leen
+    # desde el cubo mayor sin ordenar nada
+
+    def __init__(self):
+        self._cuentas: Dict[str, int] = {}
+        self._cubos: Dict[int, Dict[str, None]] = {}
+        self._inferior: Dict[int, Optional[int]] = {}
+        self._superior: Dict[int, Optional[int]] = {}
+        self._maximo: Optional[int] = None
+        self._minimo: Optional[int] = None
+
+    def sumar(self, clave: str, cantidad: int = 1) -> int:
+        cuenta = self._cuentas.get(clave, 0)
+        nueva = cuenta + cantidad
+        if nueva not in self._cubos:
+            inferior = cuenta if cuenta else None
+            superior = self._superior[cuenta] if cuenta else self._minimo
+            # Sumando uno el hueco es el siguiente; con más, se avanza por los cubos intermedios
+            while superior is not None and superior < nueva:
+                inferior, superior = superior, self._superior[superior]
+            self._enlazar(nueva, inferior, superior)
+        self._cubos[nueva][clave] = None
+        if cuenta:
+            self._sacar(clave, cuenta)
+        self._cuentas[clave] = nueva
+        return nueva
+
+    def restar(self, clave: str) -> int:
+        cuenta = self._cuentas.get(clave, 0)
+        if not cuenta:
+            return 0
+        nueva = cuenta - 1
+        if nueva:
+            if nueva not in self._cubos:
+                self._enlazar(nueva, self._inferior[cuenta], cuenta)
+            self._cubos[nueva][clave] = None
+            self._cuentas[clave] = nueva
+        else:
+            del self._cuentas[clave]
+        self._sacar(clave, cuenta)
+        return nueva
+
+    def eliminar(self, clave: str) -> bool:
+        cuenta = self._cuentas.pop(clave, 0)
+        if not cuenta:
+            return False
+        self._sacar(clave, cuenta)
+        return True
+
+    def _enlazar(self, cuenta: int, inferior: Optional[int], superior: Optional[int]) -> None:
+        self._cubos[cuenta] = {}
+        self._inferior[cuenta] = inferior
+        self._superior[cuenta] = superior
+        if inferior is None:
+            self._minimo = cuenta
+        else:
+            self._superior[inferior] = cuenta
+        if superior is None:
+            self._maximo = cuenta
+        else:
+            self._inferior[superior] = cuenta
+
+    def _sacar(self, clave: str, cuenta: int) -> None:
+        cubo = self._cubos[cuenta]
+        del cubo[clave]
+        if cubo:
+            return
+        inferior = self._inferior.pop(cuenta)
+        superior = self._superior.pop(cuenta)
+        del self._cubos[cuenta]
+        if inferior is None:
+            self._minimo = superior
+        else:
+            self._superior[inferior] = superior
+        if superior is None:
+            self._maximo = inferior
+        else:
+            self._inferior[superior] = inferior
+
+    def cuenta(self, clave: str) -> int:
+        return self._cuentas.get(clave, 0)
+
+    def primeros(self, limite: int) -> List[Tuple[str, int]]:
+        # A igual cuenta, primero la clave que llegó antes a ella
+        resultado: List[Tuple[str, int]] = []
+        cuenta = self._maximo
+        while cuenta is not None and len(resultado) < limite:
+            for clave in self._cubos[cuenta]:
+                resultado.append((clave, cuenta))
+                if len(resultado) == limite:
+                    break
+            cuenta = self._inferior[cuenta]
+        return resultado
+
+    def __len__(self) -> int:
+        return len(self._cuentas)
+
+
+class Estadisticas:
+    # Agregados que Biblioteca actualiza en cada alta, baja, préstamo y devolución, para que
+    # el panel se lea en tiempo constante sea cual sea el tamaño del catálogo
+
+    def __init__(self):
+        self._cerrojo = threading.Lock()
+        self._ejemplares = 0
+        self._prestados = 0
+        self._autores = Ranking()
+        self._usuarios = Ranking()
+        # Préstamos activos aún no vencidos, por fecha límite; los devueltos se descartan al salir
+        self._por_vencer: List[Tuple[datetime, str]] = []
+        self._limites: Dict[str, datetime] = {}
+        self._vencidos: Set[str] = set()
+        self._revisado: Optional[datetime] = None
+
+    def libro_agregado(self, ejemplares: int, prestados: int) -> None:
+        with self._cerrojo:
+            self._ejemplares += ejemplares
+            self._prestados += prestados
+
+    def libro_retirado(self, ejemplares: int, prestados: int) -> None:
+        with self._cerrojo:
+            self._ejemplares -= ejemplares
+            self._prestados -= prestados
+
+    def ejemplares_agregados(self, cantidad: int) -> None:
+        with self._cerrojo:
+            self._ejemplares += cantidad
+
+    def ejemplar_prestado(self) -> None:
+        with self._cerrojo:
+            self._prestados += 1
+
+    def ejemplar_devuelto(self) -> None:
+        with self._cerrojo:
+            self._prestados -= 1
+
+    def prestamo_registrado(self, prestamo_id: str, usuario_id: str, autor: Optional[str],
+                            fecha_limite: Optional[datetime]) -> None:
+        # Los préstamos ya devueltos (al cargar una instantánea) solo cuentan para el usuario
+        with self._cerrojo:
+            self._usuarios.sumar(usuario_id)
+            if fecha_limite is None:
+                return
+            if autor is not None:
+                self._autores.sumar(autor)
+            if self._revisado is not None and self._revisado > fecha_limite:
+                self._vencidos.add(prestamo_id)
+            else:
+                self._limites[prestamo_id] = fecha_limite
+                heapq.heappush(self._por_vencer, (fecha_limite, prestamo_id))
+
+    def prestamo_cerrado(self, prestamo_id: str, autor: Optional[str]) -> None:
+        with self._cerrojo:
+            if autor is not None:
+                self._autores.restar(autor)
+            if self._limites.pop(prestamo_id, None) is None:
+                self._vencidos.discard(prestamo_id)
+
+    def prestamos_archivados(self, usuario_id: str, cantidad: int) -> None:
+        # Préstamos devueltos que una instantánea no vuelve a cargar uno a uno
+        with self._cerrojo:
+            self._usuarios.sumar(usuario_id, cantidad)
+
+    def usuario_retirado(self, usuario_id: str) -> None:
+        with self._cerrojo:
+            self._usuarios.eliminar(usuario_id)
+
+    def _revisar_vencimientos(self) -> None:
+        # Cada préstamo sale del heap una sola vez: coste amortizado constante por préstamo.
+        # Solo avanza con el reloj real; las consultas con otra fecha no lo tocan
+        ahora = datetime.now()
+        if self._revisado is None or ahora > self._revisado:
+            self._revisado = ahora
+        por_vencer = self._por_vencer
+        while por_vencer and self._revisado > por_vencer[0][0]:
+            _, prestamo_id = heapq.heappop(por_vencer)
+            if self._limites.pop(prestamo_id, None) is not None:
+                self._vencidos.add(prestamo_id)
+
+    def prestamos_por_autor(self, autor: str) -> int:
+        return self._autores.cuenta(autor)
+
+    def prestamos_de_usuario(self, usuario_id: str) -> int:
+        return self._usuarios.cuenta(usuario_id)
+
+    def resumen(self, limite: int = 5) -> Dict[str, Any]:
+        with self._cerrojo:
+            self._revisar_vencimientos()
+            return {
+                'ejemplares': self._ejemplares,
+                'ejemplares_prestados': self._prestados,
+                'utilizacion': self._prestados / self._ejemplares if self._ejemplares else 0.0,
+                'prestamos_vencidos': len(self._vencidos),
+                'autores_mas_prestados': self._autores.primeros(limite),
+                'usuarios_mas_activos': self._usuarios.primeros(limite),
+            }
@@ -0,0 +1,221 @@
+import threading
+import time
+import weakref
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional
+from src.biblioteca import Biblioteca
+
+# Tipos que publica Biblioteca a sus observadores, los mismos que guarda el diario
+TIPOS = frozenset({
+    'libro_agregado', 'ejemplares_agregados', 'libro_eliminado',
+    'usuario_registrado', 'usuario_eliminado',
+    'prestamo_creado', 'prestamo_devuelto',
+    'reserva_creada', 'reserva_ofrecida', 'reserva_retirada',
+})
+
+
+class EventosPerdidosError(Exception):
+    # El consumidor se quedó atrás más allá de lo retenido: debe resincronizarse desde un volcado
+    pass
+
+
+class Evento(NamedTuple):
+    secuencia: int
+    tipo: str
+    # Vista de solo lectura sobre una copia: todas las suscripciones comparten el mismo Evento
+    datos: Mapping[str, Any]
+    fecha: datetime
+
+
+def _solo_lectura(datos: Dict[str, Any]) -> Mapping[str, Any]:
+    # Los datos de un evento son planos salvo listas de claves, que pasan a tuplas
+    return MappingProxyType({clave: tuple(valor) if isinstance(valor, list) else valor
+                             for clave, valor in datos.items()})
+
+
+class FlujoCambios:
+    # Captura de cambios: numera los eventos de la biblioteca y los retiene en un búfer acotado
+    # del que cada suscripción lee por lotes a su ritmo. Con el búfer lleno, el evento más
+    # antiguo solo se descarta cuando todas las suscripciones lo han leído; mientras tanto la
+    # escritura espera (contrapresión) hasta `espera` segundos y, si aun así no avanzan, las
+    # suscripciones rezagadas se dan por desbordadas.
+    # La espera ocurre dentro del observador, con los cerrojos de la operación tomados: mientras
+    # dura se detienen las demás escrituras sobre los mismos segmentos de libros y usuarios, y
+    # compactar(), que los toma todos. Un consumidor no debe escribir en la biblioteca desde el
+    # hilo que lee su suscripción: con el búfer lleno esperaría a un cerrojo que solo se suelta
+    # cuando vence `espera` y su propia suscripción se da por desbordada
+
+    def __init__(self, biblioteca: Biblioteca, capacidad: int = 10_000, espera: float = 1.0):
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1")
+        self._biblioteca = biblioteca
+        self._capacidad = capacidad
+        self._espera = espera
+        self._condicion = threading.Condition()
+        # Lista con cabeza desplazada: descartar por delante y leer por posición son O(1)
+        self._eventos: List[Evento] = []
+        self._cabeza = 0
+        self._secuencia = 0
+        # Una suscripción abandonada sin cerrar no debe frenar a los escritores
+        self._suscripciones: 'weakref.WeakSet[Suscripcion]' = weakref.WeakSet()
+        self._cerrado = False
+        biblioteca.agregar_observador(self._publicar)
+
+    def cerrar(self) -> None:
+        with self._condicion:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._biblioteca.quitar_observador(self._publicar)
+            self._suscripciones.clear()
+            self._condicion.notify_all()
+
+    def __enter__(self) -> 'FlujoCambios':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    @property
+    def secuencia(self) -> int:
+        # Número del último evento publicado
+        return self._secuencia
+
+    @property
+    def primera(self) -> int:
+        # Número del evento retenido más antiguo; sin eventos, el del próximo
+        with self._condicion:
+            return self._primera()
+
+    def _primera(self) -> int:
+        return self._secuencia - (len(self._eventos) - self._cabeza) + 1
+
+    def __len__(self) -> int:
+        return len(self._eventos) - self._cabeza
+
+    def _publicar(self, tipo: str, datos: Dict[str, Any]) -> None:
+        # Se llama con los cerrojos de la operación tomados: la numeración respeta el orden
+        # de las escrituras sobre un mismo libro o usuario
+        # Un lote llega como un solo evento y se publica desglosado, con números consecutivos
+        eventos = datos['eventos'] if tipo == 'lote' else [{'t': tipo, 'd': datos}]
+        fecha = datetime.now()
+        with self._condicion:
+            for evento in eventos:
+                self._hacer_sitio()
+                self._secuencia += 1
+                self._eventos.append(Evento(self._secuencia, evento['t'], _solo_lectura(evento['d']), fecha))
+            self._condicion.notify_all()
+
+    def _hacer_sitio(self) -> None:
+        limite = time.monotonic() + self._espera
+        # Se vuelve a comprobar tras cada espera: otra escritura pudo hacer sitio antes
+        while len(self._eventos) - self._cabeza >= self._capacidad:
+            antiguo = self._primera()
+            rezagadas = [s for s in self._suscripciones if s._posicion < antiguo]
+            if rezagadas:
+                restante = limite - time.monotonic()
+                if restante > 0:
+                    self._condicion.wait(restante)
+                    continue
+                for suscripcion in rezagadas:
+                    suscripcion._desbordada = True
+                    self._suscripciones.discard(suscripcion)
+            self._cabeza += 1
+            if self._cabeza >= self._capacidad:
+                del self._eventos[:self._cabeza]
+                self._cabeza = 0
+
+    def suscribir(self, desde: Optional[int] = None,
+                  tipos: Optional[Iterable[str]] = None) -> 'Suscripcion':
+        # `desde` es el último evento que el consumidor ya procesó: se reanuda en el siguiente.
+        # Sin él, la suscripción recibe solo los eventos publicados a partir de ahora
+        if tipos is not None:
+            tipos = frozenset(tipos)
+            desconocidos = tipos - TIPOS
+            if desconocidos:
+                raise ValueError(f"Tipos de evento desconocidos: {', '.join(sorted(desconocidos))}")
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El flujo de cambios está cerrado")
+            if desde is None:
+                desde = self._secuencia
+            elif desde < 0 or desde > self._secuencia:
+                raise ValueError(f"Secuencia {desde} fuera de rango (última publicada: {self._secuencia})")
+            elif desde + 1 < self._primera():
+                raise EventosPerdidosError(
+                    f"Los eventos posteriores a {desde} ya no se retienen (el más antiguo es {self._primera()})")
+            suscripcion = Suscripcion(self, desde, tipos)
+            self._suscripciones.add(suscripcion)
+            return suscripcion
+
+    def _leer(self, suscripcion: 'Suscripcion', maximo: int, espera: Optional[float]) -> List[Evento]:
+        limite = None if espera is None else time.monotonic() + espera
+        with self._condicion:
+            while True:
+                if suscripcion._desbordada:
+                    raise EventosPerdidosError(
+                        f"La suscripción se quedó atrás en el evento {suscripcion._posicion} y se desbordó")
+                if suscripcion._cerrada or self._cerrado:
+                    return []
+                lote = self._recoger(suscripcion, maximo)
+                if lote:
+                    return lote
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return []
+                self._condicion.wait(restante)
+
+    def _recoger(self, suscripcion: 'Suscripcion', maximo: int) -> List[Evento]:
+        lote: List[Evento] = []
+        eventos = self._eventos
+        inicio = suscripcion._posicion
+        indice = self._cabeza + suscripcion._posicion + 1 - self._primera()
+        tipos = suscripcion.tipos
+        while indice < len(eventos) and len(lote) < maximo:
+            evento = eventos[indice]
+            if tipos is None or evento.tipo in tipos:
+                lote.append(evento)
+            suscripcion._posicion = evento.secuencia
+            indice += 1
+        if suscripcion._posicion != inicio:
+            # La suscripción avanzó: puede que una escritura esté esperando sitio
+            self._condicion.notify_all()
+        return lote
+
+    def _cerrar(self, suscripcion: 'Suscripcion') -> None:
+        with self._condicion:
+            suscripcion._cerrada = True
+            self._suscripciones.discard(suscripcion)
+            self._condicion.notify_all()
+
+
+class Suscripcion:
+
+    def __init__(self, flujo: 'FlujoCambios', posicion: int, tipos: Optional[FrozenSet[str]]):
+        self._flujo = flujo
+        self._posicion = posicion
+        self.tipos = tipos
+        self._desbordada = False
+        self._cerrada = False
+
+    @property
+    def posicion(self) -> int:
+        # Último evento entregado (o saltado por el filtro de tipos): el `desde` para reanudar
+        return self._posicion
+
+    def leer(self, maximo: int = 100, espera: Optional[float] = None) -> List[Evento]:
+        # Devuelve en cuanto hay algún evento; sin espera se bloquea hasta que llegue uno o se
+        # cierre la suscripción (lista vacía)
+        if maximo < 1:
+            raise ValueError("El máximo debe ser al menos 1")
+        return self._flujo._leer(self, maximo, espera)
+
+    def cerrar(self) -> None:
+        self._flujo._cerrar(self)
+
+    def __enter__(self) -> 'Suscripcion':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
\ No newline at end of file
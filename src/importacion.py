@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from src.libro import Libro
+from src.usuario import Usuario
+
+
+class ErrorImportacion(NamedTuple):
+    linea: int
+    mensaje: str
+
+
+class ResultadoImportacion:
+
+    def __init__(self, max_errores: int = 1000):
+        self.importados = 0
+        self.rechazados = 0
+        self.errores: List[ErrorImportacion] = []
+        self._max_errores = max_errores
+
+    @property
+    def total(self) -> int:
+        return self.importados + self.rechazados
+
+    def registrar_error(self, linea: int, mensaje: str) -> None:
+        # Se cuentan todos los rechazos pero solo se conservan los primeros errores
+        self.rechazados += 1
+        if len(self.errores) < self._max_errores:
+            self.errores.append(ErrorImportacion(linea, mensaje))
+
+    def __str__(self) -> str:
+        return f"Importación: {self.importados} importados, {self.rechazados} rechazados"
+
+
+VALORES_VERDADEROS = {'1', 'true', 'si', 'sí', 'yes'}
+VALORES_FALSOS = {'0', 'false', 'no'}
+
+
+def _a_booleano(valor: Any) -> bool:
+    if isinstance(valor, bool):
+        return valor
+    texto = str(valor).strip().lower()
+    if texto in VALORES_VERDADEROS:
+        return True
+    if texto in VALORES_FALSOS:
+        return False
+    raise ValueError(f"Valor booleano no válido: {valor}")
+
+
+def _a_entero(valor: Any) -> int:
+    if isinstance(valor, bool):
+        raise ValueError(f"Valor entero no válido: {valor}")
+    if isinstance(valor, int):
+        return valor
+    try:
+        return int(str(valor).strip())
+    except ValueError:
+        raise ValueError(f"Valor entero no válido: {valor}") from None
+
+
+def _detectar_formato(ruta: str) -> str:
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(f"No se puede deducir el formato de {ruta}")
+
+
+def leer_filas(ruta: str, formato: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    formato = formato or _detectar_formato(ruta)
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        if formato == 'csv':
+            lector = csv.DictReader(archivo)
+            for fila in lector:
+                yield lector.line_num, fila
+        elif formato == 'jsonl':
+            for numero, linea in enumerate(archivo, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linea)
+                except ValueError as error:
+                    yield numero, error
+        else:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+
+def _libro_desde_fila(fila: Dict[str, Any]) -> 'Libro':
+    disponible = fila.get('disponible')
+    ejemplares = fila.get('ejemplares')
+    return Libro(fila.get('isbn'), fila.get('titulo'), fila.get('autor'),
+                 True if disponible in (None, '') else _a_booleano(disponible),
+                 1 if ejemplares in (None, '') else _a_entero(ejemplares))
+
+
+def _usuario_desde_fila(fila: Dict[str, Any]) -> 'Usuario':
+    return Usuario(fila.get('id'), fila.get('nombre'))
+
+
+def _importar(filas: Iterator[Tuple[int, Any]], construir: Callable[[Dict[str, Any]], Any],
+              insertar_lote: Callable[[List[Any]], List[bool]], clave: Callable[[Any], str],
+              descripcion: str, tamano_lote: int, max_errores: int) -> ResultadoImportacion:
+    if tamano_lote < 1:
+        raise ValueError("tamano_lote debe ser al menos 1")
+    resultado = ResultadoImportacion(max_errores)
+    lote: List[Any] = []
+    lineas: List[int] = []
+
+    def volcar() -> None:
+        for linea, entidad, insertado in zip(lineas, lote, insertar_lote(lote)):
+            if insertado:
+                resultado.importados += 1
+            else:
+                resultado.registrar_error(linea, f"{descripcion} duplicado: {clave(entidad)}")
+        lote.clear()
+        lineas.clear()
+
+    for linea, fila in filas:
+        if isinstance(fila, Exception):
+            resultado.registrar_error(linea, f"Fila no válida: {fila}")
+            continue
+        if not isinstance(fila, dict):
+            resultado.registrar_error(linea, "Fila no válida: se esperaba un objeto")
+            continue
+        try:
+            entidad = construir(fila)
+        except ValueError as error:
+            resultado.registrar_error(linea, str(error))
+            continue
+        lote.append(entidad)
+        lineas.append(linea)
+        if len(lote) >= tamano_lote:
+            volcar()
+    if lote:
+        volcar()
+    return resultado
+
+
+def importar_libros(biblioteca, ruta: str, formato: Optional[str] = None,
+                    tamano_lote: int = 10_000, max_errores: int = 1000) -> ResultadoImportacion:
+    return _importar(leer_filas(ruta, formato), _libro_desde_fila, biblioteca.agregar_libros_lote,
+                     lambda libro: libro.isbn, "ISBN", tamano_lote, max_errores)
+
+
+def importar_usuarios(biblioteca, ruta: str, formato: Optional[str] = None,
+                      tamano_lote: int = 10_000, max_errores: int = 1000) -> ResultadoImportacion:
+    return _importar(leer_filas(ruta, formato), _usuario_desde_fila, biblioteca.registrar_usuarios_lote,
+                     lambda usuario: usuario.id, "ID de usuario", tamano_lote, max_errores)
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Optional, Set
+from src.normalizacion import normalizar
+
+
+class IndiceTexto:
+
+    TAMANO_NGRAMA = 3
+
+    def __init__(self):
+        self._postings: DefaultDict[str, Set[str]] = defaultdict(set)
+        self._textos: Dict[str, str] = {}
+
+    def agregar(self, clave: str, texto: str) -> None:
+        self.agregar_normalizado(clave, normalizar(texto))
+
+    def agregar_normalizado(self, clave: str, texto: str) -> None:
+        self._textos[clave] = texto
+        postings = self._postings
+        for ngrama in self._ngramas(texto):
+            postings[ngrama].add(clave)
+
+    def eliminar(self, clave: str) -> bool:
+        texto = self._textos.pop(clave, None)
+        if texto is None:
+            return False
+        for ngrama in self._ngramas(texto):
+            posting = self._postings.get(ngrama)
+            if posting is None:
+                continue
+            posting.discard(clave)
+            if not posting:
+                del self._postings[ngrama]
+        return True
+
+    def buscar(self, consulta: str) -> Optional[Set[str]]:
+        # None significa "sin restricción": la cadena vacía está contenida en todo texto
+        consulta = normalizar(consulta)
+        if not consulta:
+            return None
+
+        n = self.TAMANO_NGRAMA
+        if len(consulta) < n:
+            # Las consultas muy cortas coinciden con casi todo el catálogo: recorrerlo
+            # cuesta lo mismo que producir el resultado y evita indexar 1- y 2-gramas
+            return {c for c, texto in self._textos.items() if consulta in texto}
+        if len(consulta) == n:
+            return set(self._postings.get(consulta, ()))
+
+        postings: List[Set[str]] = []
+        for ngrama in {consulta[i:i + n] for i in range(len(consulta) - n + 1)}:
+            posting = self._postings.get(ngrama)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidatos = postings[0].intersection(*postings[1:])
+        return {c for c in candidatos if consulta in self._textos[c]}
+
+    @classmethod
+    def _ngramas(cls, texto: str) -> Set[str]:
+        n = cls.TAMANO_NGRAMA
+        return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+    def __len__(self) -> int:
+        return len(self._textos)
@@ -0,0 +1,225 @@
+import copy
+import threading
+import weakref
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from src.libro import Libro
+from src.normalizacion import normalizar
+from src.prestamo import Prestamo
+from src.usuario import Usuario
+
+if TYPE_CHECKING:
+    from src.biblioteca import Biblioteca
+
+
+class RegistroVersiones:
+    # Registro de deshacer: mientras hay instantáneas abiertas, cada escritura anota la imagen
+    # previa del registro que va a cambiar. Una instantánea de la versión v ve, para cada clave,
+    # la primera imagen anotada después de v, o el valor vivo si no se ha tocado desde entonces
+
+    def __init__(self):
+        self._cerrojo = threading.Lock()
+        self._version = 0
+        self._abiertas: Dict[int, int] = {}
+        self._historial: Dict[str, Dict[str, List[Tuple[int, Any]]]] = {}
+        self._orden: Deque[Tuple[int, str, str]] = deque()
+
+    def abrir(self) -> int:
+        with self._cerrojo:
+            self._abiertas[self._version] = self._abiertas.get(self._version, 0) + 1
+            return self._version
+
+    def cerrar(self, version: int) -> None:
+        with self._cerrojo:
+            restantes = self._abiertas.get(version, 0) - 1
+            if restantes > 0:
+                self._abiertas[version] = restantes
+            else:
+                self._abiertas.pop(version, None)
+            self._recortar()
+
+    def _recortar(self) -> None:
+        if not self._abiertas:
+            self._historial.clear()
+            self._orden.clear()
+            return
+        # Las imágenes anteriores a la instantánea más antigua ya no las consulta nadie
+        minima = min(self._abiertas)
+        orden = self._orden
+        while orden and orden[0][0] <= minima:
+            _, coleccion, clave = orden.popleft()
+            imagenes = self._historial[coleccion][clave]
+            del imagenes[0]
+            if not imagenes:
+                del self._historial[coleccion][clave]
+
+    def anotar(self, coleccion: str, clave: str, anterior: Any) -> None:
+        # Se llama antes de modificar el registro y con su cerrojo tomado; sin instantáneas
+        # abiertas no cuesta más que esta comprobación
+        if not self._abiertas:
+            return
+        with self._cerrojo:
+            if not self._abiertas:
+                return
+            imagenes = self._historial.setdefault(coleccion, {}).setdefault(clave, [])
+            if imagenes and imagenes[-1][0] > max(self._abiertas):
+                # Todas las instantáneas abiertas resuelven esta clave con una imagen ya anotada
+                return
+            self._version += 1
+            imagenes.append((self._version, copy.copy(anterior)))
+            self._orden.append((self._version, coleccion, clave))
+
+    def anterior(self, coleccion: str, clave: str, version: int) -> Tuple[bool, Any]:
+        with self._cerrojo:
+            for numero, imagen in self._historial.get(coleccion, {}).get(clave, ()):
+                if numero > version:
+                    return True, imagen
+            return False, None
+
+    def cambios(self, coleccion: str, version: int) -> List[Tuple[str, Any]]:
+        with self._cerrojo:
+            cambios = []
+            for clave, imagenes in self._historial.get(coleccion, {}).items():
+                for numero, imagen in imagenes:
+                    if numero > version:
+                        cambios.append((clave, imagen))
+                        break
+            return cambios
+
+    @property
+    def abiertas(self) -> int:
+        return sum(self._abiertas.values())
+
+    def __len__(self) -> int:
+        return len(self._orden)
+
+
+class VistaBiblioteca:
+    # Lectura consistente de la biblioteca tal como estaba al crear la instantánea. Los
+    # registros vivos se copian al leerlos y después se contrastan con el registro de deshacer:
+    # una escritura que se cruce con la copia ya habrá anotado su imagen previa
+
+    def __init__(self, biblioteca: 'Biblioteca', registro: 'RegistroVersiones', version: int):
+        self._biblioteca = biblioteca
+        self._registro = registro
+        self.version = version
+        self._cierre = weakref.finalize(self, registro.cerrar, version)
+
+    def cerrar(self) -> None:
+        self._cierre()
+
+    def __enter__(self) -> 'VistaBiblioteca':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def _comprobar_abierta(self) -> None:
+        if not self._cierre.alive:
+            raise RuntimeError("La instantánea está cerrada")
+
+    def _resolver(self, coleccion: str, clave: str, vivo: Any) -> Any:
+        copia = copy.copy(vivo) if vivo is not None else None
+        encontrado, imagen = self._registro.anterior(coleccion, clave, self.version)
+        return imagen if encontrado else copia
+
+    def _coleccion(self, coleccion: str, vivos: Dict[str, Any]) -> Dict[str, Any]:
+        self._comprobar_abierta()
+        resultado = {clave: copy.copy(valor) for clave, valor in vivos.copy().items()}
+        for clave, imagen in self._registro.cambios(coleccion, self.version):
+            if imagen is None:
+                resultado.pop(clave, None)
+            else:
+                resultado[clave] = imagen
+        return resultado
+
+    def _claves(self, coleccion: str, vivos: Dict[str, Any]) -> Set[str]:
+        self._comprobar_abierta()
+        claves = set(vivos.copy())
+        for clave, imagen in self._registro.cambios(coleccion, self.version):
+            if imagen is None:
+                claves.discard(clave)
+            else:
+                claves.add(clave)
+        return claves
+
+    def _posicion(self, isbn: str) -> int:
+        try:
+            viva = self._biblioteca._secuencia_libros.posicion(isbn)
+        except KeyError:
+            viva = None
+        encontrado, anterior = self._registro.anterior('posiciones', isbn, self.version)
+        return anterior if encontrado else viva
+
+    def _en_orden(self, libros: Iterable['Libro']) -> List['Libro']:
+        return sorted(libros, key=lambda libro: self._posicion(libro.isbn))
+
+    def obtener_libro(self, isbn: str) -> Optional['Libro']:
+        self._comprobar_abierta()
+        return self._resolver('libros', isbn, self._biblioteca._catalogo.get(isbn))
+
+    def buscar_libros(self, **criterios) -> List['Libro']:
+        self._comprobar_abierta()
+        biblioteca = self._biblioteca
+        consultas = {campo: normalizar(criterios[campo]) for campo in ('titulo', 'autor') if campo in criterios}
+        if any(consultas.values()):
+            # Candidatos del índice vivo más los libros cambiados desde la instantánea; el
+            # criterio se vuelve a comprobar sobre la versión resuelta de cada uno
+            with biblioteca._cerrojo_catalogo:
+                candidatos = None
+                for campo, indice in (('titulo', biblioteca._indice_titulos), ('autor', biblioteca._indice_autores)):
+                    if consultas.get(campo):
+                        encontrados = indice.buscar(consultas[campo])
+                        candidatos = encontrados if candidatos is None else candidatos & encontrados
+            candidatos |= {clave for clave, _ in self._registro.cambios('libros', self.version)}
+            libros = [self._resolver('libros', isbn, biblioteca._catalogo.get(isbn)) for isbn in candidatos]
+            libros = [libro for libro in libros if libro is not None]
+        else:
+            libros = list(self._coleccion('libros', biblioteca._catalogo).values())
+
+        libros = [libro for libro in libros
+                  if consultas.get('titulo', '') in libro.titulo_busqueda
+                  and consultas.get('autor', '') in libro.autor_busqueda
+                  and ('disponible' not in criterios or libro.disponible == bool(criterios['disponible']))]
+        return self._en_orden(libros)
+
+    def obtener_usuario(self, id: str) -> Optional['Usuario']:
+        self._comprobar_abierta()
+        return self._resolver('usuarios', id, self._biblioteca._usuarios.get(id))
+
+    def obtener_prestamo(self, prestamo_id: str) -> Optional['Prestamo']:
+        self._comprobar_abierta()
+        biblioteca = self._biblioteca
+        prestamo = self._resolver('prestamos', prestamo_id, biblioteca._prestamos_activos.get(prestamo_id))
+        if prestamo is not None:
+            return prestamo
+        encontrado, _ = self._registro.anterior('prestamos', prestamo_id, self.version)
+        # Sin cambios desde la instantánea: ya estaba devuelto y archivado, o no existía
+        return None if encontrado else biblioteca._archivo.obtener(prestamo_id)
+
+    def listar_prestamos_activos(self) -> List['Prestamo']:
+        prestamos = self._coleccion('prestamos', self._biblioteca._prestamos_activos).values()
+        return sorted(prestamos, key=lambda prestamo: prestamo.fecha_prestamo)
+
+    def listar_prestamos_usuario(self, usuario_id: str) -> List['Prestamo']:
+        self._comprobar_abierta()
+        biblioteca = self._biblioteca
+        ids = set(biblioteca._prestamos_por_usuario.get(usuario_id, {}).copy())
+        ids |= {clave for clave, _ in self._registro.cambios('prestamos', self.version)}
+        prestamos = [self._resolver('prestamos', id, biblioteca._prestamos_activos.get(id)) for id in ids]
+        return sorted((p for p in prestamos if p is not None and p.usuario_id == usuario_id),
+                      key=lambda prestamo: prestamo.fecha_prestamo)
+
+    def listar_prestamos_vencidos(self, fecha_actual: Optional[datetime] = None) -> List['Prestamo']:
+        fecha_actual = fecha_actual or datetime.now()
+        return [p for p in self.listar_prestamos_activos() if fecha_actual > p.fecha_limite]
+
+    def total_libros(self) -> int:
+        return len(self._claves('libros', self._biblioteca._catalogo))
+
+    def total_usuarios(self) -> int:
+        return len(self._claves('usuarios', self._biblioteca._usuarios))
+
+    def total_prestamos_activos(self) -> int:
+        return len(self._claves('prestamos', self._biblioteca._prestamos_activos))
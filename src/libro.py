@@ -1,17 +1,39 @@
+from typing import Optional
+from src.normalizacion import normalizar
+
 class Libro:
     
-    def __init__(self, isbn: str, titulo: str, autor: str, disponible: bool = True):
+    __slots__ = ('_isbn', '_titulo', '_autor', '_ejemplares', '_disponibles',
+                 '_titulo_busqueda', '_autor_busqueda')
+    
+    def __init__(self, isbn: str, titulo: str, autor: str, disponible: bool = True,
+                 ejemplares: int = 1, disponibles: Optional[int] = None):
         if not isbn or not isinstance(isbn, str):
             raise ValueError("ISBN debe ser una cadena no vacía")
         if not titulo or not isinstance(titulo, str):
             raise ValueError("Título debe ser una cadena no vacía")
         if not autor or not isinstance(autor, str):
             raise ValueError("Autor debe ser una cadena no vacía")
+        if not isinstance(ejemplares, int) or ejemplares < 1:
+            raise ValueError("Ejemplares debe ser un entero positivo")
+        if disponibles is None:
+            disponibles = ejemplares if disponible else 0
+        if not 0 <= disponibles <= ejemplares:
+            raise ValueError("Ejemplares disponibles fuera de rango")
         
         self._isbn = isbn
         self._titulo = titulo
         self._autor = autor
-        self._disponible = disponible
+        self._ejemplares = ejemplares
+        self._disponibles = disponibles
+        self._titulo_busqueda = self._clave(titulo)
+        self._autor_busqueda = self._clave(autor)
+    
+    @staticmethod
+    def _clave(texto: str) -> str:
+        # Si el texto ya está normalizado se comparte el mismo objeto en lugar de duplicarlo
+        clave = normalizar(texto)
+        return texto if clave == texto else clave
     
     @property
     def isbn(self) -> str:
@@ -25,24 +47,53 @@ class Libro:
     def autor(self) -> str:
         return self._autor
     
+    @property
+    def titulo_busqueda(self) -> str:
+        return self._titulo_busqueda
+    
+    @property
+    def autor_busqueda(self) -> str:
+        return self._autor_busqueda
+    
     @property
     def disponible(self) -> bool:
-        return self._disponible
+        return self._disponibles > 0
+    
+    @property
+    def ejemplares(self) -> int:
+        return self._ejemplares
+    
+    @property
+    def ejemplares_disponibles(self) -> int:
+        return self._disponibles
+    
+    @property
+    def ejemplares_prestados(self) -> int:
+        return self._ejemplares - self._disponibles
     
     def prestar(self) -> bool:
-        if not self._disponible:
+        if self._disponibles == 0:
             return False
-        self._disponible = False
+        self._disponibles -= 1
         return True
     
     def devolver(self) -> bool:
-        if self._disponible:
+        if self._disponibles == self._ejemplares:
             return False
-        self._disponible = True
+        self._disponibles += 1
         return True
     
+    def agregar_ejemplares(self, cantidad: int) -> None:
+        if not isinstance(cantidad, int) or cantidad < 1:
+            raise ValueError("La cantidad de ejemplares debe ser un entero positivo")
+        self._ejemplares += cantidad
+        self._disponibles += cantidad
+    
     def __str__(self) -> str:
-        estado = "Disponible" if self._disponible else "Prestado"
+        if self._ejemplares > 1:
+            estado = f"{self._disponibles}/{self._ejemplares} ejemplares disponibles"
+        else:
+            estado = "Disponible" if self._disponibles else "Prestado"
         return f"{self._titulo} por {self._autor} (ISBN: {self._isbn}) - {estado}"
     
     def __eq__(self, other) -> bool:
@@ -0,0 +1,209 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+# Límites superiores de las cubetas de latencia, en segundos
+LIMITES_PREDETERMINADOS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+class Histograma:
+
+    __slots__ = ('_limites', '_cubetas', '_suma', '_cuenta')
+
+    def __init__(self, limites: Sequence[float] = LIMITES_PREDETERMINADOS):
+        self._limites = tuple(limites)
+        # Una cubeta por límite más la de desbordamiento (+Inf)
+        self._cubetas = [0] * (len(self._limites) + 1)
+        self._suma = 0.0
+        self._cuenta = 0
+
+    def observar(self, valor: float) -> None:
+        self._cubetas[bisect_left(self._limites, valor)] += 1
+        self._suma += valor
+        self._cuenta += 1
+
+    @property
+    def limites(self) -> tuple:
+        return self._limites
+
+    @property
+    def suma(self) -> float:
+        return self._suma
+
+    @property
+    def cuenta(self) -> int:
+        return self._cuenta
+
+    def acumulado(self) -> List[int]:
+        total = 0
+        resultado = []
+        for cantidad in self._cubetas:
+            total += cantidad
+            resultado.append(total)
+        return resultado
+
+    def percentil(self, fraccion: float) -> Optional[float]:
+        # Cota superior de la cubeta que contiene el percentil; None si cae en +Inf o no hay datos
+        if self._cuenta == 0:
+            return None
+        objetivo = fraccion * self._cuenta
+        for i, total in enumerate(self.acumulado()):
+            if total >= objetivo:
+                return self._limites[i] if i < len(self._limites) else None
+        return None
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {
+            'limites': list(self._limites),
+            'cubetas': list(self._cubetas),
+            'suma': self._suma,
+            'cuenta': self._cuenta,
+        }
+
+
+class Metricas:
+
+    def __init__(self, limites: Sequence[float] = LIMITES_PREDETERMINADOS):
+        self._limites = tuple(limites)
+        self._llamadas: Dict[str, int] = {}
+        self._errores: Dict[str, Dict[str, int]] = {}
+        self._latencias: Dict[str, Histograma] = {}
+        self._cerrojo = threading.Lock()
+
+    def registrar(self, operacion: str, segundos: float, error: Optional[BaseException] = None) -> None:
+        with self._cerrojo:
+            self._llamadas[operacion] = self._llamadas.get(operacion, 0) + 1
+            histograma = self._latencias.get(operacion)
+            if histograma is None:
+                histograma = self._latencias[operacion] = Histograma(self._limites)
+            histograma.observar(segundos)
+            if error is not None:
+                errores = self._errores.setdefault(operacion, {})
+                tipo = type(error).__name__
+                errores[tipo] = errores.get(tipo, 0) + 1
+
+    def llamadas(self, operacion: str) -> int:
+        return self._llamadas.get(operacion, 0)
+
+    def errores(self, operacion: str) -> Dict[str, int]:
+        return dict(self._errores.get(operacion, {}))
+
+    def latencia(self, operacion: str) -> Optional[Histograma]:
+        return self._latencias.get(operacion)
+
+    def reiniciar(self) -> None:
+        with self._cerrojo:
+            self._llamadas.clear()
+            self._errores.clear()
+            self._latencias.clear()
+
+    def instantanea(self) -> Dict[str, Dict[str, Any]]:
+        with self._cerrojo:
+            return {
+                operacion: {
+                    'llamadas': llamadas,
+                    'errores': dict(self._errores.get(operacion, {})),
+                    'latencia': self._latencias[operacion].a_dict(),
+                }
+                for operacion, llamadas in sorted(self._llamadas.items())
+            }
+
+    def a_prometheus(self, prefijo: str = 'biblioteca') -> str:
+        datos = self.instantanea()
+        lineas = [
+            f"# HELP {prefijo}_operaciones_total Llamadas por operación",
+            f"# TYPE {prefijo}_operaciones_total counter",
+        ]
+        for operacion, medida in datos.items():
+            lineas.append(f'{prefijo}_operaciones_total{{operacion="{operacion}"}} {medida["llamadas"]}')
+
+        lineas.append(f"# HELP {prefijo}_errores_total Excepciones por operación y tipo")
+        lineas.append(f"# TYPE {prefijo}_errores_total counter")
+        for operacion, medida in datos.items():
+            for tipo, cantidad in sorted(medida['errores'].items()):
+                lineas.append(f'{prefijo}_errores_total{{operacion="{operacion}",tipo="{tipo}"}} {cantidad}')
+
+        lineas.append(f"# HELP {prefijo}_duracion_segundos Latencia por operación")
+        lineas.append(f"# TYPE {prefijo}_duracion_segundos histogram")
+        for operacion, medida in datos.items():
+            latencia = medida['latencia']
+            total = 0
+            for limite, cantidad in zip(latencia['limites'] + ['+Inf'], latencia['cubetas']):
+                total += cantidad
+                lineas.append(f'{prefijo}_duracion_segundos_bucket{{operacion="{operacion}",le="{limite}"}} {total}')
+            lineas.append(f'{prefijo}_duracion_segundos_sum{{operacion="{operacion}"}} {latencia["suma"]}')
+            lineas.append(f'{prefijo}_duracion_segundos_count{{operacion="{operacion}"}} {latencia["cuenta"]}')
+        return '\n'.join(lineas) + '\n'
+
+
+def metodos_publicos(objeto: Any) -> List[str]:
+    return [nombre for nombre in dir(type(objeto))
+            if not nombre.startswith('_') and callable(getattr(type(objeto), nombre))]
+
+
+def _medir_generador(generador, operacion: str, registrar: Callable[..., None], reloj: Callable[[], float],
+                     transcurrido: float):
+    # Suma el tiempo de cada paso del generador (no el del consumidor entre pasos) y registra
+    # una sola observación al agotarse, fallar o cerrarse antes de tiempo
+    error = None
+    try:
+        while True:
+            inicio = reloj()
+            try:
+                elemento = next(generador)
+            except StopIteration:
+                return
+            except Exception as fallo:
+                error = fallo
+                raise
+            finally:
+                transcurrido += reloj() - inicio
+            yield elemento
+    finally:
+        generador.close()
+        registrar(operacion, transcurrido, error)
+
+
+def _envolver(funcion: Callable[..., Any], operacion: str, metricas: Metricas) -> Callable[..., Any]:
+    reloj = time.perf_counter
+    registrar = metricas.registrar
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = reloj()
+        try:
+            resultado = funcion(*args, **kwargs)
+        except Exception as error:
+            registrar(operacion, reloj() - inicio, error)
+            raise
+        if inspect.isgenerator(resultado):
+            # Crear el generador no hace el trabajo: la medida sigue hasta que termina el recorrido
+            return _medir_generador(resultado, operacion, registrar, reloj, reloj() - inicio)
+        registrar(operacion, reloj() - inicio)
+        return resultado
+
+    envoltura.instrumentada = True
+    return envoltura
+
+
+def instrumentar(objeto: Any, metricas: Metricas, metodos: Optional[Iterable[str]] = None) -> Metricas:
+    # Las envolturas se instalan como atributos de la instancia: la clase no cambia y,
+    # sin instrumentar, las llamadas no pasan por ningún código adicional
+    for nombre in (metodos if metodos is not None else metodos_publicos(objeto)):
+        actual = getattr(objeto, nombre)
+        if getattr(actual, 'instrumentada', False):
+            continue
+        setattr(objeto, nombre, _envolver(actual, nombre, metricas))
+    return metricas
+
+
+def desinstrumentar(objeto: Any) -> None:
+    for nombre, valor in list(vars(objeto).items()):
+        if getattr(valor, 'instrumentada', False):
+            delattr(objeto, nombre)
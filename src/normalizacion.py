@@ -0,0 +1,9 @@
+import unicodedata
+
+
+def normalizar(texto: str) -> str:
+    # Clave de búsqueda: sin distinguir mayúsculas ni tildes ("Pérez" -> "perez")
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
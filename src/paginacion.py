@@ -0,0 +1,84 @@
+import threading
+from bisect import bisect_right
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Pagina(NamedTuple):
+    elementos: List[Any]
+    # Se pasa como `cursor` para pedir la página siguiente; None en la última página
+    cursor: Optional[int]
+
+
+def paginar(entradas: Iterable[Tuple[int, Any]], limite: int) -> Pagina:
+    if limite < 1:
+        raise ValueError("El límite debe ser al menos 1")
+    elementos: List[Any] = []
+    ultima: Optional[int] = None
+    for posicion, elemento in entradas:
+        # Se lee un elemento de más solo para saber si queda otra página
+        if len(elementos) == limite:
+            return Pagina(elementos, ultima)
+        elementos.append(elemento)
+        ultima = posicion
+    return Pagina(elementos, None)
+
+
+class SecuenciaOrdenada:
+
+    MINIMO_COMPACTACION = 64
+
+    def __init__(self):
+        # Posiciones crecientes y claves en listas paralelas, sustituidas juntas al compactar
+        self._entradas: Tuple[List[int], List[str]] = ([], [])
+        self._vivas: Dict[str, int] = {}
+        self._siguiente = 0
+        self._cerrojo = threading.Lock()
+
+    def agregar(self, clave: str) -> int:
+        with self._cerrojo:
+            posicion = self._siguiente
+            self._siguiente += 1
+            self._vivas[clave] = posicion
+            posiciones, claves = self._entradas
+            posiciones.append(posicion)
+            claves.append(clave)
+            return posicion
+
+    def eliminar(self, clave: str) -> bool:
+        with self._cerrojo:
+            if self._vivas.pop(clave, None) is None:
+                return False
+            posiciones, _ = self._entradas
+            if len(posiciones) > max(self.MINIMO_COMPACTACION, 2 * len(self._vivas)):
+                self._compactar()
+            return True
+
+    def _compactar(self) -> None:
+        posiciones, claves = self._entradas
+        vivas = self._vivas
+        conservadas = [i for i, clave in enumerate(claves) if vivas.get(clave) == posiciones[i]]
+        # Listas nuevas: los recorridos en curso siguen con las anteriores sin verse afectados
+        self._entradas = ([posiciones[i] for i in conservadas], [claves[i] for i in conservadas])
+
+    def posicion(self, clave: str) -> int:
+        return self._vivas[clave]
+
+    def desde(self, cursor: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        posiciones, claves = self._entradas
+        vivas = self._vivas
+        i = 0 if cursor is None else bisect_right(posiciones, cursor)
+        # Las claves se añaden después que las posiciones: su longitud acota lo ya completo.
+        # Se recorre por tramos hasta esa longitud y se vuelve a mirar por si llegaron más
+        while i < len(claves):
+            fin = len(claves)
+            for posicion, clave in zip(islice(posiciones, i, fin), islice(claves, i, fin)):
+                if vivas.get(clave) == posicion:
+                    yield posicion, clave
+            i = fin
+
+    def __contains__(self, clave: str) -> bool:
+        return clave in self._vivas
+
+    def __len__(self) -> int:
+        return len(self._vivas)
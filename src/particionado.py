@@ -0,0 +1,314 @@
+import multiprocessing
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from src.biblioteca import Biblioteca
+from src.concurrencia import adquirir
+from src.libro import Libro
+from src.normalizacion import normalizar
+from src.prestamo import Prestamo
+from src.usuario import Usuario
+
+T = TypeVar('T')
+
+
+def particion_de(clave: str, particiones: int) -> int:
+    # crc32 y no hash(): el reparto debe ser el mismo en todos los procesos
+    return zlib.crc32(clave.encode('utf-8')) % particiones
+
+
+class Particion:
+    # Lado del proceso trabajador: los libros (con sus préstamos) y los usuarios que le
+    # corresponden, más las fases de un préstamo cuyo libro y usuario viven en procesos distintos
+
+    def __init__(self, indice: int):
+        self.indice = indice
+        self.biblioteca = Biblioteca()
+
+    def __getattr__(self, nombre: str) -> Any:
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+        return getattr(self.biblioteca, nombre)
+
+    def apartar_ejemplar(self, isbn: str, usuario_id: str) -> str:
+        biblioteca = self.biblioteca
+        with biblioteca._bloquear([isbn]):
+            libro = biblioteca._validar_libro(isbn)
+            biblioteca._validar_reservas(libro, usuario_id)
+            libro.prestar()
+            biblioteca._actualizar_disponibilidad(libro)
+            biblioteca._estadisticas.ejemplar_prestado()
+            return libro.titulo
+
+    def liberar_ejemplar(self, isbn: str) -> None:
+        biblioteca = self.biblioteca
+        with biblioteca._bloquear([isbn]):
+            libro = biblioteca.obtener_libro(isbn)
+            libro.devolver()
+            biblioteca._actualizar_disponibilidad(libro)
+            biblioteca._estadisticas.ejemplar_devuelto()
+
+    def asignar_usuario(self, usuario_id: str, isbn: str, titulo: str) -> None:
+        biblioteca = self.biblioteca
+        with biblioteca._bloquear(usuario_ids=[usuario_id]):
+            biblioteca._validar_usuario(usuario_id, isbn, titulo).agregar_prestamo(isbn)
+
+    def liberar_usuario(self, usuario_id: str, isbn: str) -> None:
+        biblioteca = self.biblioteca
+        with biblioteca._bloquear(usuario_ids=[usuario_id]):
+            usuario = biblioteca.obtener_usuario(usuario_id)
+            if usuario is not None:
+                usuario.remover_prestamo(isbn)
+
+    def _identificador(self) -> str:
+        # El prefijo con la partición permite al enrutador encontrar el préstamo sin difundir
+        return f"{self.indice}-{uuid.uuid4()}"
+
+    def confirmar_prestamo(self, isbn: str, usuario_id: str) -> 'Prestamo':
+        biblioteca = self.biblioteca
+        prestamo = Prestamo(self._identificador(), isbn, usuario_id)
+        with biblioteca._bloquear([isbn]):
+            biblioteca._registrar_prestamo(prestamo)
+        return prestamo
+
+    def prestar(self, isbn: str, usuario_id: str) -> 'Prestamo':
+        # Libro y usuario en esta partición: el mismo camino que Biblioteca.crear_prestamo
+        biblioteca = self.biblioteca
+        with biblioteca._bloquear([isbn], [usuario_id]):
+            libro, usuario = biblioteca._validar_prestamo(isbn, usuario_id)
+            return biblioteca._prestar(libro, usuario, self._identificador())
+
+    def devolver_ejemplar(self, prestamo_id: str) -> Optional['Prestamo']:
+        biblioteca = self.biblioteca
+        prestamo = biblioteca._prestamos.get(prestamo_id)
+        if prestamo is None:
+            return None
+        with biblioteca._bloquear([prestamo.libro_isbn]):
+            if not prestamo.esta_activo():
+                return None
+            libro = biblioteca.obtener_libro(prestamo.libro_isbn)
+            libro.devolver()
+            biblioteca._actualizar_disponibilidad(libro)
+            biblioteca._estadisticas.ejemplar_devuelto()
+            prestamo.devolver()
+            biblioteca._desactivar_prestamo(prestamo)
+        return prestamo
+
+
+def _servir(conexion: Any, indice: int) -> None:
+    particion = Particion(indice)
+    while True:
+        try:
+            mensaje = conexion.recv()
+        except EOFError:
+            break
+        if mensaje is None:
+            break
+        metodo, args, kwargs = mensaje
+        try:
+            resultado = getattr(particion, metodo)(*args, **kwargs)
+        except Exception as error:
+            conexion.send((False, error))
+        else:
+            conexion.send((True, resultado))
+    conexion.close()
+
+
+class BibliotecaParticionada:
+    # Enrutador con la API de Biblioteca: los libros y sus préstamos se reparten por ISBN y los
+    # usuarios por ID entre procesos trabajadores, cada uno con su propio GIL
+
+    def __init__(self, particiones: Optional[int] = None, metodo_inicio: Optional[str] = None):
+        particiones = particiones or os.cpu_count() or 1
+        if particiones < 1:
+            raise ValueError("Debe haber al menos una partición")
+        contexto = multiprocessing.get_context(metodo_inicio)
+        self._conexiones = []
+        self._procesos = []
+        # Una petición en vuelo por tubería; hilos que llaman a particiones distintas no se esperan
+        self._cerrojos = [threading.Lock() for _ in range(particiones)]
+        for indice in range(particiones):
+            local, remota = contexto.Pipe()
+            proceso = contexto.Process(target=_servir, args=(remota, indice),
+                                       name=f"biblioteca-particion-{indice}", daemon=True)
+            proceso.start()
+            remota.close()
+            self._conexiones.append(local)
+            self._procesos.append(proceso)
+
+    def cerrar(self) -> None:
+        with adquirir(self._cerrojos):
+            for conexion, proceso in zip(self._conexiones, self._procesos):
+                if conexion.closed:
+                    continue
+                try:
+                    conexion.send(None)
+                except OSError:
+                    pass
+                conexion.close()
+                proceso.join()
+
+    def __enter__(self) -> 'BibliotecaParticionada':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    @property
+    def particiones(self) -> int:
+        return len(self._conexiones)
+
+    def _particion_libro(self, isbn: str) -> int:
+        return particion_de(isbn, len(self._conexiones))
+
+    def _particion_usuario(self, usuario_id: str) -> int:
+        return particion_de(usuario_id, len(self._conexiones))
+
+    def _particion_prestamo(self, prestamo_id: str) -> Optional[int]:
+        prefijo, _, _ = prestamo_id.partition('-')
+        if not prefijo.isdigit() or int(prefijo) >= len(self._conexiones):
+            return None
+        return int(prefijo)
+
+    def _llamar(self, indice: int, metodo: str, *args, **kwargs) -> Any:
+        conexion = self._conexiones[indice]
+        with self._cerrojos[indice]:
+            conexion.send((metodo, args, kwargs))
+            correcto, resultado = conexion.recv()
+        if not correcto:
+            raise resultado
+        return resultado
+
+    def _difundir(self, llamadas: Dict[int, Tuple[str, tuple, dict]]) -> Dict[int, Any]:
+        # Se envían todas las peticiones antes de esperar ninguna respuesta para que las
+        # particiones trabajen en paralelo; los cerrojos se toman en orden de índice
+        indices = sorted(llamadas)
+        with adquirir(self._cerrojos[i] for i in indices):
+            for indice in indices:
+                self._conexiones[indice].send(llamadas[indice])
+            respuestas = {indice: self._conexiones[indice].recv() for indice in indices}
+        for correcto, resultado in respuestas.values():
+            if not correcto:
+                raise resultado
+        return {indice: resultado for indice, (_, resultado) in respuestas.items()}
+
+    def _difundir_a_todas(self, metodo: str, *args, **kwargs) -> List[Any]:
+        respuestas = self._difundir({i: (metodo, args, kwargs) for i in range(len(self._conexiones))})
+        return [respuestas[i] for i in range(len(self._conexiones))]
+
+    def _repartir_lote(self, metodo: str, elementos: Iterable[T], clave: Callable[[T], str]) -> List[Any]:
+        grupos: Dict[int, List[int]] = {}
+        elementos = list(elementos)
+        for posicion, elemento in enumerate(elementos):
+            grupos.setdefault(particion_de(clave(elemento), len(self._conexiones)), []).append(posicion)
+        respuestas = self._difundir({indice: (metodo, ([elementos[p] for p in posiciones],), {})
+                                     for indice, posiciones in grupos.items()})
+        resultados: List[Any] = [None] * len(elementos)
+        for indice, posiciones in grupos.items():
+            for posicion, resultado in zip(posiciones, respuestas[indice]):
+                resultados[posicion] = resultado
+        return resultados
+
+    def agregar_libro(self, libro: 'Libro') -> bool:
+        return self._llamar(self._particion_libro(libro.isbn), 'agregar_libro', libro)
+
+    def agregar_libros_lote(self, libros: Iterable['Libro']) -> List[bool]:
+        return self._repartir_lote('agregar_libros_lote', libros, lambda libro: libro.isbn)
+
+    def obtener_libro(self, isbn: str) -> Optional['Libro']:
+        return self._llamar(self._particion_libro(isbn), 'obtener_libro', isbn)
+
+    def actualizar_libro(self, isbn: str, **kwargs) -> bool:
+        return self._llamar(self._particion_libro(isbn), 'actualizar_libro', isbn, **kwargs)
+
+    def agregar_ejemplares(self, isbn: str, cantidad: int) -> bool:
+        return self._llamar(self._particion_libro(isbn), 'agregar_ejemplares', isbn, cantidad)
+
+    def eliminar_libro(self, isbn: str) -> bool:
+        return self._llamar(self._particion_libro(isbn), 'eliminar_libro', isbn)
+
+    def buscar_libros(self, **criterios) -> List['Libro']:
+        # El orden de alta es local a cada partición: el resultado combinado se ordena por ISBN
+        resultados = self._difundir_a_todas('buscar_libros', **criterios)
+        return sorted((libro for libros in resultados for libro in libros), key=lambda libro: libro.isbn)
+
+    def autocompletar(self, prefijo: str, campo: str = 'titulo', limite: int = 10) -> List[str]:
+        completados: Dict[str, str] = {}
+        for parcial in self._difundir_a_todas('autocompletar', prefijo, campo, limite):
+            for texto in parcial:
+                completados.setdefault(normalizar(texto), texto)
+        return [completados[clave] for clave in sorted(completados)[:limite]]
+
+    def registrar_usuario(self, usuario: 'Usuario') -> bool:
+        return self._llamar(self._particion_usuario(usuario.id), 'registrar_usuario', usuario)
+
+    def registrar_usuarios_lote(self, usuarios: Iterable['Usuario']) -> List[bool]:
+        return self._repartir_lote('registrar_usuarios_lote', usuarios, lambda usuario: usuario.id)
+
+    def obtener_usuario(self, id: str) -> Optional['Usuario']:
+        return self._llamar(self._particion_usuario(id), 'obtener_usuario', id)
+
+    def eliminar_usuario(self, id: str) -> bool:
+        return self._llamar(self._particion_usuario(id), 'eliminar_usuario', id)
+
+    def crear_prestamo(self, libro_isbn: str, usuario_id: str) -> 'Prestamo':
+        # Dos fases: se aparta el ejemplar en la partición del libro, se asigna al usuario en
+        # la suya y solo entonces se registra el préstamo; si el usuario no puede recibirlo,
+        # el ejemplar apartado se libera
+        particion_libro = self._particion_libro(libro_isbn)
+        particion_usuario = self._particion_usuario(usuario_id)
+        if particion_libro == particion_usuario:
+            return self._llamar(particion_libro, 'prestar', libro_isbn, usuario_id)
+        titulo = self._llamar(particion_libro, 'apartar_ejemplar', libro_isbn, usuario_id)
+        try:
+            self._llamar(particion_usuario, 'asignar_usuario', usuario_id, libro_isbn, titulo)
+        except Exception:
+            self._llamar(particion_libro, 'liberar_ejemplar', libro_isbn)
+            raise
+        return self._llamar(particion_libro, 'confirmar_prestamo', libro_isbn, usuario_id)
+
+    def devolver_prestamo(self, prestamo_id: str) -> bool:
+        indice = self._particion_prestamo(prestamo_id)
+        if indice is None:
+            return False
+        prestamo = self._llamar(indice, 'devolver_ejemplar', prestamo_id)
+        if prestamo is None:
+            return False
+        # Hasta este paso el usuario cuenta el libro todavía: como mucho rechaza un préstamo de más
+        self._llamar(self._particion_usuario(prestamo.usuario_id), 'liberar_usuario',
+                     prestamo.usuario_id, prestamo.libro_isbn)
+        return True
+
+    def obtener_prestamo(self, prestamo_id: str) -> Optional['Prestamo']:
+        indice = self._particion_prestamo(prestamo_id)
+        if indice is None:
+            return None
+        return self._llamar(indice, 'obtener_prestamo', prestamo_id)
+
+    @staticmethod
+    def _combinar_prestamos(resultados: List[List['Prestamo']]) -> List['Prestamo']:
+        return sorted((p for prestamos in resultados for p in prestamos), key=lambda p: p.fecha_prestamo)
+
+    def listar_prestamos_activos(self) -> List['Prestamo']:
+        return self._combinar_prestamos(self._difundir_a_todas('listar_prestamos_activos'))
+
+    def listar_prestamos_usuario(self, usuario_id: str) -> List['Prestamo']:
+        # Los préstamos viven con su libro: los de un usuario pueden estar en cualquier partición
+        return self._combinar_prestamos(self._difundir_a_todas('listar_prestamos_usuario', usuario_id))
+
+    def listar_prestamos_vencidos(self, fecha_actual: Optional[datetime] = None) -> List['Prestamo']:
+        # Una sola fecha para todas las particiones
+        fecha_actual = fecha_actual or datetime.now()
+        return self._combinar_prestamos(self._difundir_a_todas('listar_prestamos_vencidos', fecha_actual))
+
+    def total_libros(self) -> int:
+        return sum(self._difundir_a_todas('total_libros'))
+
+    def total_usuarios(self) -> int:
+        return sum(self._difundir_a_todas('total_usuarios'))
+
+    def total_prestamos_activos(self) -> int:
+        return sum(self._difundir_a_todas('total_prestamos_activos'))
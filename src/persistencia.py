@@ -0,0 +1,325 @@
+import itertools
+import json
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, IO, List, Optional, Tuple
+from src.biblioteca import Biblioteca
+from src.serializacion import (libro_a_dict, libro_desde_dict, usuario_a_dict, usuario_desde_dict,
+                               prestamo_a_dict, prestamo_desde_dict, reserva_a_dict, texto_a_fecha)
+
+
+class AlmacenPersistente:
+    # Con `sincrono` (por omisión) cada escritura vuelve cuando su registro está en disco: la
+    # primera que espera hace el fsync de todo lo escrito hasta entonces y las que llegan mientras
+    # tanto se suman al siguiente (escritura en grupo). Sin él la durabilidad es asíncrona: la
+    # operación vuelve antes del fsync y una caída puede perder hasta `registros_por_grupo`
+    # registros o `intervalo_grupo` segundos de operaciones ya confirmadas
+
+    PREFIJO_DIARIO = 'diario-'
+    PREFIJO_INSTANTANEA = 'instantanea-'
+    PREFIJO_ARCHIVO = 'archivo-'
+
+    def __init__(self, directorio: str, registros_por_grupo: int = 64,
+                 intervalo_grupo: float = 0.05, registros_por_instantanea: int = 100_000,
+                 sincrono: bool = True):
+        if registros_por_grupo < 1:
+            raise ValueError("registros_por_grupo debe ser al menos 1")
+        self._directorio = directorio
+        self._registros_por_grupo = registros_por_grupo
+        self._intervalo_grupo = intervalo_grupo
+        self._registros_por_instantanea = registros_por_instantanea
+        self._sincrono = sincrono
+
+        self._cerrojo = threading.RLock()
+        self._biblioteca: Optional[Biblioteca] = None
+        self._archivo: Optional[IO[str]] = None
+        self._secuencia = 0
+        self._pendientes = 0
+        # Último registro que ya está en disco y si algún hilo está haciendo el fsync
+        self._sincronizado = 0
+        self._sincronizando = False
+        self._condicion = threading.Condition(threading.Lock())
+        self._registros_desde_instantanea = 0
+        self._compactacion_pendiente = False
+        # Segmentos inmutables con los bloques comprimidos del archivo de préstamos devueltos
+        # y cuántos bloques de la biblioteca ya están en ellos
+        self._segmentos_archivo: List[str] = []
+        self._bloques_guardados = 0
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def secuencia(self) -> int:
+        return self._secuencia
+
+    def abrir(self) -> Biblioteca:
+        if self._biblioteca is not None:
+            raise RuntimeError("El almacén ya está abierto")
+        os.makedirs(self._directorio, exist_ok=True)
+
+        biblioteca = Biblioteca()
+        secuencia = self._cargar_instantanea(biblioteca)
+        secuencia = self._reproducir_diario(biblioteca, secuencia)
+
+        self._secuencia = self._sincronizado = secuencia
+        self._abrir_segmento(secuencia + 1)
+        biblioteca.agregar_observador(self._registrar)
+        self._biblioteca = biblioteca
+
+        if self._intervalo_grupo > 0:
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._sincronizar_periodicamente, daemon=True)
+            self._hilo.start()
+        return biblioteca
+
+    def cerrar(self) -> None:
+        if self._biblioteca is None:
+            return
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        if self._compactacion_pendiente:
+            self.compactar()
+        with self._cerrojo:
+            self._biblioteca.quitar_observador(self._registrar)
+            self._biblioteca = None
+            self.sincronizar()
+            self._archivo.close()
+            self._archivo = None
+
+    def __enter__(self) -> Biblioteca:
+        return self.abrir()
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def sincronizar(self) -> None:
+        with self._cerrojo:
+            if self._archivo is None:
+                return
+            if self._pendientes:
+                self._archivo.flush()
+                os.fsync(self._archivo.fileno())
+                self._pendientes = 0
+            with self._condicion:
+                self._sincronizado = max(self._sincronizado, self._secuencia)
+                self._condicion.notify_all()
+
+    def _esperar_disco(self, secuencia: int) -> None:
+        while True:
+            with self._condicion:
+                while self._sincronizando and self._sincronizado < secuencia:
+                    self._condicion.wait()
+                if self._sincronizado >= secuencia:
+                    return
+                self._sincronizando = True
+            # Este hilo hace el fsync del grupo; los demás esperan a que termine
+            hasta = escrito = 0
+            try:
+                with self._cerrojo:
+                    escrito = self._secuencia
+                    self._archivo.flush()
+                    # Copia del descriptor: el fsync se hace sin el cerrojo del diario para que
+                    # otras escrituras se sumen al siguiente grupo, aunque entretanto se cierre
+                    descriptor = os.dup(self._archivo.fileno())
+                try:
+                    os.fsync(descriptor)
+                finally:
+                    os.close(descriptor)
+                hasta = escrito
+            finally:
+                with self._condicion:
+                    self._sincronizando = False
+                    self._sincronizado = max(self._sincronizado, hasta)
+                    self._condicion.notify_all()
+
+    def compactar(self) -> None:
+        biblioteca = self._biblioteca
+        if biblioteca is None:
+            raise RuntimeError("El almacén no está abierto")
+        # Se detienen todas las mutaciones para que la instantánea coincida con la secuencia;
+        # los cerrojos de la biblioteca van siempre antes que el del diario
+        with biblioteca._bloquear_todo(), self._cerrojo:
+            self.sincronizar()
+            secuencia = self._secuencia
+            self._escribir_instantanea(biblioteca, secuencia)
+            self._archivo.close()
+            self._abrir_segmento(secuencia + 1)
+            self._registros_desde_instantanea = 0
+            self._compactacion_pendiente = False
+            self._eliminar_anteriores(secuencia)
+
+    def _registrar(self, tipo: str, datos: Dict[str, Any]) -> None:
+        with self._cerrojo:
+            self._secuencia += 1
+            secuencia = self._secuencia
+            self._archivo.write(json.dumps({'n': self._secuencia, 't': tipo, 'd': datos},
+                                           ensure_ascii=False) + '\n')
+            self._pendientes += 1
+            self._registros_desde_instantanea += 1
+            if not self._sincrono and self._pendientes >= self._registros_por_grupo:
+                self.sincronizar()
+            if self._registros_desde_instantanea >= self._registros_por_instantanea:
+                # Se llama con los cerrojos de la operación en curso: la instantánea se
+                # escribe desde el hilo de sincronización o al cerrar
+                self._compactacion_pendiente = True
+        if self._sincrono:
+            self._esperar_disco(secuencia)
+
+    def _sincronizar_periodicamente(self) -> None:
+        while not self._detener.wait(self._intervalo_grupo):
+            if self._compactacion_pendiente:
+                self.compactar()
+            else:
+                self.sincronizar()
+
+    def _ruta(self, nombre: str) -> str:
+        return os.path.join(self._directorio, nombre)
+
+    def _listar(self, prefijo: str) -> List[Tuple[int, str]]:
+        archivos = []
+        for nombre in os.listdir(self._directorio):
+            if nombre.startswith(prefijo) and not nombre.endswith('.tmp'):
+                numero = nombre[len(prefijo):].split('.', 1)[0]
+                if numero.isdigit():
+                    archivos.append((int(numero), self._ruta(nombre)))
+        archivos.sort()
+        return archivos
+
+    def _abrir_segmento(self, inicio: int) -> None:
+        ruta = self._ruta(f"{self.PREFIJO_DIARIO}{inicio:020d}.log")
+        self._archivo = open(ruta, 'a', encoding='utf-8')
+        self._sincronizar_directorio()
+
+    def _sincronizar_directorio(self) -> None:
+        try:
+            descriptor = os.open(self._directorio, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        except OSError:
+            pass
+        finally:
+            os.close(descriptor)
+
+    def _escribir_instantanea(self, biblioteca: Biblioteca, secuencia: int) -> None:
+        # El historial archivado no se reescribe: los bloques sellados desde la última
+        # instantánea van, comprimidos tal cual, a un segmento nuevo que la instantánea cita
+        archivo_prestamos = biblioteca._archivo
+        bloques = archivo_prestamos.bloques()
+        segmentos = list(self._segmentos_archivo)
+        nuevos = archivo_prestamos.exportar_bloques(self._bloques_guardados)
+        if nuevos:
+            nombre = f"{self.PREFIJO_ARCHIVO}{secuencia:020d}.bin"
+            self._escribir_atomico(self._ruta(nombre), nuevos)
+            segmentos.append(nombre)
+
+        ruta = self._ruta(f"{self.PREFIJO_INSTANTANEA}{secuencia:020d}.jsonl")
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(json.dumps({'secuencia': secuencia, 'archivo': segmentos}) + '\n')
+            for libro in biblioteca._catalogo.values():
+                archivo.write(json.dumps({'libro': libro_a_dict(libro)}, ensure_ascii=False) + '\n')
+            for usuario in biblioteca._usuarios.values():
+                archivo.write(json.dumps({'usuario': usuario_a_dict(usuario)}, ensure_ascii=False) + '\n')
+            # En línea solo los activos y los devueltos que aún no se han sellado en un bloque
+            pendientes = archivo_prestamos.pendientes()
+            for prestamo in itertools.chain(biblioteca._prestamos.values(), pendientes):
+                archivo.write(json.dumps({'prestamo': prestamo_a_dict(prestamo)}, ensure_ascii=False) + '\n')
+            for reserva in biblioteca._reservas:
+                archivo.write(json.dumps({'reserva': reserva_a_dict(reserva)}, ensure_ascii=False) + '\n')
+            # Lo que los bloques aportan a la actividad de cada usuario, para no leerlos al cargar
+            en_linea = Counter(p.usuario_id for p in itertools.chain(biblioteca._prestamos.values(), pendientes))
+            for usuario_id in biblioteca._usuarios:
+                archivados = biblioteca._estadisticas.prestamos_de_usuario(usuario_id) - en_linea[usuario_id]
+                if archivados > 0:
+                    archivo.write(json.dumps({'actividad': {'usuario_id': usuario_id, 'prestamos': archivados}},
+                                             ensure_ascii=False) + '\n')
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+        self._sincronizar_directorio()
+        self._segmentos_archivo = segmentos
+        self._bloques_guardados = bloques
+
+    def _escribir_atomico(self, ruta: str, datos: bytes) -> None:
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            archivo.write(datos)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+
+    def _cargar_instantanea(self, biblioteca: Biblioteca) -> int:
+        instantaneas = self._listar(self.PREFIJO_INSTANTANEA)
+        if not instantaneas:
+            return 0
+        _, ruta = instantaneas[-1]
+        with open(ruta, encoding='utf-8') as archivo:
+            cabecera = json.loads(archivo.readline())
+            secuencia = cabecera['secuencia']
+            self._segmentos_archivo = cabecera.get('archivo', [])
+            for nombre in self._segmentos_archivo:
+                with open(self._ruta(nombre), 'rb') as segmento:
+                    biblioteca._archivo.importar_bloques(segmento.read())
+            self._bloques_guardados = biblioteca._archivo.bloques()
+            for linea in archivo:
+                registro = json.loads(linea)
+                if 'libro' in registro:
+                    biblioteca._insertar_libro(libro_desde_dict(registro['libro']))
+                elif 'usuario' in registro:
+                    biblioteca._insertar_usuario(usuario_desde_dict(registro['usuario']))
+                elif 'prestamo' in registro:
+                    biblioteca._registrar_prestamo(prestamo_desde_dict(registro['prestamo']))
+                elif 'actividad' in registro:
+                    datos = registro['actividad']
+                    biblioteca._estadisticas.prestamos_archivados(datos['usuario_id'], datos['prestamos'])
+                else:
+                    datos = registro['reserva']
+                    biblioteca._reservas.agregar(datos['libro_isbn'], datos['usuario_id'],
+                                                 texto_a_fecha(datos['fecha_reserva']), datos['ticket'],
+                                                 texto_a_fecha(datos.get('fecha_limite')))
+        return secuencia
+
+    def _reproducir_diario(self, biblioteca: Biblioteca, secuencia: int) -> int:
+        segmentos = self._listar(self.PREFIJO_DIARIO)
+        for i, (inicio, ruta) in enumerate(segmentos):
+            siguiente = segmentos[i + 1][0] if i + 1 < len(segmentos) else None
+            if siguiente is not None and siguiente <= secuencia + 1:
+                continue
+            with open(ruta, 'r+b') as archivo:
+                completo = 0
+                for linea in archivo:
+                    try:
+                        # Sin salto de línea el registro no terminó de escribirse
+                        registro = json.loads(linea) if linea.endswith(b'\n') else None
+                    except ValueError:
+                        registro = None
+                    if registro is None:
+                        # Escritura incompleta al final del segmento tras una caída: se recorta
+                        # para que los registros nuevos no queden pegados a ella
+                        archivo.truncate(completo)
+                        archivo.flush()
+                        os.fsync(archivo.fileno())
+                        break
+                    completo += len(linea)
+                    if registro['n'] <= secuencia:
+                        continue
+                    biblioteca._aplicar_evento(registro['t'], registro['d'])
+                    secuencia = registro['n']
+        return secuencia
+
+    def _eliminar_anteriores(self, secuencia: int) -> None:
+        for inicio, ruta in self._listar(self.PREFIJO_DIARIO):
+            if inicio <= secuencia:
+                os.remove(ruta)
+        for numero, ruta in self._listar(self.PREFIJO_INSTANTANEA):
+            if numero < secuencia:
+                os.remove(ruta)
+        # Segmentos que ninguna instantánea cita: restos de una compactación interrumpida
+        for numero, ruta in self._listar(self.PREFIJO_ARCHIVO):
+            if os.path.basename(ruta) not in self._segmentos_archivo:
+                os.remove(ruta)
@@ -3,7 +3,11 @@ from typing import Optional
 
 class Prestamo:
     
+    __slots__ = ('_id', '_libro_isbn', '_usuario_id', '_fecha_prestamo',
+                 '_fecha_devolucion', '_fecha_limite')
+    
     DIAS_PRESTAMO = 14 
+    MULTA_DIARIA = 50  # céntimos por día completo de retraso
     
     def __init__(self, id: str, libro_isbn: str, usuario_id: str, 
                  fecha_prestamo: Optional[datetime] = None,
@@ -68,6 +72,16 @@ class Prestamo:
         diferencia = self._fecha_limite - fecha
         return max(0, diferencia.days)
     
+    def dias_vencido(self, fecha_actual: Optional[datetime] = None) -> int:
+        # Días completos transcurridos desde la fecha límite
+        if not self.esta_activo():
+            return 0
+        fecha = fecha_actual or datetime.now()
+        return max(0, (fecha - self._fecha_limite).days)
+    
+    def multa(self, fecha_actual: Optional[datetime] = None) -> int:
+        return self.dias_vencido(fecha_actual) * self.MULTA_DIARIA
+    
     def __str__(self) -> str:
         estado = "Activo" if self.esta_activo() else "Devuelto"
         return f"Préstamo {self._id}: Libro {self._libro_isbn} a Usuario {self._usuario_id} - {estado}"
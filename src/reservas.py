@@ -0,0 +1,180 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+
+class Reserva(NamedTuple):
+    ticket: int
+    libro_isbn: str
+    usuario_id: str
+    fecha_reserva: datetime
+    # El plazo para recoger el ejemplar empieza cuando hay uno libre para esta reserva;
+    # mientras se espera en la cola no corre
+    fecha_limite: Optional[datetime] = None
+
+    def esta_vencida(self, fecha_actual: Optional[datetime] = None) -> bool:
+        return self.fecha_limite is not None and (fecha_actual or datetime.now()) > self.fecha_limite
+
+
+class _Cola:
+
+    __slots__ = ('tickets', 'inicio')
+
+    def __init__(self):
+        # Tickets crecientes; los anteriores a `inicio` ya se atendieron
+        self.tickets: List[int] = []
+        self.inicio = 0
+
+    def __len__(self) -> int:
+        return len(self.tickets) - self.inicio
+
+
+class ColaReservas:
+
+    DIAS_RESERVA = 7
+
+    def __init__(self):
+        self._colas: Dict[str, _Cola] = {}
+        self._reservas: Dict[int, 'Reserva'] = {}
+        self._por_usuario: Dict[str, Dict[str, 'Reserva']] = {}
+        self._siguiente = 0
+        self._cerrojo = threading.Lock()
+
+    def agregar(self, libro_isbn: str, usuario_id: str, fecha: Optional[datetime] = None,
+                ticket: Optional[int] = None, fecha_limite: Optional[datetime] = None) -> 'Reserva':
+        with self._cerrojo:
+            if ticket is None:
+                ticket = self._siguiente
+            self._siguiente = max(self._siguiente, ticket + 1)
+            reserva = Reserva(ticket, libro_isbn, usuario_id, fecha or datetime.now(), fecha_limite)
+
+            cola = self._colas.get(libro_isbn)
+            if cola is None:
+                cola = self._colas[libro_isbn] = _Cola()
+            if not cola.tickets or cola.tickets[-1] < ticket:
+                cola.tickets.append(ticket)
+            else:
+                insort(cola.tickets, ticket, cola.inicio)
+            self._reservas[ticket] = reserva
+            self._por_usuario.setdefault(usuario_id, {})[libro_isbn] = reserva
+            return reserva
+
+    def retirar(self, libro_isbn: str, usuario_id: str) -> Optional['Reserva']:
+        with self._cerrojo:
+            return self._retirar(libro_isbn, usuario_id)
+
+    def _retirar(self, libro_isbn: str, usuario_id: str) -> Optional['Reserva']:
+        reservas_usuario = self._por_usuario.get(usuario_id)
+        reserva = reservas_usuario.pop(libro_isbn, None) if reservas_usuario else None
+        if reserva is None:
+            return None
+        if not reservas_usuario:
+            del self._por_usuario[usuario_id]
+        del self._reservas[reserva.ticket]
+
+        cola = self._colas[libro_isbn]
+        i = bisect_left(cola.tickets, reserva.ticket, cola.inicio)
+        if i == cola.inicio:
+            # Atender la cabeza solo avanza el inicio; el hueco se recorta de vez en cuando
+            cola.inicio += 1
+            if cola.inicio > 32 and 2 * cola.inicio > len(cola.tickets):
+                del cola.tickets[:cola.inicio]
+                cola.inicio = 0
+        else:
+            del cola.tickets[i]
+        if not cola:
+            del self._colas[libro_isbn]
+        return reserva
+
+    def retirar_libro(self, libro_isbn: str) -> List['Reserva']:
+        with self._cerrojo:
+            return [self._retirar(libro_isbn, r.usuario_id) for r in self._en_orden(libro_isbn)]
+
+    def retirar_usuario(self, usuario_id: str) -> List['Reserva']:
+        with self._cerrojo:
+            return [self._retirar(isbn, usuario_id) for isbn in list(self._por_usuario.get(usuario_id, {}))]
+
+    def retirar_vencidas(self, libro_isbn: str, fecha_actual: datetime) -> List['Reserva']:
+        # Los plazos se abren por orden de cola y duran lo mismo: las vencidas están en la cabeza
+        with self._cerrojo:
+            retiradas = []
+            cola = self._colas.get(libro_isbn)
+            while cola and self._reservas[cola.tickets[cola.inicio]].esta_vencida(fecha_actual):
+                reserva = self._reservas[cola.tickets[cola.inicio]]
+                retiradas.append(self._retirar(libro_isbn, reserva.usuario_id))
+                cola = self._colas.get(libro_isbn)
+            return retiradas
+
+    def ofrecer(self, libro_isbn: str, cantidad: int, fecha: datetime) -> List['Reserva']:
+        # Hay `cantidad` ejemplares libres guardados para la cola: las primeras reservas que
+        # aún no tenían plazo empiezan a contarlo ahora
+        with self._cerrojo:
+            cola = self._colas.get(libro_isbn)
+            if cola is None:
+                return []
+            fecha_limite = fecha + timedelta(days=self.DIAS_RESERVA)
+            abiertas = []
+            for ticket in cola.tickets[cola.inicio:cola.inicio + cantidad]:
+                reserva = self._reservas[ticket]
+                if reserva.fecha_limite is None:
+                    abiertas.append(self._fijar_plazo(reserva, fecha_limite))
+            return abiertas
+
+    def abrir_plazo(self, libro_isbn: str, usuario_id: str, fecha_limite: datetime) -> Optional['Reserva']:
+        with self._cerrojo:
+            reserva = self.obtener(libro_isbn, usuario_id)
+            return self._fijar_plazo(reserva, fecha_limite) if reserva is not None else None
+
+    def _fijar_plazo(self, reserva: 'Reserva', fecha_limite: datetime) -> 'Reserva':
+        reserva = reserva._replace(fecha_limite=fecha_limite)
+        self._reservas[reserva.ticket] = reserva
+        self._por_usuario[reserva.usuario_id][reserva.libro_isbn] = reserva
+        return reserva
+
+    def primera(self, libro_isbn: str, condicion: Callable[['Reserva'], bool]) -> Optional['Reserva']:
+        # Recorre la cola desde la cabeza sin copiarla: lo habitual es que sirva la primera
+        with self._cerrojo:
+            cola = self._colas.get(libro_isbn)
+            if cola is None:
+                return None
+            for i in range(cola.inicio, len(cola.tickets)):
+                reserva = self._reservas[cola.tickets[i]]
+                if condicion(reserva):
+                    return reserva
+            return None
+
+    def obtener(self, libro_isbn: str, usuario_id: str) -> Optional['Reserva']:
+        return self._por_usuario.get(usuario_id, {}).get(libro_isbn)
+
+    def posicion(self, libro_isbn: str, usuario_id: str) -> Optional[int]:
+        with self._cerrojo:
+            reserva = self.obtener(libro_isbn, usuario_id)
+            if reserva is None:
+                return None
+            cola = self._colas[libro_isbn]
+            return bisect_left(cola.tickets, reserva.ticket, cola.inicio) - cola.inicio + 1
+
+    def en_orden(self, libro_isbn: str) -> List['Reserva']:
+        with self._cerrojo:
+            return self._en_orden(libro_isbn)
+
+    def _en_orden(self, libro_isbn: str) -> List['Reserva']:
+        cola = self._colas.get(libro_isbn)
+        if cola is None:
+            return []
+        return [self._reservas[t] for t in cola.tickets[cola.inicio:]]
+
+    def de_usuario(self, usuario_id: str) -> List['Reserva']:
+        return sorted(self._por_usuario.get(usuario_id, {}).values())
+
+    def tiene(self, libro_isbn: str) -> bool:
+        return libro_isbn in self._colas
+
+    def __iter__(self) -> Iterator['Reserva']:
+        with self._cerrojo:
+            reservas = sorted(self._reservas.values())
+        return iter(reservas)
+
+    def __len__(self) -> int:
+        return len(self._reservas)
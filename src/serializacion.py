@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from src.libro import Libro
+from src.usuario import Usuario
+from src.prestamo import Prestamo
+from src.reservas import Reserva
+
+
+def fecha_a_texto(fecha: Optional[datetime]) -> Optional[str]:
+    return fecha.isoformat() if fecha is not None else None
+
+
+def texto_a_fecha(texto: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(texto) if texto is not None else None
+
+
+def libro_a_dict(libro: 'Libro') -> Dict[str, Any]:
+    return {
+        'isbn': libro.isbn,
+        'titulo': libro.titulo,
+        'autor': libro.autor,
+        'disponible': libro.disponible,
+        'ejemplares': libro.ejemplares,
+        'disponibles': libro.ejemplares_disponibles,
+    }
+
+
+def libro_desde_dict(datos: Dict[str, Any]) -> 'Libro':
+    return Libro(datos['isbn'], datos['titulo'], datos['autor'], datos.get('disponible', True),
+                 datos.get('ejemplares', 1), datos.get('disponibles'))
+
+
+def usuario_a_dict(usuario: 'Usuario') -> Dict[str, Any]:
+    return {
+        'id': usuario.id,
+        'nombre': usuario.nombre,
+        'libros_prestados': list(usuario.libros_prestados),
+    }
+
+
+def usuario_desde_dict(datos: Dict[str, Any]) -> 'Usuario':
+    usuario = Usuario(datos['id'], datos['nombre'])
+    for isbn in datos.get('libros_prestados', ()):
+        usuario.agregar_prestamo(isbn)
+    return usuario
+
+
+def prestamo_a_dict(prestamo: 'Prestamo') -> Dict[str, Any]:
+    return {
+        'id': prestamo.id,
+        'libro_isbn': prestamo.libro_isbn,
+        'usuario_id': prestamo.usuario_id,
+        'fecha_prestamo': fecha_a_texto(prestamo.fecha_prestamo),
+        'fecha_devolucion': fecha_a_texto(prestamo.fecha_devolucion),
+    }
+
+
+def prestamo_desde_dict(datos: Dict[str, Any]) -> 'Prestamo':
+    return Prestamo(datos['id'], datos['libro_isbn'], datos['usuario_id'],
+                    fecha_prestamo=texto_a_fecha(datos['fecha_prestamo']),
+                    fecha_devolucion=texto_a_fecha(datos.get('fecha_devolucion')))
+
+
+def reserva_a_dict(reserva: 'Reserva') -> Dict[str, Any]:
+    return {
+        'ticket': reserva.ticket,
+        'libro_isbn': reserva.libro_isbn,
+        'usuario_id': reserva.usuario_id,
+        'fecha_reserva': fecha_a_texto(reserva.fecha_reserva),
+        'fecha_limite': fecha_a_texto(reserva.fecha_limite),
+    }
@@ -0,0 +1,189 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from src.biblioteca import Biblioteca, ResultadoLote
+from src.libro import Libro
+from src.usuario import Usuario
+from src.prestamo import Prestamo
+from src.paginacion import Pagina
+from src.reservas import Reserva
+from src.vencimientos import EvaluacionVencimientos
+
+
+class BibliotecaAsync:
+
+    def __init__(self, biblioteca: Biblioteca, ejecutor: Optional[Executor] = None,
+                 capacidad_cola: int = 10_000):
+        self._biblioteca = biblioteca
+        self._ejecutor = ejecutor
+        self._capacidad_cola = capacidad_cola
+        self._lecturas_en_curso: Dict[Hashable, asyncio.Future] = {}
+        self._cola: Optional[asyncio.Queue] = None
+        self._escritor: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> 'BibliotecaAsync':
+        self._iniciar()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.cerrar()
+
+    def _iniciar(self) -> None:
+        if self._escritor is None:
+            self._cola = asyncio.Queue(self._capacidad_cola)
+            self._escritor = asyncio.get_running_loop().create_task(self._procesar_escrituras())
+
+    async def cerrar(self) -> None:
+        if self._escritor is None:
+            return
+        await self._cola.put(None)
+        await self._escritor
+        self._escritor = None
+        self._cola = None
+
+    def _ejecutar(self, funcion: Callable[..., Any], *args, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._ejecutor, functools.partial(funcion, *args, **kwargs))
+
+    async def _leer(self, metodo: str, *args, **kwargs) -> Any:
+        funcion = getattr(self._biblioteca, metodo)
+        clave = (metodo, args, tuple(sorted(kwargs.items())))
+        try:
+            futuro = self._lecturas_en_curso.get(clave)
+        except TypeError:
+            # Argumentos no hashables: la lectura no se puede agrupar
+            return await self._ejecutar(funcion, *args, **kwargs)
+
+        if futuro is None:
+            futuro = self._ejecutar(funcion, *args, **kwargs)
+            self._lecturas_en_curso[clave] = futuro
+            futuro.add_done_callback(functools.partial(self._olvidar_lectura, clave))
+        resultado = await asyncio.shield(futuro)
+        # Cada llamador recibe su propia lista aunque la lectura se haya compartido
+        if isinstance(resultado, Pagina):
+            return Pagina(list(resultado.elementos), resultado.cursor)
+        if isinstance(resultado, dict):
+            return dict(resultado)
+        return list(resultado) if isinstance(resultado, list) else resultado
+
+    def _olvidar_lectura(self, clave: Hashable, futuro: asyncio.Future) -> None:
+        if self._lecturas_en_curso.get(clave) is futuro:
+            del self._lecturas_en_curso[clave]
+
+    async def _escribir(self, metodo: str, *args) -> Any:
+        self._iniciar()
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((getattr(self._biblioteca, metodo), args, futuro))
+        return await futuro
+
+    async def _procesar_escrituras(self) -> None:
+        while True:
+            trabajo = await self._cola.get()
+            if trabajo is None:
+                return
+            funcion, args, futuro = trabajo
+            try:
+                resultado = await self._ejecutar(funcion, *args)
+            except Exception as error:
+                if not futuro.cancelled():
+                    futuro.set_exception(error)
+            else:
+                if not futuro.cancelled():
+                    futuro.set_result(resultado)
+            finally:
+                # Las lecturas posteriores a una escritura no se agrupan con las anteriores
+                self._lecturas_en_curso.clear()
+
+    async def agregar_libro(self, libro: 'Libro') -> bool:
+        return await self._escribir('agregar_libro', libro)
+
+    async def obtener_libro(self, isbn: str) -> Optional['Libro']:
+        return await self._leer('obtener_libro', isbn)
+
+    async def agregar_ejemplares(self, isbn: str, cantidad: int) -> bool:
+        return await self._escribir('agregar_ejemplares', isbn, cantidad)
+
+    async def eliminar_libro(self, isbn: str) -> bool:
+        return await self._escribir('eliminar_libro', isbn)
+
+    async def buscar_libros(self, **criterios) -> List['Libro']:
+        return await self._leer('buscar_libros', **criterios)
+
+    async def paginar_libros(self, limite: int = 20, cursor: Optional[int] = None, **criterios) -> Pagina:
+        return await self._leer('paginar_libros', limite, cursor, **criterios)
+
+    async def autocompletar(self, prefijo: str, campo: str = 'titulo', limite: int = 10) -> List[str]:
+        return await self._leer('autocompletar', prefijo, campo, limite)
+
+    async def registrar_usuario(self, usuario: 'Usuario') -> bool:
+        return await self._escribir('registrar_usuario', usuario)
+
+    async def obtener_usuario(self, id: str) -> Optional['Usuario']:
+        return await self._leer('obtener_usuario', id)
+
+    async def eliminar_usuario(self, id: str) -> bool:
+        return await self._escribir('eliminar_usuario', id)
+
+    async def crear_prestamo(self, libro_isbn: str, usuario_id: str) -> 'Prestamo':
+        return await self._escribir('crear_prestamo', libro_isbn, usuario_id)
+
+    async def devolver_prestamo(self, prestamo_id: str) -> bool:
+        return await self._escribir('devolver_prestamo', prestamo_id)
+
+    async def crear_prestamos_lote(self, pares: List[Tuple[str, str]]) -> 'ResultadoLote':
+        return await self._escribir('crear_prestamos_lote', list(pares))
+
+    async def devolver_prestamos_lote(self, prestamo_ids: List[str]) -> 'ResultadoLote':
+        return await self._escribir('devolver_prestamos_lote', list(prestamo_ids))
+
+    async def reservar(self, libro_isbn: str, usuario_id: str) -> 'Reserva':
+        return await self._escribir('reservar', libro_isbn, usuario_id)
+
+    async def cancelar_reserva(self, libro_isbn: str, usuario_id: str) -> bool:
+        return await self._escribir('cancelar_reserva', libro_isbn, usuario_id)
+
+    async def posicion_reserva(self, libro_isbn: str, usuario_id: str) -> Optional[int]:
+        return await self._leer('posicion_reserva', libro_isbn, usuario_id)
+
+    async def listar_reservas(self, libro_isbn: str) -> List['Reserva']:
+        return await self._leer('listar_reservas', libro_isbn)
+
+    async def obtener_prestamo(self, prestamo_id: str) -> Optional['Prestamo']:
+        return await self._leer('obtener_prestamo', prestamo_id)
+
+    async def listar_prestamos_activos(self) -> List['Prestamo']:
+        return await self._leer('listar_prestamos_activos')
+
+    async def listar_prestamos_usuario(self, usuario_id: str) -> List['Prestamo']:
+        return await self._leer('listar_prestamos_usuario', usuario_id)
+
+    async def listar_prestamos_vencidos(self, fecha_actual: Optional[datetime] = None) -> List['Prestamo']:
+        return await self._leer('listar_prestamos_vencidos', fecha_actual)
+
+    async def evaluar_vencimientos(self, fecha_actual: Optional[datetime] = None) -> EvaluacionVencimientos:
+        return await self._leer('evaluar_vencimientos', fecha_actual)
+
+    async def paginar_prestamos_activos(self, limite: int = 20, cursor: Optional[int] = None) -> Pagina:
+        return await self._leer('paginar_prestamos_activos', limite, cursor)
+
+    async def paginar_prestamos_usuario(self, usuario_id: str, limite: int = 20,
+                                        cursor: Optional[int] = None) -> Pagina:
+        return await self._leer('paginar_prestamos_usuario', usuario_id, limite, cursor)
+
+    async def paginar_prestamos_vencidos(self, limite: int = 20, fecha_actual: Optional[datetime] = None,
+                                         cursor: Optional[int] = None) -> Pagina:
+        return await self._leer('paginar_prestamos_vencidos', limite, fecha_actual, cursor)
+
+    async def estadisticas(self, limite: int = 5) -> Dict[str, Any]:
+        return await self._leer('estadisticas', limite)
+
+    async def total_libros(self) -> int:
+        return await self._leer('total_libros')
+
+    async def total_usuarios(self) -> int:
+        return await self._leer('total_usuarios')
+
+    async def total_prestamos_activos(self) -> int:
+        return await self._leer('total_prestamos_activos')
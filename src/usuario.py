@@ -2,6 +2,8 @@ from typing import List
 
 class Usuario:
     
+    __slots__ = ('_id', '_nombre', '_libros_prestados')
+    
     MAX_LIBROS = 5
     
     def __init__(self, id: str, nombre: str):
@@ -49,6 +51,14 @@ class Usuario:
     def puede_prestar(self) -> bool:
         return len(self._libros_prestados) < self.MAX_LIBROS
     
+    def __copy__(self) -> 'Usuario':
+        # La lista de préstamos se modifica en el sitio: la copia no puede compartirla
+        copia = Usuario.__new__(Usuario)
+        copia._id = self._id
+        copia._nombre = self._nombre
+        copia._libros_prestados = self._libros_prestados.copy()
+        return copia
+    
     def __str__(self) -> str:
         return f"Usuario: {self._nombre} (ID: {self._id}) - {len(self._libros_prestados)} libros prestados"
     
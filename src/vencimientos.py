@@ -0,0 +1,164 @@
+import heapq
+import threading
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from src.prestamo import Prestamo
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EPOCA = datetime(1970, 1, 1)
+MICROSEGUNDOS_DIA = 86_400_000_000
+
+
+def a_microsegundos(fecha: datetime) -> int:
+    # Entero exacto, con la misma aritmética ingenua (sin zona horaria) que usa Prestamo
+    return (fecha - EPOCA) // timedelta(microseconds=1)
+
+
+class EvaluacionVencimientos(NamedTuple):
+    # Columnas alineadas con `ids`: arrays de NumPy si está instalado, array('q') si no.
+    # `vencidos` cuenta como Prestamo.esta_vencido (pasada la fecha límite, aunque sea por horas)
+    ids: List[str]
+    dias_restantes: Sequence[int]
+    dias_vencido: Sequence[int]
+    multas: Sequence[int]
+    vencidos: int
+    total_multas: int
+
+
+class ColaVencimientos:
+
+    # Préstamos que se acumulan sin volcar aunque el heap sea más pequeño
+    MAX_PENDIENTES = 1024
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._pendientes: List[Tuple[int, 'Prestamo']] = []
+        self._activos: Dict[str, 'Prestamo'] = {}
+        self._secuencia = 0
+        self._obsoletas = 0
+        # Fechas límite contiguas en microsegundos para evaluarlas todas de una pasada; al
+        # retirar, el último préstamo ocupa el hueco
+        self._limites = array('q')
+        self._ids: List[str] = []
+        self._posiciones: Dict[str, int] = {}
+        self._cerrojo = threading.Lock()
+
+    def agregar(self, prestamo: 'Prestamo') -> None:
+        # La fecha límite se lee al volcar los pendientes en el heap, en la siguiente consulta
+        with self._cerrojo:
+            self._activos[prestamo.id] = prestamo
+            self._pendientes.append((self._secuencia, prestamo))
+            self._secuencia += 1
+            if len(self._pendientes) > max(self.MAX_PENDIENTES, len(self._heap)):
+                # Aunque nadie consulte los vencidos, los pendientes no crecen sin límite;
+                # volcarlos cuando igualan al heap deja el coste amortizado constante
+                self._volcar_pendientes()
+            limite = a_microsegundos(prestamo.fecha_limite)
+            posicion = self._posiciones.get(prestamo.id)
+            if posicion is not None:
+                # Un préstamo que se vuelve a agregar reemplaza su fecha límite anterior
+                self._limites[posicion] = limite
+            else:
+                self._posiciones[prestamo.id] = len(self._ids)
+                self._ids.append(prestamo.id)
+                self._limites.append(limite)
+
+    def retirar(self, prestamo_id: str) -> bool:
+        with self._cerrojo:
+            if self._activos.pop(prestamo_id, None) is None:
+                return False
+            self._obsoletas += 1
+            if self._obsoletas > self.MAX_PENDIENTES and self._obsoletas > len(self._heap) // 2:
+                # Las entradas de préstamos devueltos tampoco se acumulan sin consultas
+                self._volcar_pendientes()
+                self._depurar()
+            posicion = self._posiciones.pop(prestamo_id)
+            ultimo_id = self._ids.pop()
+            ultimo_limite = self._limites.pop()
+            if ultimo_id != prestamo_id:
+                self._ids[posicion] = ultimo_id
+                self._limites[posicion] = ultimo_limite
+                self._posiciones[ultimo_id] = posicion
+            return True
+
+    def evaluar(self, fecha_actual: datetime,
+                multa_diaria: int = Prestamo.MULTA_DIARIA) -> 'EvaluacionVencimientos':
+        # Mismo resultado que dias_restantes, dias_vencido y multa préstamo a préstamo: la
+        # división entera por días redondea hacia abajo, como timedelta.days
+        ahora = a_microsegundos(fecha_actual)
+        with self._cerrojo:
+            ids = list(self._ids)
+            limites = numpy.frombuffer(self._limites, dtype=numpy.int64).copy() if numpy is not None \
+                else array('q', self._limites)
+        if numpy is not None:
+            diferencias = limites - ahora
+            restantes = numpy.maximum(diferencias // MICROSEGUNDOS_DIA, 0)
+            vencido = numpy.maximum(-diferencias // MICROSEGUNDOS_DIA, 0)
+            multas = vencido * multa_diaria
+            return EvaluacionVencimientos(ids, restantes, vencido, multas,
+                                          int(numpy.count_nonzero(diferencias < 0)), int(multas.sum()))
+        restantes = array('q', [max(0, (limite - ahora) // MICROSEGUNDOS_DIA) for limite in limites])
+        vencido = array('q', [max(0, (ahora - limite) // MICROSEGUNDOS_DIA) for limite in limites])
+        multas = array('q', [dias * multa_diaria for dias in vencido])
+        return EvaluacionVencimientos(ids, restantes, vencido, multas,
+                                      sum(1 for limite in limites if limite < ahora), sum(multas))
+
+    def vencidos(self, fecha_actual: datetime) -> List['Prestamo']:
+        with self._cerrojo:
+            return self._vencidos(fecha_actual)
+
+    def _vencidos(self, fecha_actual: datetime) -> List['Prestamo']:
+        self._volcar_pendientes()
+        self._depurar()
+
+        heap = self._heap
+        encontrados: List[Tuple[int, 'Prestamo']] = []
+        pila = [0] if heap else []
+        while pila:
+            i = pila.pop()
+            fecha_limite, secuencia, prestamo_id = heap[i]
+            if not fecha_actual > fecha_limite:
+                continue
+            prestamo = self._activos.get(prestamo_id)
+            if prestamo is not None:
+                encontrados.append((secuencia, prestamo))
+            hijo = 2 * i + 1
+            if hijo < len(heap):
+                pila.append(hijo)
+            if hijo + 1 < len(heap):
+                pila.append(hijo + 1)
+
+        encontrados.sort(key=lambda entrada: entrada[0])
+        return [prestamo for _, prestamo in encontrados]
+
+    def _volcar_pendientes(self) -> None:
+        if not self._pendientes:
+            return
+        entradas = [(p.fecha_limite, secuencia, p.id) for secuencia, p in self._pendientes
+                    if p.id in self._activos]
+        self._pendientes = []
+        if len(entradas) > len(self._heap):
+            self._heap.extend(entradas)
+            heapq.heapify(self._heap)
+        else:
+            for entrada in entradas:
+                heapq.heappush(self._heap, entrada)
+
+    def _depurar(self) -> None:
+        heap = self._heap
+        if self._obsoletas > len(heap) // 2:
+            self._heap = [e for e in heap if e[2] in self._activos]
+            heapq.heapify(self._heap)
+            self._obsoletas = 0
+            return
+        while heap and heap[0][2] not in self._activos:
+            heapq.heappop(heap)
+            self._obsoletas -= 1
+
+    def __len__(self) -> int:
+        return len(self._activos)
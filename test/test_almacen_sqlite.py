@@ -0,0 +1,172 @@
+import pytest
+from datetime import datetime, timedelta
+from src.almacen_sqlite import BibliotecaSQLite
+from src.biblioteca import LibroNoDisponibleError, UsuarioNoExisteError, LibroNoExisteError
+from src.libro import Libro
+from src.usuario import Usuario
+
+class TestBibliotecaSQLite:
+    
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = BibliotecaSQLite()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Clean Architecture", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Design Patterns", "Gang of Four"))
+        biblioteca.agregar_libro(Libro("ISBN4", "Refactoring", "Martin Fowler"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.registrar_usuario(Usuario("U002", "María García"))
+        yield biblioteca
+        biblioteca.cerrar()
+    
+    def test_agregar_y_obtener(self, biblioteca):
+        assert biblioteca.agregar_libro(Libro("ISBN1", "Otro", "Otro")) == False
+        assert biblioteca.obtener_libro("ISBN1").titulo == "Clean Code"
+        assert biblioteca.obtener_libro("ISBN-FALSO") is None
+        assert biblioteca.registrar_usuario(Usuario("U001", "Otro")) == False
+        assert biblioteca.obtener_usuario("U001").nombre == "Juan Pérez"
+        assert biblioteca.total_libros() == 4
+        assert biblioteca.total_usuarios() == 2
+    
+    @pytest.mark.parametrize("criterios,esperados", [
+        ({"titulo": "clean"}, ["ISBN1", "ISBN2"]),
+        ({"titulo": "CODE"}, ["ISBN1"]),
+        ({"titulo": "n"}, ["ISBN1", "ISBN2", "ISBN3", "ISBN4"]),
+        ({"titulo": ""}, ["ISBN1", "ISBN2", "ISBN3", "ISBN4"]),
+        ({"autor": "martin"}, ["ISBN1", "ISBN2", "ISBN4"]),
+        ({"titulo": "clean", "autor": "robert"}, ["ISBN1", "ISBN2"]),
+        ({"titulo": 'ab"c'}, []),
+        ({"autor": "Unknown"}, []),
+    ])
+    def test_buscar_libros(self, biblioteca, criterios, esperados):
+        assert [l.isbn for l in biblioteca.buscar_libros(**criterios)] == esperados
+    
+    def test_crear_prestamo_errores(self, biblioteca):
+        biblioteca.crear_prestamo("ISBN1", "U001")
+        
+        with pytest.raises(LibroNoExisteError, match="no existe"):
+            biblioteca.crear_prestamo("ISBN-FALSO", "U001")
+        with pytest.raises(LibroNoDisponibleError, match="no está disponible"):
+            biblioteca.crear_prestamo("ISBN1", "U002")
+        with pytest.raises(UsuarioNoExisteError, match="no existe"):
+            biblioteca.crear_prestamo("ISBN2", "U999")
+    
+    def test_crear_prestamo_limite(self, biblioteca):
+        for i in range(5, 10):
+            biblioteca.agregar_libro(Libro(f"ISBN{i}", f"Libro {i}", "Autor"))
+        for i in range(1, 6):
+            biblioteca.crear_prestamo(f"ISBN{i}", "U001")
+        
+        with pytest.raises(ValueError, match="límite de préstamos"):
+            biblioteca.crear_prestamo("ISBN6", "U001")
+        assert biblioteca.obtener_libro("ISBN6").disponible == True
+    
+    def test_flujo_prestamo_devolucion(self, biblioteca):
+        prestamo1 = biblioteca.crear_prestamo("ISBN1", "U001")
+        prestamo2 = biblioteca.crear_prestamo("ISBN3", "U001")
+        
+        assert biblioteca.obtener_libro("ISBN1").disponible == False
+        assert biblioteca.obtener_usuario("U001").libros_prestados == ["ISBN1", "ISBN3"]
+        assert [l.isbn for l in biblioteca.buscar_libros(disponible=True)] == ["ISBN2", "ISBN4"]
+        assert biblioteca.eliminar_libro("ISBN1") == False
+        assert biblioteca.eliminar_usuario("U001") == False
+        
+        assert biblioteca.devolver_prestamo(prestamo1.id) == True
+        assert biblioteca.devolver_prestamo(prestamo1.id) == False
+        assert biblioteca.devolver_prestamo("PRESTAMO-FALSO") == False
+        
+        assert biblioteca.obtener_prestamo(prestamo1.id).esta_activo() == False
+        assert [p.id for p in biblioteca.listar_prestamos_activos()] == [prestamo2.id]
+        assert [p.id for p in biblioteca.listar_prestamos_usuario("U001")] == [prestamo2.id]
+        assert biblioteca.total_prestamos_activos() == 1
+        assert biblioteca.eliminar_libro("ISBN1") == True
+        assert biblioteca.buscar_libros(titulo="clean code") == []
+    
+    def test_listar_prestamos_vencidos(self, biblioteca):
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        
+        assert biblioteca.listar_prestamos_vencidos() == []
+        vencidos = biblioteca.listar_prestamos_vencidos(datetime.now() + timedelta(days=15))
+        assert [p.id for p in vencidos] == [prestamo.id]
+    
+    def test_persistencia_en_archivo(self, tmp_path):
+        ruta = str(tmp_path / "biblioteca.db")
+        with BibliotecaSQLite(ruta) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+            biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+            prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        
+        with BibliotecaSQLite(ruta) as biblioteca:
+            assert biblioteca.obtener_prestamo(prestamo.id).fecha_prestamo == prestamo.fecha_prestamo
+            assert [l.isbn for l in biblioteca.buscar_libros(titulo="clean")] == ["ISBN1"]
+    
+    def test_varios_ejemplares(self, biblioteca):
+        biblioteca.agregar_libro(Libro("ISBN5", "Domain-Driven Design", "Eric Evans", ejemplares=2))
+        biblioteca.registrar_usuario(Usuario("U003", "Ana López"))
+        
+        prestamo = biblioteca.crear_prestamo("ISBN5", "U001")
+        with pytest.raises(ValueError, match="ya tiene un ejemplar"):
+            biblioteca.crear_prestamo("ISBN5", "U001")
+        biblioteca.crear_prestamo("ISBN5", "U002")
+        
+        libro = biblioteca.obtener_libro("ISBN5")
+        assert (libro.ejemplares, libro.ejemplares_disponibles) == (2, 0)
+        assert [l.isbn for l in biblioteca.buscar_libros(disponible=False)] == ["ISBN5"]
+        with pytest.raises(LibroNoDisponibleError):
+            biblioteca.crear_prestamo("ISBN5", "U003")
+        assert biblioteca.eliminar_libro("ISBN5") == False
+        
+        biblioteca.devolver_prestamo(prestamo.id)
+        assert biblioteca.agregar_ejemplares("ISBN5", 1) == True
+        
+        libro = biblioteca.obtener_libro("ISBN5")
+        assert (libro.ejemplares, libro.ejemplares_disponibles) == (3, 2)
+    
+    def test_migra_base_sin_ejemplares(self, tmp_path):
+        import sqlite3
+        ruta = str(tmp_path / "antigua.db")
+        conexion = sqlite3.connect(ruta)
+        conexion.executescript("""
+            CREATE TABLE libros (
+                ordinal INTEGER PRIMARY KEY AUTOINCREMENT, isbn TEXT NOT NULL UNIQUE,
+                titulo TEXT NOT NULL, autor TEXT NOT NULL, titulo_busqueda TEXT NOT NULL,
+                autor_busqueda TEXT NOT NULL, disponible INTEGER NOT NULL);
+            INSERT INTO libros (isbn, titulo, autor, titulo_busqueda, autor_busqueda, disponible)
+                VALUES ('ISBN1', 'Clean Code', 'Robert Martin', 'clean code', 'robert martin', 0);
+        """)
+        conexion.close()
+        
+        with BibliotecaSQLite(ruta) as biblioteca:
+            libro = biblioteca.obtener_libro("ISBN1")
+            assert (libro.ejemplares, libro.ejemplares_disponibles) == (1, 0)
+    
+    def test_buscar_sin_tildes(self, biblioteca):
+        biblioteca.agregar_libro(Libro("ISBN5", "Cien años de soledad", "Gabriel García Márquez"))
+        
+        assert [l.isbn for l in biblioteca.buscar_libros(autor="garcia")] == ["ISBN5"]
+        assert [l.isbn for l in biblioteca.buscar_libros(titulo="AÑOS", autor="márquez")] == ["ISBN5"]
+        assert [l.isbn for l in biblioteca.buscar_libros(titulo="ñu")] == []
+    
+    def test_autocompletar(self, biblioteca):
+        biblioteca.agregar_libro(Libro("ISBN5", "Cien años de soledad", "Gabriel García Márquez"))
+        
+        assert biblioteca.autocompletar("CLEAN") == ["Clean Architecture", "Clean Code"]
+        assert biblioteca.autocompletar("c", limite=2) == ["Cien años de soledad", "Clean Architecture"]
+        assert biblioteca.autocompletar("rob", campo="autor") == ["Robert Martin"]
+        assert biblioteca.autocompletar("", campo="autor", limite=1) == ["Gabriel García Márquez"]
+        assert biblioteca.autocompletar("zz") == []
+    
+    def test_renormaliza_claves_de_bases_anteriores(self, tmp_path):
+        ruta = str(tmp_path / "antigua.db")
+        with BibliotecaSQLite(ruta) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Cien años de soledad", "Gabriel García Márquez"))
+        import sqlite3
+        conexion = sqlite3.connect(ruta)
+        conexion.execute("UPDATE libros SET titulo_busqueda = lower(titulo), autor_busqueda = lower(autor)")
+        conexion.execute("INSERT INTO libros_fts (libros_fts) VALUES ('rebuild')")
+        conexion.execute("PRAGMA user_version = 0")
+        conexion.commit()
+        conexion.close()
+        
+        with BibliotecaSQLite(ruta) as biblioteca:
+            assert [l.isbn for l in biblioteca.buscar_libros(autor="garcia marquez")] == ["ISBN1"]
\ No newline at end of file
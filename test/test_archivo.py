@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta
+from src.archivo import ArchivoPrestamos
+from src.biblioteca import Biblioteca
+from src.libro import Libro
+from src.prestamo import Prestamo
+from src.usuario import Usuario
+
+def devuelto(i):
+    inicio = datetime(2024, 1, 1) + timedelta(hours=i)
+    return Prestamo(f"P{i:04d}", f"ISBN{i}", f"U{i % 7}", fecha_prestamo=inicio,
+                    fecha_devolucion=inicio + timedelta(days=3))
+
+class TestArchivoPrestamos:
+
+    def test_obtener_desde_bloques_y_pendientes(self):
+        archivo = ArchivoPrestamos(prestamos_por_bloque=4)
+        for i in range(10):
+            assert archivo.agregar(devuelto(i)) == True
+
+        assert len(archivo) == 10
+        assert archivo.bytes_comprimidos() > 0
+        for i in range(10):
+            prestamo = archivo.obtener(f"P{i:04d}")
+            assert prestamo.libro_isbn == f"ISBN{i}"
+            assert prestamo.fecha_devolucion == devuelto(i).fecha_devolucion
+        assert archivo.obtener("P9999") is None
+
+    def test_agregar_es_idempotente(self):
+        archivo = ArchivoPrestamos(prestamos_por_bloque=2)
+        archivo.agregar(devuelto(1))
+        archivo.agregar(devuelto(2))
+
+        assert archivo.agregar(devuelto(1)) == False
+        assert len(archivo) == 2
+
+    def test_rechaza_prestamos_activos(self):
+        with pytest.raises(ValueError):
+            ArchivoPrestamos().agregar(Prestamo("P1", "ISBN1", "U1"))
+
+    def test_iterar_en_orden_de_llegada(self):
+        archivo = ArchivoPrestamos(prestamos_por_bloque=3)
+        for i in range(7):
+            archivo.agregar(devuelto(i))
+
+        assert [p.id for p in archivo] == [f"P{i:04d}" for i in range(7)]
+
+    def test_reabrir_archivo_en_disco(self, tmp_path):
+        ruta = str(tmp_path / "prestamos.archivo")
+        with ArchivoPrestamos(ruta, prestamos_por_bloque=4) as archivo:
+            for i in range(6):
+                archivo.agregar(devuelto(i))
+
+        with ArchivoPrestamos(ruta) as archivo:
+            assert len(archivo) == 6
+            assert archivo.obtener("P0005").usuario_id == "U5"
+
+    def test_descarta_bloque_incompleto(self, tmp_path):
+        ruta = str(tmp_path / "prestamos.archivo")
+        with ArchivoPrestamos(ruta, prestamos_por_bloque=2) as archivo:
+            for i in range(4):
+                archivo.agregar(devuelto(i))
+        with open(ruta, "ab") as crudo:
+            crudo.write(b"\x00\x00\x01\x00basura")
+
+        with ArchivoPrestamos(ruta, prestamos_por_bloque=2) as archivo:
+            assert len(archivo) == 4
+            archivo.agregar(devuelto(4))
+            archivo.agregar(devuelto(5))
+        with ArchivoPrestamos(ruta) as archivo:
+            assert archivo.obtener("P0005") is not None
+
+class TestBibliotecaConArchivo:
+
+    def test_devolucion_saca_prestamo_del_conjunto_de_trabajo(self):
+        biblioteca = Biblioteca(ArchivoPrestamos(prestamos_por_bloque=2))
+        for i in range(5):
+            biblioteca.agregar_libro(Libro(f"ISBN{i}", f"Libro {i}", "Autor"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.registrar_usuario(Usuario("U002", "María García"))
+
+        devueltos = []
+        for i in range(4):
+            prestamo = biblioteca.crear_prestamo(f"ISBN{i}", "U001" if i % 2 else "U002")
+            biblioteca.devolver_prestamo(prestamo.id)
+            devueltos.append(prestamo)
+        activo = biblioteca.crear_prestamo("ISBN4", "U001")
+
+        assert list(biblioteca._prestamos) == [activo.id]
+        assert len(biblioteca._archivo) == 4
+        for prestamo in devueltos:
+            archivado = biblioteca.obtener_prestamo(prestamo.id)
+            assert archivado == prestamo
+            assert archivado.fecha_devolucion == prestamo.fecha_devolucion
+        assert biblioteca.devolver_prestamo(devueltos[0].id) == False
\ No newline at end of file
@@ -0,0 +1,98 @@
+import pytest
+from src.almacen_sqlite import BibliotecaSQLite
+from src.autocompletado import IndicePrefijos, limite_superior
+from src.biblioteca import Biblioteca
+from src.libro import Libro
+from src.persistencia import AlmacenPersistente
+
+class TestIndicePrefijos:
+
+    @pytest.fixture
+    def indice(self):
+        indice = IndicePrefijos()
+        for texto in ["Clean Code", "Clean Architecture", "Cien años de soledad", "Design Patterns", "Código limpio"]:
+            indice.agregar(texto.lower(), texto)
+        return indice
+
+    @pytest.mark.parametrize("prefijo,limite,esperados", [
+        ("cl", 10, ["Clean Architecture", "Clean Code"]),
+        ("c", 2, ["Cien años de soledad", "Clean Architecture"]),
+        ("design p", 10, ["Design Patterns"]),
+        ("z", 10, []),
+    ])
+    def test_completar_en_orden(self, indice, prefijo, limite, esperados):
+        assert indice.completar(prefijo, limite) == esperados
+
+    def test_claves_compartidas_hasta_la_ultima_baja(self):
+        indice = IndicePrefijos()
+        indice.agregar("refactoring", "Refactoring")
+        indice.agregar("refactoring", "Refactoring")
+
+        assert indice.eliminar("refactoring", "Refactoring") == True
+        assert indice.completar("ref") == ["Refactoring"]
+        assert indice.eliminar("refactoring", "Refactoring") == True
+        assert indice.completar("ref") == []
+        assert indice.eliminar("refactoring", "Refactoring") == False
+        assert len(indice) == 0
+
+    def test_limite_superior(self):
+        assert limite_superior("abc") == "abd"
+        assert "abz" < limite_superior("ab") <= "ac"
+
+    def test_limite_invalido(self, indice):
+        with pytest.raises(ValueError):
+            indice.completar("c", 0)
+
+class TestAutocompletarBiblioteca:
+
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Clean Architecture", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Cien años de soledad", "Gabriel García Márquez"))
+        biblioteca.agregar_libro(Libro("ISBN4", "Refactoring", "Martin Fowler"))
+        return biblioteca
+
+    def test_titulos_y_autores_sin_duplicados(self, biblioteca):
+        assert biblioteca.autocompletar("CLE") == ["Clean Architecture", "Clean Code"]
+        assert biblioteca.autocompletar("ro", campo="autor") == ["Robert Martin"]
+        assert biblioteca.autocompletar("gabriel garcia", campo="autor") == ["Gabriel García Márquez"]
+
+    def test_se_actualiza_al_agregar_y_eliminar(self, biblioteca):
+        biblioteca.agregar_libro(Libro("ISBN5", "Clean Agile", "Robert Martin"))
+        assert biblioteca.autocompletar("clean", limite=1) == ["Clean Agile"]
+
+        biblioteca.eliminar_libro("ISBN1")
+        biblioteca.eliminar_libro("ISBN5")
+        assert biblioteca.autocompletar("clean") == ["Clean Architecture"]
+        assert biblioteca.autocompletar("rob", campo="autor") == ["Robert Martin"]
+
+        biblioteca.eliminar_libro("ISBN2")
+        assert biblioteca.autocompletar("rob", campo="autor") == []
+
+    @pytest.mark.parametrize("clase", [Biblioteca, BibliotecaSQLite])
+    def test_variantes_con_tilde_elige_la_misma_forma(self, clase):
+        biblioteca = clase()
+        biblioteca.agregar_libro(Libro("ISBN1", "Árbol", "Ana Pérez"))
+        biblioteca.agregar_libro(Libro("ISBN2", "arbol", "ana perez"))
+        biblioteca.agregar_libro(Libro("ISBN3", "ÁRBOL", "Ana Perez"))
+
+        assert biblioteca.autocompletar("arb") == ["arbol"]
+        assert biblioteca.autocompletar("ana", campo="autor") == ["Ana Perez"]
+        biblioteca.eliminar_libro("ISBN2")
+        assert biblioteca.autocompletar("arb") == ["ÁRBOL"]
+
+    def test_campo_desconocido(self, biblioteca):
+        with pytest.raises(ValueError):
+            biblioteca.autocompletar("x", campo="isbn")
+
+    def test_reconstruido_al_reabrir(self, tmp_path):
+        directorio = str(tmp_path / "datos")
+        with AlmacenPersistente(directorio) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+            biblioteca.agregar_libro(Libro("ISBN2", "Clean Architecture", "Robert Martin"))
+            biblioteca.eliminar_libro("ISBN1")
+
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.autocompletar("clean") == ["Clean Architecture"]
@@ -137,4 +137,59 @@ class TestBiblioteca:
         resultados = biblioteca.buscar_libros(disponible=True)
         
         assert len(resultados) == 1
-        assert resultados[0].isbn == "ISBN2"
\ No newline at end of file
+        assert resultados[0].isbn == "ISBN2"
+    
+    def test_buscar_libros_coincide_con_recorrido_completo(self, biblioteca):
+        datos = [
+            ("ISBN1", "Clean Code", "Robert Martin"),
+            ("ISBN2", "Clean Architecture", "Robert Martin"),
+            ("ISBN3", "Design Patterns", "Gang of Four"),
+            ("ISBN4", "Refactoring", "Martin Fowler"),
+            ("ISBN5", "Domain Driven Design", "Eric Evans"),
+        ]
+        for isbn, titulo, autor in datos:
+            biblioteca.agregar_libro(Libro(isbn, titulo, autor))
+        biblioteca.eliminar_libro("ISBN2")
+        biblioteca.agregar_libro(Libro("ISBN2", "Clean Architecture", "Robert Martin"))
+        
+        for consulta in ["", "c", "an", "clean", "design", "n d", "rtin", "xyz", "Domain Driven Design"]:
+            esperados = [l for l in biblioteca._catalogo.values() if consulta.lower() in l.titulo.lower()]
+            assert biblioteca.buscar_libros(titulo=consulta) == esperados
+            assert [l.isbn for l in biblioteca.buscar_libros(titulo=consulta)] == [l.isbn for l in esperados]
+        
+        resultados = biblioteca.buscar_libros(titulo="clean", autor="martin")
+        assert [l.isbn for l in resultados] == ["ISBN1", "ISBN2"]
+    
+    def test_buscar_libros_por_disponibilidad_combinada(self, biblioteca, usuario_ejemplo):
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Clean Architecture", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler", disponible=False))
+        biblioteca.registrar_usuario(usuario_ejemplo)
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        
+        assert [l.isbn for l in biblioteca.buscar_libros(disponible=False)] == ["ISBN1", "ISBN3"]
+        assert [l.isbn for l in biblioteca.buscar_libros(titulo="clean", disponible=True)] == ["ISBN2"]
+        assert [l.isbn for l in biblioteca.buscar_libros(autor="martin", disponible=False)] == ["ISBN1", "ISBN3"]
+        
+        biblioteca.devolver_prestamo(prestamo.id)
+        
+        assert [l.isbn for l in biblioteca.buscar_libros(disponible=True)] == ["ISBN1", "ISBN2"]
+        
+        biblioteca.eliminar_libro("ISBN1")
+        
+        assert [l.isbn for l in biblioteca.buscar_libros(disponible=True)] == ["ISBN2"]
+    
+    @pytest.mark.parametrize("criterios,esperados", [
+        ({"autor": "garcia marquez"}, ["ISBN1"]),
+        ({"autor": "GARCÍA"}, ["ISBN1"]),
+        ({"autor": "perez"}, ["ISBN2", "ISBN3"]),
+        ({"autor": "Pérez"}, ["ISBN2", "ISBN3"]),
+        ({"titulo": "anos"}, ["ISBN1"]),
+        ({"titulo": "corazon", "autor": "perez"}, ["ISBN2"]),
+    ])
+    def test_buscar_libros_sin_tildes_ni_mayusculas(self, biblioteca, criterios, esperados):
+        biblioteca.agregar_libro(Libro("ISBN1", "Cien años de soledad", "Gabriel García Márquez"))
+        biblioteca.agregar_libro(Libro("ISBN2", "El corazón delator", "Ana Pérez"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Otra historia", "Luis Perez"))
+        
+        assert [l.isbn for l in biblioteca.buscar_libros(**criterios)] == esperados
\ No newline at end of file
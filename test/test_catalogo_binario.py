@@ -0,0 +1,100 @@
+import pytest
+from src.biblioteca import Biblioteca
+from src.catalogo_binario import CatalogoBinario, escribir_catalogo
+from src.libro import Libro
+
+LIBROS = [
+    Libro("ISBN1", "Clean Code", "Robert Martin"),
+    Libro("ISBN2", "Clean Architecture", "Robert Martin", ejemplares=3, disponibles=1),
+    Libro("ISBN3", "Design Patterns", "Gang of Four", ejemplares=2, disponibles=0),
+    Libro("ISBN4", "Cien años de soledad", "Gabriel García Márquez"),
+    Libro("ISBN5", "Refactoring", "Martin Fowler", disponible=False),
+]
+
+class TestCatalogoBinario:
+
+    @pytest.fixture
+    def ruta(self, tmp_path):
+        ruta = str(tmp_path / "catalogo.bin")
+        escribir_catalogo(ruta, LIBROS)
+        return ruta
+
+    @pytest.fixture
+    def catalogo(self, ruta):
+        with CatalogoBinario(ruta) as catalogo:
+            yield catalogo
+
+    def test_obtener_libro(self, catalogo):
+        libro = catalogo.obtener_libro("ISBN2")
+
+        assert (libro.titulo, libro.autor, libro.ejemplares, libro.ejemplares_disponibles) == \
+            ("Clean Architecture", "Robert Martin", 3, 1)
+        assert catalogo.obtener_libro("ISBN4").titulo == "Cien años de soledad"
+        assert catalogo.obtener_libro("ISBN-FALSO") is None
+        assert "ISBN5" in catalogo
+        assert len(catalogo) == 5
+
+    @pytest.mark.parametrize("criterios", [
+        {},
+        {"titulo": "clean"},
+        {"titulo": "AÑOS"},
+        {"titulo": "n"},
+        {"titulo": ""},
+        {"autor": "martin"},
+        {"titulo": "clean", "autor": "robert", "disponible": True},
+        {"disponible": False},
+        {"autor": "marquez", "disponible": False},
+        {"titulo": "code architecture"},
+    ])
+    def test_busquedas_como_biblioteca(self, catalogo, criterios):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libros_lote(LIBROS)
+
+        assert [l.isbn for l in catalogo.buscar_libros(**criterios)] == \
+            [l.isbn for l in biblioteca.buscar_libros(**criterios)]
+
+    def test_indice_hash_con_muchos_libros(self, tmp_path):
+        ruta = str(tmp_path / "grande.bin")
+        libros = [Libro(f"978-{i:09d}", f"Título {i}", f"Autor {i % 50}") for i in range(5000)]
+        assert escribir_catalogo(ruta, libros + [Libro("978-000000001", "Repetido", "Otro")]) == 5000
+
+        with CatalogoBinario(ruta) as catalogo:
+            for i in range(0, 5000, 7):
+                assert catalogo.obtener_libro(f"978-{i:09d}").titulo == f"Título {i}"
+            assert catalogo.obtener_libro("978-999999999") is None
+            assert [l.isbn for l in catalogo.buscar_libros(titulo="título 4999")] == ["978-000004999"]
+            assert len(catalogo.buscar_libros(autor="autor 7")) == 100
+
+    def test_catalogo_vacio(self, tmp_path):
+        ruta = str(tmp_path / "vacio.bin")
+        escribir_catalogo(ruta, [])
+
+        with CatalogoBinario(ruta) as catalogo:
+            assert len(catalogo) == 0
+            assert catalogo.buscar_libros(titulo="clean") == []
+            assert catalogo.obtener_libro("ISBN1") is None
+
+    def test_rechaza_archivos_ajenos(self, tmp_path, ruta):
+        ajeno = tmp_path / "ajeno.bin"
+        ajeno.write_bytes(b"esto no es un catalogo binario, pero ocupa lo suficiente" * 4)
+        vacio = tmp_path / "vacio.bin"
+        vacio.write_bytes(b"")
+
+        for archivo in (ajeno, vacio):
+            with pytest.raises(ValueError):
+                CatalogoBinario(str(archivo))
+        with open(ruta, "ab") as crudo:
+            crudo.write(b"sobra")
+        with pytest.raises(ValueError):
+            CatalogoBinario(ruta)
+
+    def test_cadenas_repetidas_se_guardan_una_vez(self, tmp_path):
+        distintos = str(tmp_path / "distintos.bin")
+        repetidos = str(tmp_path / "repetidos.bin")
+        escribir_catalogo(distintos, [Libro(f"I{i}", f"T{i}", f"Autor con nombre largo {i}") for i in range(200)])
+        escribir_catalogo(repetidos, [Libro(f"I{i}", f"T{i}", "Autor con nombre largo") for i in range(200)])
+
+        with CatalogoBinario(repetidos) as catalogo:
+            assert catalogo.obtener_libro("I150").autor == "Autor con nombre largo"
+        import os
+        assert os.path.getsize(repetidos) < os.path.getsize(distintos)
@@ -0,0 +1,98 @@
+import threading
+import pytest
+from src.biblioteca import Biblioteca, LibroNoDisponibleError
+from src.concurrencia import CerrojosSegmentados, adquirir
+from src.libro import Libro
+from src.usuario import Usuario
+
+class TestConcurrencia:
+    
+    def test_cerrojos_en_orden_fijo(self):
+        cerrojos = CerrojosSegmentados(8)
+        
+        orden1 = cerrojos.cerrojos(["a", "b", "c", "d"])
+        orden2 = cerrojos.cerrojos(["d", "c", "b", "a", "a"])
+        
+        assert orden1 == orden2
+        assert len(orden1) == len({cerrojos.segmento(c) for c in "abcd"})
+    
+    def test_adquirir_libera_tras_excepcion(self):
+        cerrojos = CerrojosSegmentados(4).todos()
+        
+        with pytest.raises(RuntimeError):
+            with adquirir(cerrojos):
+                assert all(c.locked() for c in cerrojos)
+                raise RuntimeError("fallo")
+        
+        assert not any(c.locked() for c in cerrojos)
+    
+    def test_sin_prestamos_dobles_bajo_contencion(self):
+        biblioteca = Biblioteca()
+        for i in range(5):
+            biblioteca.agregar_libro(Libro(f"ISBN{i}", f"Libro {i}", "Autor"))
+        hilos_totales = 16
+        for i in range(hilos_totales):
+            biblioteca.registrar_usuario(Usuario(f"U{i:03d}", f"Usuario {i}"))
+        
+        barrera = threading.Barrier(hilos_totales)
+        exitos = []
+        errores = []
+        
+        def trabajar(indice):
+            usuario_id = f"U{indice:03d}"
+            barrera.wait()
+            for _ in range(200):
+                for j in range(5):
+                    try:
+                        prestamo = biblioteca.crear_prestamo(f"ISBN{j}", usuario_id)
+                    except LibroNoDisponibleError:
+                        continue
+                    except Exception as error:
+                        errores.append(error)
+                        continue
+                    exitos.append(prestamo)
+                    biblioteca.devolver_prestamo(prestamo.id)
+        
+        hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos_totales)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert errores == []
+        assert biblioteca.total_prestamos_activos() == 0
+        assert all(l.disponible for l in biblioteca.buscar_libros())
+        assert all(biblioteca.obtener_usuario(f"U{i:03d}").cantidad_prestamos() == 0 for i in range(hilos_totales))
+        
+        # Los intervalos de préstamo de un mismo libro nunca se solapan
+        por_libro = {}
+        for prestamo in exitos:
+            por_libro.setdefault(prestamo.libro_isbn, []).append(prestamo)
+        for prestamos in por_libro.values():
+            prestamos.sort(key=lambda p: p.fecha_prestamo)
+            for anterior, siguiente in zip(prestamos, prestamos[1:]):
+                assert anterior.fecha_devolucion <= siguiente.fecha_prestamo
+    
+    def test_un_solo_ganador_por_libro(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Libro", "Autor"))
+        for i in range(32):
+            biblioteca.registrar_usuario(Usuario(f"U{i}", f"Usuario {i}"))
+        barrera = threading.Barrier(32)
+        ganadores = []
+        
+        def intentar(i):
+            barrera.wait()
+            try:
+                ganadores.append(biblioteca.crear_prestamo("ISBN1", f"U{i}"))
+            except LibroNoDisponibleError:
+                pass
+        
+        hilos = [threading.Thread(target=intentar, args=(i,)) for i in range(32)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert len(ganadores) == 1
+        assert biblioteca.total_prestamos_activos() == 1
@@ -0,0 +1,181 @@
+import pytest
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from src.biblioteca import Biblioteca, LibroNoDisponibleError
+from src.estadisticas import Ranking
+from src.libro import Libro
+from src.persistencia import AlmacenPersistente
+from src.prestamo import Prestamo
+from src.serializacion import prestamo_a_dict
+from src.usuario import Usuario
+
+class TestRanking:
+
+    def test_primeros_por_cuenta_y_llegada(self):
+        ranking = Ranking()
+        for clave in ["A", "B", "B", "C", "C", "C", "A"]:
+            ranking.sumar(clave)
+
+        assert ranking.primeros(2) == [("C", 3), ("B", 2)]
+        assert ranking.primeros(10) == [("C", 3), ("B", 2), ("A", 2)]
+
+    def test_restar_y_eliminar(self):
+        ranking = Ranking()
+        for clave in ["A", "A", "B"]:
+            ranking.sumar(clave)
+
+        assert ranking.restar("A") == 1
+        assert ranking.primeros(2) == [("B", 1), ("A", 1)]
+        assert ranking.restar("B") == 0
+        assert ranking.restar("B") == 0
+        assert ranking.eliminar("A") == True
+        assert ranking.primeros(5) == []
+        assert len(ranking) == 0
+
+    def test_sumar_varios_salta_cubos(self):
+        ranking = Ranking()
+        for clave, cantidad in [("A", 1), ("B", 3), ("C", 5), ("D", 4), ("A", 6)]:
+            ranking.sumar(clave, cantidad)
+
+        assert ranking.primeros(10) == [("A", 7), ("C", 5), ("D", 4), ("B", 3)]
+        assert ranking.restar("A") == 6
+        assert ranking.primeros(1) == [("A", 6)]
+
+    def test_coincide_con_contador(self):
+        aleatorio = random.Random(7)
+        ranking = Ranking()
+        esperado = Counter()
+        for _ in range(2000):
+            clave = f"K{aleatorio.randrange(30)}"
+            if aleatorio.random() < 0.35:
+                ranking.restar(clave)
+                if esperado[clave]:
+                    esperado[clave] -= 1
+            else:
+                ranking.sumar(clave)
+                esperado[clave] += 1
+        esperado = +esperado
+
+        assert dict(ranking.primeros(100)) == dict(esperado)
+        cuentas = [cuenta for _, cuenta in ranking.primeros(100)]
+        assert cuentas == sorted(cuentas, reverse=True)
+
+class TestEstadisticasBiblioteca:
+
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Clean Architecture", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler", ejemplares=2))
+        for i in range(3):
+            biblioteca.registrar_usuario(Usuario(f"U00{i}", f"Usuario {i}"))
+        return biblioteca
+
+    def test_contadores_tras_prestamos_y_devoluciones(self, biblioteca):
+        biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.crear_prestamo("ISBN2", "U000")
+        prestamo = biblioteca.crear_prestamo("ISBN3", "U001")
+        biblioteca.crear_prestamo("ISBN3", "U002")
+        biblioteca.devolver_prestamo(prestamo.id)
+        biblioteca.crear_prestamo("ISBN3", "U001")
+
+        estadisticas = biblioteca.estadisticas(limite=2)
+
+        assert estadisticas['libros'] == 3
+        assert estadisticas['prestamos_activos'] == 4
+        assert (estadisticas['ejemplares'], estadisticas['ejemplares_prestados']) == (4, 4)
+        assert estadisticas['utilizacion'] == 1.0
+        assert estadisticas['autores_mas_prestados'] == [("Robert Martin", 2), ("Martin Fowler", 2)]
+        assert estadisticas['usuarios_mas_activos'] == [("U000", 2), ("U001", 2)]
+        assert biblioteca.prestamos_por_autor("Robert Martin") == 2
+
+    def test_altas_bajas_y_ejemplares(self, biblioteca):
+        biblioteca.agregar_ejemplares("ISBN1", 2)
+        biblioteca.agregar_libros_lote([Libro("ISBN4", "Clean Agile", "Robert Martin")])
+        biblioteca.eliminar_libro("ISBN2")
+        biblioteca.crear_prestamo("ISBN1", "U000")
+
+        estadisticas = biblioteca.estadisticas()
+
+        assert (estadisticas['ejemplares'], estadisticas['ejemplares_prestados']) == (6, 1)
+        assert estadisticas['utilizacion'] == pytest.approx(1 / 6)
+        biblioteca.eliminar_usuario("U002")
+        assert biblioteca.estadisticas()['usuarios'] == 2
+
+    def test_vencidos_sin_recorrer_prestamos(self, biblioteca):
+        primero = biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.crear_prestamo("ISBN2", "U001")
+        futuro = datetime.now() + timedelta(days=30)
+
+        assert biblioteca.estadisticas()['prestamos_vencidos'] == 0
+        assert biblioteca.estadisticas(fecha_actual=futuro)['prestamos_vencidos'] == 2
+        biblioteca.devolver_prestamo(primero.id)
+        assert biblioteca.estadisticas(fecha_actual=futuro)['prestamos_vencidos'] == 1
+        assert biblioteca.estadisticas()['prestamos_vencidos'] == 0
+        assert len(biblioteca.listar_prestamos_vencidos(futuro)) == 1
+
+    def test_fecha_futura_no_adelanta_el_recuento(self, biblioteca):
+        biblioteca.crear_prestamo("ISBN1", "U000")
+        futuro = datetime.now() + timedelta(days=30)
+
+        assert biblioteca.estadisticas(fecha_actual=futuro)['prestamos_vencidos'] == 1
+        assert biblioteca.estadisticas()['prestamos_vencidos'] == 0
+        # Un préstamo nuevo tampoco nace vencido por la consulta anterior
+        biblioteca.crear_prestamo("ISBN2", "U001")
+        assert biblioteca.estadisticas()['prestamos_vencidos'] == 0
+        assert biblioteca.estadisticas(fecha_actual=futuro)['prestamos_vencidos'] == 2
+
+    def test_recuento_incremental_con_el_reloj_real(self, biblioteca):
+        antiguo = Prestamo("P-ANTIGUO", "ISBN1", "U000", fecha_prestamo=datetime.now() - timedelta(days=20))
+        biblioteca._aplicar_evento('prestamo_creado', prestamo_a_dict(antiguo))
+
+        assert biblioteca.estadisticas()['prestamos_vencidos'] == 1
+        biblioteca.devolver_prestamo(antiguo.id)
+        assert biblioteca.estadisticas()['prestamos_vencidos'] == 0
+
+    def test_coincide_con_recorrido_completo(self, biblioteca):
+        aleatorio = random.Random(3)
+        for i in range(20):
+            biblioteca.agregar_libro(Libro(f"EXTRA{i}", f"Extra {i}", f"Autor {i % 4}", ejemplares=1 + i % 3))
+        isbns = [l.isbn for l in biblioteca.buscar_libros()]
+        for _ in range(300):
+            usuario_id = f"U00{aleatorio.randrange(3)}"
+            prestamos = biblioteca.listar_prestamos_usuario(usuario_id)
+            if prestamos and aleatorio.random() < 0.5:
+                biblioteca.devolver_prestamo(aleatorio.choice(prestamos).id)
+                continue
+            try:
+                biblioteca.crear_prestamo(aleatorio.choice(isbns), usuario_id)
+            except (LibroNoDisponibleError, ValueError):
+                pass
+
+        libros = biblioteca.buscar_libros()
+        activos = biblioteca.listar_prestamos_activos()
+        por_autor = Counter(biblioteca.obtener_libro(p.libro_isbn).autor for p in activos)
+        estadisticas = biblioteca.estadisticas(limite=100)
+        assert estadisticas['ejemplares'] == sum(l.ejemplares for l in libros)
+        assert estadisticas['ejemplares_prestados'] == sum(l.ejemplares_prestados for l in libros) == len(activos)
+        assert dict(estadisticas['autores_mas_prestados']) == dict(por_autor)
+
+    def test_reconstruidas_al_reabrir(self, tmp_path):
+        directorio = str(tmp_path / "datos")
+        with AlmacenPersistente(directorio) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin", ejemplares=2))
+            biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+            prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+            biblioteca.devolver_prestamo(prestamo.id)
+            biblioteca.crear_prestamo("ISBN1", "U001")
+            esperadas = biblioteca.estadisticas()
+
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.estadisticas() == esperadas
+
+        almacen = AlmacenPersistente(directorio)
+        almacen.abrir()
+        almacen.compactar()
+        almacen.cerrar()
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.estadisticas() == esperadas
+            assert esperadas['usuarios_mas_activos'] == [("U001", 2)]
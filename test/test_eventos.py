@@ -0,0 +1,207 @@
+import threading
+import time
+import pytest
+from src.biblioteca import Biblioteca
+from src.eventos import EventosPerdidosError, FlujoCambios
+from src.libro import Libro
+from src.usuario import Usuario
+
+class TestFlujoCambios:
+    
+    @pytest.fixture
+    def biblioteca(self):
+        return Biblioteca()
+    
+    @pytest.fixture
+    def flujo(self, biblioteca):
+        with FlujoCambios(biblioteca, capacidad=8, espera=0.05) as flujo:
+            yield flujo
+    
+    def poblar(self, biblioteca):
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        biblioteca.devolver_prestamo(prestamo.id)
+        biblioteca.eliminar_libro("ISBN1")
+        biblioteca.eliminar_usuario("U001")
+        return prestamo
+    
+    def test_eventos_numerados_en_orden(self, biblioteca, flujo):
+        suscripcion = flujo.suscribir()
+        prestamo = self.poblar(biblioteca)
+        
+        eventos = suscripcion.leer(espera=0)
+        
+        assert [e.secuencia for e in eventos] == [1, 2, 3, 4, 5, 6]
+        assert [e.tipo for e in eventos] == ['libro_agregado', 'usuario_registrado', 'prestamo_creado',
+                                             'prestamo_devuelto', 'libro_eliminado', 'usuario_eliminado']
+        assert eventos[2].datos['id'] == prestamo.id
+        assert suscripcion.posicion == flujo.secuencia == 6
+        assert suscripcion.leer(espera=0) == []
+    
+    def test_lotes_acotados_por_maximo(self, biblioteca, flujo):
+        suscripcion = flujo.suscribir()
+        self.poblar(biblioteca)
+        
+        assert [e.secuencia for e in suscripcion.leer(maximo=4, espera=0)] == [1, 2, 3, 4]
+        assert [e.secuencia for e in suscripcion.leer(maximo=4, espera=0)] == [5, 6]
+    
+    def test_filtro_por_tipos(self, biblioteca, flujo):
+        suscripcion = flujo.suscribir(tipos=['prestamo_creado', 'prestamo_devuelto'])
+        self.poblar(biblioteca)
+        
+        assert [e.tipo for e in suscripcion.leer(espera=0)] == ['prestamo_creado', 'prestamo_devuelto']
+        # Los eventos filtrados también cuentan como leídos
+        assert suscripcion.posicion == 6
+        with pytest.raises(ValueError):
+            flujo.suscribir(tipos=['libro_prestado'])
+    
+    def test_reanudar_desde_secuencia(self, biblioteca, flujo):
+        self.poblar(biblioteca)
+        
+        suscripcion = flujo.suscribir(desde=3)
+        
+        assert [e.secuencia for e in suscripcion.leer(espera=0)] == [4, 5, 6]
+        assert [e.secuencia for e in flujo.suscribir(desde=0).leer(espera=0)] == [1, 2, 3, 4, 5, 6]
+        with pytest.raises(ValueError):
+            flujo.suscribir(desde=7)
+    
+    def test_reanudar_antes_de_lo_retenido(self, biblioteca, flujo):
+        for i in range(10):
+            biblioteca.agregar_libro(Libro(f"ISBN{i}", f"Libro {i}", "Autor"))
+        
+        assert flujo.primera == 3 and len(flujo) == 8
+        with pytest.raises(EventosPerdidosError):
+            flujo.suscribir(desde=1)
+        assert flujo.suscribir(desde=2).leer(espera=0)[0].secuencia == 3
+    
+    def test_contrapresion_espera_al_consumidor(self, biblioteca):
+        flujo = FlujoCambios(biblioteca, capacidad=4, espera=5.0)
+        suscripcion = flujo.suscribir()
+        recibidos = []
+        
+        def consumir():
+            while len(recibidos) < 50:
+                recibidos.extend(e.secuencia for e in suscripcion.leer(maximo=3))
+        
+        consumidor = threading.Thread(target=consumir)
+        consumidor.start()
+        for i in range(50):
+            biblioteca.agregar_libro(Libro(f"ISBN{i}", f"Libro {i}", "Autor"))
+        consumidor.join(timeout=5)
+        
+        # Ningún evento se descartó antes de que el consumidor lo leyera
+        assert recibidos == list(range(1, 51))
+        assert len(flujo) <= 4
+        flujo.cerrar()
+    
+    def test_suscripcion_rezagada_se_desborda(self, biblioteca, flujo):
+        lenta = flujo.suscribir()
+        al_dia = flujo.suscribir()
+        
+        for i in range(8):
+            biblioteca.agregar_libro(Libro(f"ISBN{i}", f"Libro {i}", "Autor"))
+        al_dia.leer(espera=0)
+        biblioteca.agregar_libro(Libro("ISBN8", "Libro 8", "Autor"))
+        
+        with pytest.raises(EventosPerdidosError):
+            lenta.leer(espera=0)
+        assert [e.secuencia for e in al_dia.leer(espera=0)] == [9]
+    
+    def test_contrapresion_retiene_los_cerrojos(self, biblioteca):
+        # Límite documentado: la escritura que espera sitio conserva los cerrojos de su operación
+        # y las demás escrituras sobre el mismo libro esperan con ella, como mucho `espera`
+        flujo = FlujoCambios(biblioteca, capacidad=1, espera=0.3)
+        lenta = flujo.suscribir()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        esperando = threading.Event()
+        
+        def escribir():
+            esperando.set()
+            biblioteca.agregar_ejemplares("ISBN1", 1)
+        
+        escritor = threading.Thread(target=escribir)
+        escritor.start()
+        esperando.wait()
+        time.sleep(0.05)
+        inicio = time.monotonic()
+        biblioteca.agregar_ejemplares("ISBN1", 1)
+        bloqueado = time.monotonic() - inicio
+        escritor.join()
+        
+        assert 0.1 < bloqueado < 2
+        assert biblioteca.obtener_libro("ISBN1").ejemplares == 3
+        with pytest.raises(EventosPerdidosError):
+            lenta.leer(espera=0)
+        flujo.cerrar()
+    
+    def test_datos_de_solo_lectura(self, biblioteca, flujo):
+        recibidos = []
+        biblioteca.agregar_observador(lambda tipo, datos: recibidos.append(datos))
+        suscripcion = flujo.suscribir()
+        otra = flujo.suscribir()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.crear_prestamo("ISBN1", "U001")
+        
+        eventos = suscripcion.leer(espera=0)
+        with pytest.raises(TypeError):
+            eventos[0].datos['titulo'] = "Otro"
+        recibidos[0]['titulo'] = "Otro"
+        
+        assert eventos[0].datos['titulo'] == "Clean Code"
+        assert otra.leer(espera=0)[0].datos['titulo'] == "Clean Code"
+        # La lista de préstamos del usuario no es la suya en vivo
+        assert eventos[1].datos['libros_prestados'] == ()
+    
+    def test_lectura_bloqueante_despierta_al_publicar(self, biblioteca, flujo):
+        suscripcion = flujo.suscribir()
+        temporizador = threading.Timer(0.05, biblioteca.agregar_libro, [Libro("ISBN1", "Clean Code", "Robert Martin")])
+        temporizador.start()
+        
+        eventos = suscripcion.leer(espera=5)
+        
+        assert [e.tipo for e in eventos] == ['libro_agregado']
+        temporizador.join()
+    
+    def test_cerrar_deja_de_publicar(self, biblioteca, flujo):
+        suscripcion = flujo.suscribir()
+        suscripcion.cerrar()
+        assert suscripcion.leer() == []
+        
+        flujo.cerrar()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        assert flujo.secuencia == 0
+        with pytest.raises(RuntimeError):
+            flujo.suscribir()
+    
+    def test_replica_sincronizada(self, biblioteca):
+        flujo = FlujoCambios(biblioteca)
+        suscripcion = flujo.suscribir()
+        replica = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Refactoring", "Martin Fowler"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        biblioteca.crear_prestamo("ISBN2", "U001")
+        biblioteca.devolver_prestamo(prestamo.id)
+        
+        for evento in suscripcion.leer(espera=0):
+            replica._aplicar_evento(evento.tipo, evento.datos)
+        
+        assert replica.total_prestamos_activos() == 1
+        assert replica.obtener_libro("ISBN1").disponible == True
+        assert replica.obtener_libro("ISBN2").disponible == False
+        assert replica.obtener_prestamo(prestamo.id).fecha_devolucion == biblioteca.obtener_prestamo(prestamo.id).fecha_devolucion
+        flujo.cerrar()
+    
+    def test_lote_se_publica_desglosado(self, biblioteca, flujo):
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Refactoring", "Martin Fowler"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        suscripcion = flujo.suscribir()
+        
+        biblioteca.crear_prestamos_lote([("ISBN1", "U001"), ("ISBN2", "U001")])
+        
+        eventos = suscripcion.leer(espera=0)
+        assert [(e.secuencia, e.tipo) for e in eventos] == [(4, 'prestamo_creado'), (5, 'prestamo_creado')]
\ No newline at end of file
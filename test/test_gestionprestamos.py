@@ -118,4 +118,84 @@ class TestGestionPrestamos:
         vencidos = biblioteca_configurada.listar_prestamos_vencidos()
         
         assert len(vencidos) == 1
-        assert vencidos[0].esta_vencido() == True
\ No newline at end of file
+        assert vencidos[0].esta_vencido() == True
+    
+    def test_indices_prestamos_tras_devolucion(self, biblioteca_configurada):
+        prestamo1 = biblioteca_configurada.crear_prestamo("ISBN1", "U001")
+        prestamo2 = biblioteca_configurada.crear_prestamo("ISBN2", "U001")
+        
+        biblioteca_configurada.devolver_prestamo(prestamo1.id)
+        
+        assert biblioteca_configurada.total_prestamos_activos() == 1
+        assert biblioteca_configurada.listar_prestamos_usuario("U001") == [prestamo2]
+        assert biblioteca_configurada.listar_prestamos_usuario("U002") == []
+        
+        biblioteca_configurada.devolver_prestamo(prestamo2.id)
+        
+        assert biblioteca_configurada.total_prestamos_activos() == 0
+        assert biblioteca_configurada.listar_prestamos_usuario("U001") == []
+        assert biblioteca_configurada.obtener_prestamo(prestamo1.id) == prestamo1
+    
+    def test_listar_prestamos_vencidos_con_fecha_actual(self, biblioteca_configurada):
+        from datetime import datetime, timedelta
+        
+        prestamo1 = biblioteca_configurada.crear_prestamo("ISBN1", "U001")
+        prestamo2 = biblioteca_configurada.crear_prestamo("ISBN2", "U002")
+        
+        assert biblioteca_configurada.listar_prestamos_vencidos() == []
+        
+        fecha_futura = datetime.now() + timedelta(days=15)
+        assert biblioteca_configurada.listar_prestamos_vencidos(fecha_futura) == [prestamo1, prestamo2]
+        
+        biblioteca_configurada.devolver_prestamo(prestamo1.id)
+        
+        assert biblioteca_configurada.listar_prestamos_vencidos(fecha_futura) == [prestamo2]
+    
+    def test_prestamos_de_varios_ejemplares(self, biblioteca_configurada):
+        biblioteca_configurada.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler", ejemplares=2))
+        biblioteca_configurada.registrar_usuario(Usuario("U003", "Ana López"))
+        
+        prestamo1 = biblioteca_configurada.crear_prestamo("ISBN3", "U001")
+        biblioteca_configurada.crear_prestamo("ISBN3", "U002")
+        
+        libro = biblioteca_configurada.obtener_libro("ISBN3")
+        assert libro.ejemplares_disponibles == 0
+        assert [l.isbn for l in biblioteca_configurada.buscar_libros(disponible=False)] == ["ISBN3"]
+        with pytest.raises(LibroNoDisponibleError):
+            biblioteca_configurada.crear_prestamo("ISBN3", "U003")
+        assert biblioteca_configurada.eliminar_libro("ISBN3") == False
+        
+        biblioteca_configurada.devolver_prestamo(prestamo1.id)
+        
+        assert libro.ejemplares_disponibles == 1
+        assert biblioteca_configurada.crear_prestamo("ISBN3", "U003").libro_isbn == "ISBN3"
+    
+    def test_usuario_no_repite_titulo(self, biblioteca_configurada):
+        biblioteca_configurada.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler", ejemplares=2))
+        biblioteca_configurada.crear_prestamo("ISBN3", "U001")
+        
+        with pytest.raises(ValueError, match="ya tiene un ejemplar"):
+            biblioteca_configurada.crear_prestamo("ISBN3", "U001")
+        assert biblioteca_configurada.obtener_libro("ISBN3").ejemplares_disponibles == 1
+    
+    def test_agregar_ejemplares(self, biblioteca_configurada):
+        biblioteca_configurada.crear_prestamo("ISBN1", "U001")
+        
+        assert biblioteca_configurada.agregar_ejemplares("ISBN1", 2) == True
+        assert biblioteca_configurada.agregar_ejemplares("ISBN-FALSO", 2) == False
+        assert biblioteca_configurada.obtener_libro("ISBN1").ejemplares_disponibles == 2
+        assert [l.isbn for l in biblioteca_configurada.buscar_libros(disponible=True)] == ["ISBN1", "ISBN2"]
+    
+    def test_evaluar_vencimientos(self, biblioteca_configurada):
+        from datetime import datetime, timedelta
+        
+        prestamo1 = biblioteca_configurada.crear_prestamo("ISBN1", "U001")
+        prestamo2 = biblioteca_configurada.crear_prestamo("ISBN2", "U002")
+        biblioteca_configurada.devolver_prestamo(prestamo1.id)
+        
+        fecha_futura = datetime.now() + timedelta(days=20)
+        evaluacion = biblioteca_configurada.evaluar_vencimientos(fecha_futura)
+        
+        assert evaluacion.ids == [prestamo2.id]
+        assert list(evaluacion.dias_vencido) == [prestamo2.dias_vencido(fecha_futura)]
+        assert evaluacion.total_multas == prestamo2.multa(fecha_futura) > 0
\ No newline at end of file
@@ -0,0 +1,81 @@
+import json
+import pytest
+from src.almacen_sqlite import BibliotecaSQLite
+from src.biblioteca import Biblioteca
+from src.importacion import importar_libros, importar_usuarios
+from src.libro import Libro
+
+class TestImportacion:
+    
+    @pytest.fixture
+    def csv_libros(self, tmp_path):
+        ruta = tmp_path / "libros.csv"
+        ruta.write_text(
+            "isbn,titulo,autor,disponible\n"
+            "ISBN1,Clean Code,Robert Martin,\n"
+            "ISBN2,Design Patterns,Gang of Four,false\n"
+            ",Sin ISBN,Autor,\n"
+            "ISBN1,Duplicado,Autor,\n"
+            "ISBN3,Refactoring,Martin Fowler,quizas\n"
+            "ISBN4,Refactoring,Martin Fowler,1\n"
+            "ISBN0,Existente,Autor,\n",
+            encoding="utf-8")
+        return str(ruta)
+    
+    @pytest.fixture
+    def jsonl_usuarios(self, tmp_path):
+        ruta = tmp_path / "usuarios.jsonl"
+        lineas = [
+            json.dumps({"id": "U001", "nombre": "Juan Pérez"}, ensure_ascii=False),
+            "{no es json",
+            "",
+            json.dumps({"id": "U002"}),
+            json.dumps(["U003", "Lista"]),
+            json.dumps({"id": "U001", "nombre": "Repetido"}),
+            json.dumps({"id": "U004", "nombre": "Ana López"}, ensure_ascii=False),
+        ]
+        ruta.write_text("\n".join(lineas) + "\n", encoding="utf-8")
+        return str(ruta)
+    
+    @pytest.mark.parametrize("fabrica", [Biblioteca, BibliotecaSQLite])
+    @pytest.mark.parametrize("tamano_lote", [1, 2, 100])
+    def test_importar_libros_csv(self, csv_libros, fabrica, tamano_lote):
+        biblioteca = fabrica()
+        biblioteca.agregar_libro(Libro("ISBN0", "Existente", "Autor"))
+        
+        resultado = importar_libros(biblioteca, csv_libros, tamano_lote=tamano_lote)
+        
+        assert resultado.importados == 3
+        assert resultado.rechazados == 4
+        assert resultado.total == 7
+        errores = {e.linea: e.mensaje for e in resultado.errores}
+        assert sorted(errores) == [4, 5, 6, 8]
+        assert "ISBN debe ser una cadena no vacía" in errores[4]
+        assert errores[5] == "ISBN duplicado: ISBN1"
+        assert "quizas" in errores[6]
+        assert errores[8] == "ISBN duplicado: ISBN0"
+        assert biblioteca.total_libros() == 4
+        assert biblioteca.obtener_libro("ISBN2").disponible == False
+        assert [l.isbn for l in biblioteca.buscar_libros(titulo="refactor")] == ["ISBN4"]
+    
+    def test_importar_usuarios_jsonl(self, jsonl_usuarios):
+        biblioteca = Biblioteca()
+        
+        resultado = importar_usuarios(biblioteca, jsonl_usuarios, tamano_lote=2)
+        
+        assert resultado.importados == 2
+        assert sorted(e.linea for e in resultado.errores) == [2, 4, 5, 6]
+        assert biblioteca.obtener_usuario("U004").nombre == "Ana López"
+    
+    def test_limite_de_errores_conservados(self, jsonl_usuarios):
+        resultado = importar_usuarios(Biblioteca(), jsonl_usuarios, max_errores=1)
+        
+        assert resultado.rechazados == 4
+        assert len(resultado.errores) == 1
+    
+    def test_formato_desconocido(self, tmp_path):
+        ruta = tmp_path / "libros.txt"
+        ruta.write_text("", encoding="utf-8")
+        
+        with pytest.raises(ValueError, match="formato"):
+            importar_libros(Biblioteca(), str(ruta))
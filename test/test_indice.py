@@ -0,0 +1,61 @@
+import pytest
+from src.indice import IndiceTexto
+from src.normalizacion import normalizar
+
+class TestIndiceTexto:
+    
+    @pytest.fixture
+    def indice(self):
+        indice = IndiceTexto()
+        indice.agregar("ISBN1", "Clean Code")
+        indice.agregar("ISBN2", "Clean Architecture")
+        indice.agregar("ISBN3", "Design Patterns")
+        return indice
+    
+    @pytest.mark.parametrize("consulta,esperados", [
+        ("clean", {"ISBN1", "ISBN2"}),
+        ("CODE", {"ISBN1"}),
+        ("n c", {"ISBN1"}),
+        ("a", {"ISBN1", "ISBN2", "ISBN3"}),
+        ("ean arch", {"ISBN2"}),
+        ("patternsx", set()),
+        ("xyz", set()),
+    ])
+    def test_buscar_subcadena(self, indice, consulta, esperados):
+        assert indice.buscar(consulta) == esperados
+    
+    def test_buscar_vacio_sin_restriccion(self, indice):
+        assert indice.buscar("") is None
+    
+    def test_buscar_descarta_falsos_positivos(self):
+        indice = IndiceTexto()
+        indice.agregar("ISBN1", "abcd bcde")
+        
+        assert indice.buscar("abcde") == set()
+        assert indice.buscar("bcde") == {"ISBN1"}
+    
+    def test_eliminar(self, indice):
+        assert indice.eliminar("ISBN1") == True
+        assert indice.eliminar("ISBN1") == False
+        
+        assert indice.buscar("code") == set()
+        assert indice.buscar("clean") == {"ISBN2"}
+        assert len(indice) == 2
+    
+    @pytest.mark.parametrize("texto,esperado", [
+        ("Pérez", "perez"),
+        ("CIEN AÑOS", "cien anos"),
+        ("Straße", "strasse"),
+        ("ﬁcción", "ficcion"),
+        ("clean code", "clean code"),
+    ])
+    def test_normalizar(self, texto, esperado):
+        assert normalizar(texto) == esperado
+    
+    def test_buscar_sin_tildes(self):
+        indice = IndiceTexto()
+        indice.agregar("ISBN1", "Gabriel García Márquez")
+        
+        assert indice.buscar("garcia marquez") == {"ISBN1"}
+        assert indice.buscar("MÁRQ") == {"ISBN1"}
+        assert indice.buscar("ía") == {"ISBN1"}
\ No newline at end of file
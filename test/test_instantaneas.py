@@ -0,0 +1,134 @@
+import pytest
+import random
+import threading
+from datetime import datetime, timedelta
+from src.biblioteca import Biblioteca, LibroNoDisponibleError
+from src.libro import Libro
+from src.usuario import Usuario
+
+class TestInstantaneas:
+
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Clean Architecture", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler", ejemplares=2))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.registrar_usuario(Usuario("U002", "María García"))
+        return biblioteca
+
+    def test_vista_no_ve_escrituras_posteriores(self, biblioteca):
+        antiguo = biblioteca.crear_prestamo("ISBN1", "U001")
+
+        with biblioteca.instantanea() as vista:
+            nuevo = biblioteca.crear_prestamo("ISBN2", "U001")
+            biblioteca.devolver_prestamo(antiguo.id)
+            biblioteca.agregar_ejemplares("ISBN3", 1)
+            biblioteca.agregar_libro(Libro("ISBN4", "Clean Agile", "Robert Martin"))
+            biblioteca.eliminar_libro("ISBN3")
+            biblioteca.registrar_usuario(Usuario("U003", "Ana López"))
+            biblioteca.eliminar_usuario("U002")
+
+            assert [p.id for p in vista.listar_prestamos_activos()] == [antiguo.id]
+            assert vista.obtener_prestamo(antiguo.id).esta_activo() == True
+            assert vista.obtener_prestamo(nuevo.id) is None
+            assert vista.obtener_libro("ISBN1").disponible == False
+            assert vista.obtener_libro("ISBN2").disponible == True
+            assert vista.obtener_libro("ISBN3").ejemplares == 2
+            assert vista.obtener_libro("ISBN4") is None
+            assert vista.obtener_usuario("U001").libros_prestados == ["ISBN1"]
+            assert vista.obtener_usuario("U002").nombre == "María García"
+            assert vista.obtener_usuario("U003") is None
+            assert [p.id for p in vista.listar_prestamos_usuario("U001")] == [antiguo.id]
+            assert (vista.total_libros(), vista.total_usuarios(), vista.total_prestamos_activos()) == (3, 2, 1)
+
+        assert biblioteca.obtener_libro("ISBN1").disponible == True
+        assert [p.id for p in biblioteca.listar_prestamos_activos()] == [nuevo.id]
+
+    @pytest.mark.parametrize("criterios,esperados", [
+        ({}, ["ISBN1", "ISBN2", "ISBN3"]),
+        ({"titulo": "clean"}, ["ISBN1", "ISBN2"]),
+        ({"autor": "martin", "disponible": True}, ["ISBN2", "ISBN3"]),
+        ({"disponible": False}, ["ISBN1"]),
+    ])
+    def test_buscar_en_la_vista(self, biblioteca, criterios, esperados):
+        biblioteca.crear_prestamo("ISBN1", "U001")
+        vista = biblioteca.instantanea()
+        biblioteca.eliminar_libro("ISBN2")
+        biblioteca.agregar_libro(Libro("ISBN2", "Otro título", "Otro autor"))
+        biblioteca.agregar_libro(Libro("ISBN5", "Clean Agile", "Robert Martin"))
+        biblioteca.crear_prestamo("ISBN3", "U002")
+        biblioteca.devolver_prestamo(biblioteca.listar_prestamos_usuario("U001")[0].id)
+
+        assert [l.isbn for l in vista.buscar_libros(**criterios)] == esperados
+        vista.cerrar()
+
+    def test_vencidos_en_la_vista(self, biblioteca):
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        futuro = datetime.now() + timedelta(days=30)
+
+        with biblioteca.instantanea() as vista:
+            biblioteca.devolver_prestamo(prestamo.id)
+            assert [p.id for p in vista.listar_prestamos_vencidos(futuro)] == [prestamo.id]
+            assert vista.listar_prestamos_vencidos() == []
+
+    def test_registro_vacio_sin_instantaneas(self, biblioteca):
+        registro = biblioteca._versiones
+        biblioteca.crear_prestamo("ISBN1", "U001")
+        assert len(registro) == 0
+
+        primera = biblioteca.instantanea()
+        biblioteca.crear_prestamo("ISBN2", "U001")
+        segunda = biblioteca.instantanea()
+        biblioteca.crear_prestamo("ISBN3", "U001")
+
+        assert primera.obtener_usuario("U001").libros_prestados == ["ISBN1"]
+        assert segunda.obtener_usuario("U001").libros_prestados == ["ISBN1", "ISBN2"]
+        primera.cerrar()
+        assert segunda.obtener_usuario("U001").libros_prestados == ["ISBN1", "ISBN2"]
+        segunda.cerrar()
+        assert len(registro) == 0
+        assert registro.abiertas == 0
+
+        with pytest.raises(RuntimeError):
+            segunda.obtener_libro("ISBN1")
+
+    def test_lectura_consistente_con_escrituras_concurrentes(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libros_lote(Libro(f"ISBN{i}", f"Libro {i}", "Autor") for i in range(50))
+        biblioteca.registrar_usuarios_lote(Usuario(f"U{i}", f"Usuario {i}") for i in range(20))
+        parar = threading.Event()
+
+        def escribir(semilla):
+            aleatorio = random.Random(semilla)
+            while not parar.is_set():
+                usuario_id = f"U{aleatorio.randrange(20)}"
+                prestamos = biblioteca.listar_prestamos_usuario(usuario_id)
+                if prestamos and aleatorio.random() < 0.5:
+                    biblioteca.devolver_prestamo(prestamos[0].id)
+                    continue
+                try:
+                    biblioteca.crear_prestamo(f"ISBN{aleatorio.randrange(50)}", usuario_id)
+                except (LibroNoDisponibleError, ValueError):
+                    pass
+
+        escritores = [threading.Thread(target=escribir, args=(i,)) for i in range(3)]
+        for escritor in escritores:
+            escritor.start()
+        try:
+            for _ in range(30):
+                with biblioteca.instantanea() as vista:
+                    activos = vista.listar_prestamos_activos()
+                    prestados = {l.isbn for l in vista.buscar_libros(disponible=False)}
+                    assert {p.libro_isbn for p in activos} == prestados
+                    for i in range(20):
+                        usuario = vista.obtener_usuario(f"U{i}")
+                        assert sorted(usuario.libros_prestados) == sorted(
+                            p.libro_isbn for p in activos if p.usuario_id == f"U{i}")
+                    assert vista.total_prestamos_activos() == len(activos)
+        finally:
+            parar.set()
+            for escritor in escritores:
+                escritor.join()
+        assert len(biblioteca._versiones) == 0
@@ -85,4 +85,45 @@ class TestLibro:
         libro1 = Libro("978-0132350884", "Clean Code", "Robert C. Martin")
         libro2 = Libro("978-0201616224", "The Pragmatic Programmer", "Andrew Hunt")
         
-        assert libro1 != libro2
\ No newline at end of file
+        assert libro1 != libro2
+    
+    def test_sin_dict_por_instancia(self):
+        libro = Libro("978-0132350884", "Clean Code", "Robert C. Martin")
+        
+        assert not hasattr(libro, "__dict__")
+        with pytest.raises(AttributeError):
+            libro.atributo_nuevo = True
+    
+    def test_varios_ejemplares(self):
+        libro = Libro("978-0132350884", "Clean Code", "Robert C. Martin", ejemplares=3)
+        
+        assert libro.prestar() == True
+        assert libro.prestar() == True
+        assert libro.disponible == True
+        assert libro.ejemplares_disponibles == 1
+        assert libro.ejemplares_prestados == 2
+        assert libro.prestar() == True
+        assert libro.prestar() == False
+        assert libro.disponible == False
+        assert "0/3 ejemplares disponibles" in str(libro)
+        
+        libro.agregar_ejemplares(2)
+        
+        assert libro.ejemplares == 5
+        assert libro.ejemplares_disponibles == 2
+        assert libro.devolver() == True
+        assert libro.ejemplares_disponibles == 3
+    
+    @pytest.mark.parametrize("ejemplares,disponibles", [(0, None), (-1, None), (2, 3), (2, -1)])
+    def test_ejemplares_invalidos(self, ejemplares, disponibles):
+        with pytest.raises(ValueError):
+            Libro("978-0132350884", "Clean Code", "Robert C. Martin",
+                  ejemplares=ejemplares, disponibles=disponibles)
+    
+    def test_claves_de_busqueda_precalculadas(self):
+        libro = Libro("ISBN1", "Cien Años de Soledad", "Gabriel García Márquez")
+        normalizado = Libro("ISBN2", "clean code", "robert martin")
+        
+        assert libro.titulo_busqueda == "cien anos de soledad"
+        assert libro.autor_busqueda == "gabriel garcia marquez"
+        assert normalizado.titulo_busqueda is normalizado.titulo
\ No newline at end of file
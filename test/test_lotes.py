@@ -0,0 +1,132 @@
+import pytest
+import uuid
+from src.biblioteca import Biblioteca, LibroNoDisponibleError, LibroNoExisteError, UsuarioNoExisteError
+from src.libro import Libro
+from src.persistencia import AlmacenPersistente
+from src.usuario import Usuario
+
+class TestLotesPrestamos:
+
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Design Patterns", "Gang of Four"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler", ejemplares=2))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.registrar_usuario(Usuario("U002", "María García"))
+        return biblioteca
+
+    def test_cesta_completa(self, biblioteca):
+        resultado = biblioteca.crear_prestamos_lote([("ISBN1", "U001"), ("ISBN3", "U001"), ("ISBN3", "U002")])
+
+        assert resultado.aplicado == True
+        assert resultado.errores == [None, None, None]
+        assert [(p.libro_isbn, p.usuario_id) for p in resultado.elementos] == \
+            [("ISBN1", "U001"), ("ISBN3", "U001"), ("ISBN3", "U002")]
+        assert len({p.id for p in resultado.elementos}) == 3
+        assert all(uuid.UUID(p.id).version == 4 for p in resultado.elementos)
+        assert biblioteca.obtener_libro("ISBN3").ejemplares_disponibles == 0
+        assert biblioteca.obtener_usuario("U001").libros_prestados == ["ISBN1", "ISBN3"]
+
+    @pytest.mark.parametrize("cesta,fallos", [
+        ([("ISBN1", "U001"), ("ISBN-FALSO", "U001")], [None, LibroNoExisteError]),
+        ([("ISBN1", "U001"), ("ISBN1", "U002")], [None, LibroNoDisponibleError]),
+        ([("ISBN3", "U001"), ("ISBN3", "U001")], [None, ValueError]),
+        ([("ISBN2", "U-FALSO"), ("ISBN1", "U002")], [UsuarioNoExisteError, None]),
+    ])
+    def test_un_fallo_no_aplica_nada(self, biblioteca, cesta, fallos):
+        resultado = biblioteca.crear_prestamos_lote(cesta)
+
+        assert resultado.aplicado == False
+        assert resultado.elementos == [None] * len(cesta)
+        assert [type(e) if e is not None else None for e in resultado.errores] == fallos
+        assert biblioteca.total_prestamos_activos() == 0
+        assert biblioteca.obtener_libro("ISBN1").disponible == True
+        assert biblioteca.obtener_usuario("U001").libros_prestados == []
+
+    def test_limite_contando_la_cesta(self, biblioteca):
+        for i in range(Usuario.MAX_LIBROS):
+            biblioteca.agregar_libro(Libro(f"EXTRA{i}", f"Extra {i}", "Autor"))
+        biblioteca.crear_prestamo("ISBN1", "U001")
+
+        resultado = biblioteca.crear_prestamos_lote([(f"EXTRA{i}", "U001") for i in range(Usuario.MAX_LIBROS)])
+
+        assert resultado.errores[:-1] == [None] * (Usuario.MAX_LIBROS - 1)
+        assert isinstance(resultado.errores[-1], ValueError)
+        assert biblioteca.obtener_usuario("U001").cantidad_prestamos() == 1
+
+    def test_devolucion_en_lote(self, biblioteca):
+        prestamos = biblioteca.crear_prestamos_lote([("ISBN1", "U001"), ("ISBN2", "U002")]).elementos
+
+        fallido = biblioteca.devolver_prestamos_lote([prestamos[0].id, prestamos[0].id])
+        assert fallido.aplicado == False
+        assert fallido.errores[0] is None and isinstance(fallido.errores[1], ValueError)
+        assert biblioteca.total_prestamos_activos() == 2
+
+        resultado = biblioteca.devolver_prestamos_lote([p.id for p in prestamos])
+        assert resultado.aplicado == True
+        assert [p.esta_activo() for p in resultado.elementos] == [False, False]
+        assert resultado.elementos[0].fecha_devolucion == resultado.elementos[1].fecha_devolucion
+        assert biblioteca.total_prestamos_activos() == 0
+        assert biblioteca.obtener_libro("ISBN1").disponible == True
+        assert biblioteca.devolver_prestamos_lote(["P-FALSO"]).aplicado == False
+
+    def test_devolucion_en_lote_atiende_reservas(self, biblioteca):
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        biblioteca.reservar("ISBN1", "U002")
+
+        biblioteca.devolver_prestamos_lote([prestamo.id])
+
+        assert [p.libro_isbn for p in biblioteca.listar_prestamos_usuario("U002")] == ["ISBN1"]
+
+    def test_lote_vacio(self, biblioteca):
+        assert biblioteca.crear_prestamos_lote([]) == ([], [])
+        assert biblioteca.devolver_prestamos_lote([]).aplicado == True
+
+    def test_lotes_se_reproducen_del_diario(self, tmp_path):
+        directorio = str(tmp_path / "datos")
+        with AlmacenPersistente(directorio) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+            biblioteca.agregar_libro(Libro("ISBN2", "Design Patterns", "Gang of Four"))
+            biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+            prestamos = biblioteca.crear_prestamos_lote([("ISBN1", "U001"), ("ISBN2", "U001")]).elementos
+            biblioteca.devolver_prestamos_lote([prestamos[0].id])
+
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert [p.id for p in biblioteca.listar_prestamos_activos()] == [prestamos[1].id]
+            assert biblioteca.obtener_usuario("U001").libros_prestados == ["ISBN2"]
+
+    def test_lote_es_un_solo_evento(self, biblioteca):
+        eventos = []
+        biblioteca.agregar_observador(lambda tipo, datos: eventos.append((tipo, datos)))
+
+        prestamos = biblioteca.crear_prestamos_lote([("ISBN1", "U001"), ("ISBN3", "U002")]).elementos
+        biblioteca.devolver_prestamos_lote([p.id for p in prestamos])
+
+        assert [tipo for tipo, _ in eventos] == ["lote", "lote"]
+        assert [e["t"] for e in eventos[0][1]["eventos"]] == ["prestamo_creado", "prestamo_creado"]
+        assert [e["d"]["id"] for e in eventos[1][1]["eventos"]] == [p.id for p in prestamos]
+
+    def test_lote_cortado_por_una_caida_no_se_reproduce(self, tmp_path):
+        directorio = str(tmp_path / "datos")
+        almacen = AlmacenPersistente(directorio, registros_por_grupo=1, intervalo_grupo=0)
+        biblioteca = almacen.abrir()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Design Patterns", "Gang of Four"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.crear_prestamos_lote([("ISBN1", "U001"), ("ISBN2", "U001")])
+        ruta = almacen._archivo.name
+        almacen.cerrar()
+
+        # La caída deja escrita solo la mitad de la línea del lote
+        with open(ruta, encoding="utf-8") as archivo:
+            lineas = archivo.readlines()
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.writelines(lineas[:-1])
+            archivo.write(lineas[-1][:len(lineas[-1]) // 2])
+
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.total_prestamos_activos() == 0
+            assert biblioteca.obtener_usuario("U001").libros_prestados == []
+            assert biblioteca.obtener_libro("ISBN1").disponible == True
\ No newline at end of file
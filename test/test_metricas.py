@@ -0,0 +1,108 @@
+import pytest
+from src.biblioteca import Biblioteca, LibroNoDisponibleError, LibroNoExisteError, UsuarioNoExisteError
+from src.libro import Libro
+from src.metricas import Histograma, Metricas, desinstrumentar, instrumentar
+from src.usuario import Usuario
+
+class TestMetricas:
+
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Refactoring", "Martin Fowler"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.registrar_usuario(Usuario("U002", "María García"))
+        return biblioteca
+
+    def test_histograma_cubetas(self):
+        histograma = Histograma([0.001, 0.01])
+
+        for valor in (0.0005, 0.001, 0.005, 0.5):
+            histograma.observar(valor)
+
+        assert histograma.acumulado() == [2, 3, 4]
+        assert histograma.cuenta == 4
+        assert histograma.suma == pytest.approx(0.5065)
+        assert histograma.percentil(0.5) == 0.001
+        assert histograma.percentil(1.0) is None
+
+    def test_cuenta_llamadas_y_errores_por_tipo(self, biblioteca):
+        metricas = instrumentar(biblioteca, Metricas())
+
+        biblioteca.crear_prestamo("ISBN1", "U001")
+        with pytest.raises(LibroNoDisponibleError):
+            biblioteca.crear_prestamo("ISBN1", "U002")
+        with pytest.raises(UsuarioNoExisteError):
+            biblioteca.crear_prestamo("ISBN2", "U999")
+        biblioteca.buscar_libros(titulo="clean")
+
+        assert metricas.llamadas("crear_prestamo") == 3
+        assert metricas.errores("crear_prestamo") == {"LibroNoDisponibleError": 1, "UsuarioNoExisteError": 1}
+        assert metricas.llamadas("buscar_libros") == 1
+        assert metricas.latencia("crear_prestamo").cuenta == 3
+
+    def test_llamadas_internas_no_cuentan(self, biblioteca):
+        metricas = instrumentar(biblioteca, Metricas())
+
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U001")
+        biblioteca.reservar("ISBN1", "U002")
+        biblioteca.devolver_prestamo(prestamo.id)
+
+        assert metricas.llamadas("crear_prestamo") == 1
+        assert metricas.llamadas("devolver_prestamo") == 1
+        assert metricas.llamadas("obtener_libro") == 0
+        assert metricas.llamadas("obtener_usuario") == 0
+
+    def test_generadores_se_miden_hasta_terminar(self, biblioteca, monkeypatch):
+        # Reloj falso: cada lectura avanza un segundo, así la duración cuenta los pasos medidos
+        lecturas = iter(range(1000))
+        monkeypatch.setattr("time.perf_counter", lambda: float(next(lecturas)))
+        metricas = instrumentar(biblioteca, Metricas(limites=[1.0, 10.0]))
+
+        libros = biblioteca.iterar_libros()
+        assert metricas.llamadas("iterar_libros") == 0
+        assert [l.isbn for l in libros] == ["ISBN1", "ISBN2"]
+
+        # Creación más tres pasos: dos libros y el final del recorrido
+        assert metricas.llamadas("iterar_libros") == 1
+        assert metricas.latencia("iterar_libros").suma == 4.0
+
+        libros = biblioteca.iterar_libros()
+        next(libros)
+        libros.close()
+        assert metricas.llamadas("iterar_libros") == 2
+        assert metricas.latencia("iterar_libros").suma == 4.0 + 2.0
+
+    def test_desinstrumentar_restaura_metodos(self, biblioteca):
+        metricas = instrumentar(biblioteca, Metricas())
+        desinstrumentar(biblioteca)
+
+        biblioteca.obtener_libro("ISBN1")
+
+        assert metricas.llamadas("obtener_libro") == 0
+        assert "obtener_libro" not in vars(biblioteca)
+
+    def test_instrumentar_dos_veces_no_duplica(self, biblioteca):
+        metricas = Metricas()
+        instrumentar(biblioteca, metricas)
+        instrumentar(biblioteca, metricas)
+
+        biblioteca.total_libros()
+
+        assert metricas.llamadas("total_libros") == 1
+
+    def test_instantanea_y_prometheus(self, biblioteca):
+        metricas = instrumentar(biblioteca, Metricas())
+        with pytest.raises(LibroNoExisteError):
+            biblioteca.crear_prestamo("ISBN9", "U001")
+
+        instantanea = metricas.instantanea()
+        texto = metricas.a_prometheus()
+
+        assert instantanea["crear_prestamo"]["llamadas"] == 1
+        assert sum(instantanea["crear_prestamo"]["latencia"]["cubetas"]) == 1
+        assert 'biblioteca_operaciones_total{operacion="crear_prestamo"} 1' in texto
+        assert 'biblioteca_errores_total{operacion="crear_prestamo",tipo="LibroNoExisteError"} 1' in texto
+        assert 'biblioteca_duracion_segundos_bucket{operacion="crear_prestamo",le="+Inf"} 1' in texto
+        assert 'biblioteca_duracion_segundos_count{operacion="crear_prestamo"} 1' in texto
\ No newline at end of file
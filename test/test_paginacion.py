@@ -0,0 +1,152 @@
+import pytest
+from datetime import datetime, timedelta
+from src.almacen_sqlite import BibliotecaSQLite
+from src.biblioteca import Biblioteca
+from src.libro import Libro
+from src.paginacion import Pagina, SecuenciaOrdenada, paginar
+from src.prestamo import Prestamo
+from src.serializacion import prestamo_a_dict
+from src.usuario import Usuario
+
+def recorrer_paginas(pedir, limite):
+    vistos = []
+    cursor = None
+    while True:
+        pagina = pedir(limite=limite, cursor=cursor)
+        assert len(pagina.elementos) <= limite
+        vistos.extend(pagina.elementos)
+        if pagina.cursor is None:
+            return vistos
+        cursor = pagina.cursor
+
+class TestSecuenciaOrdenada:
+
+    def test_desde_cursor_omite_eliminadas(self):
+        secuencia = SecuenciaOrdenada()
+        posiciones = {clave: secuencia.agregar(clave) for clave in "abcde"}
+        secuencia.eliminar("b")
+        secuencia.eliminar("d")
+
+        assert [c for _, c in secuencia.desde()] == ["a", "c", "e"]
+        assert [c for _, c in secuencia.desde(posiciones["b"])] == ["c", "e"]
+        assert len(secuencia) == 3
+
+    def test_readmitir_clave_la_mueve_al_final(self):
+        secuencia = SecuenciaOrdenada()
+        for clave in "abc":
+            secuencia.agregar(clave)
+        secuencia.eliminar("a")
+        secuencia.agregar("a")
+
+        assert [c for _, c in secuencia.desde()] == ["b", "c", "a"]
+
+    def test_compactacion_conserva_orden(self):
+        secuencia = SecuenciaOrdenada()
+        for i in range(500):
+            secuencia.agregar(f"k{i}")
+        for i in range(0, 500, 3):
+            secuencia.eliminar(f"k{i}")
+        for i in range(1, 500, 3):
+            secuencia.eliminar(f"k{i}")
+
+        claves = [c for _, c in secuencia.desde()]
+        assert claves == [f"k{i}" for i in range(2, 500, 3)]
+        assert len(secuencia._entradas[0]) < 500
+
+    def test_recorrido_ve_claves_agregadas_a_medias(self):
+        secuencia = SecuenciaOrdenada()
+        for clave in "ab":
+            secuencia.agregar(clave)
+        vistas = []
+        for _, clave in secuencia.desde():
+            vistas.append(clave)
+            if clave == "b":
+                secuencia.agregar("c")
+
+        assert vistas == ["a", "b", "c"]
+
+    def test_paginar_valida_limite(self):
+        with pytest.raises(ValueError):
+            paginar([], 0)
+        assert paginar([(1, "a"), (2, "b")], 2) == Pagina(["a", "b"], None)
+        assert paginar([(1, "a"), (2, "b"), (3, "c")], 2) == Pagina(["a", "b"], 2)
+
+class TestPaginacionBiblioteca:
+
+    @pytest.fixture(params=["memoria", "sqlite"])
+    def biblioteca(self, request):
+        biblioteca = Biblioteca() if request.param == "memoria" else BibliotecaSQLite()
+        for i in range(30):
+            titulo = f"Clean Code {i}" if i % 2 == 0 else f"Design Patterns {i}"
+            biblioteca.agregar_libro(Libro(f"ISBN{i:02d}", titulo, "Robert Martin" if i % 3 else "Martin Fowler"))
+        for i in range(10):
+            biblioteca.registrar_usuario(Usuario(f"U{i:03d}", f"Usuario {i}"))
+        yield biblioteca
+        if request.param == "sqlite":
+            biblioteca.cerrar()
+
+    @pytest.mark.parametrize("criterios", [
+        {},
+        {"titulo": "clean"},
+        {"autor": "fowler"},
+        {"titulo": "co", "autor": "martin"},
+        {"disponible": False},
+        {"disponible": True},
+        {"titulo": "design", "disponible": True},
+    ])
+    def test_paginas_equivalen_a_buscar(self, biblioteca, criterios):
+        biblioteca.crear_prestamo("ISBN04", "U001")
+        biblioteca.crear_prestamo("ISBN07", "U002")
+        esperado = [l.isbn for l in biblioteca.buscar_libros(**criterios)]
+
+        paginado = recorrer_paginas(lambda **k: biblioteca.paginar_libros(**k, **criterios), 4)
+
+        assert [l.isbn for l in paginado] == esperado
+        assert [l.isbn for l in biblioteca.iterar_libros(**criterios)] == esperado
+
+    def test_iterar_se_detiene_pronto(self, biblioteca):
+        iterador = biblioteca.iterar_libros()
+
+        assert next(iterador).isbn == "ISBN00"
+        assert next(iterador).isbn == "ISBN01"
+
+    def test_cursor_estable_ante_eliminaciones(self, biblioteca):
+        pagina = biblioteca.paginar_libros(limite=5)
+        biblioteca.eliminar_libro("ISBN02")
+        biblioteca.eliminar_libro("ISBN06")
+
+        siguiente = biblioteca.paginar_libros(limite=5, cursor=pagina.cursor)
+
+        assert [l.isbn for l in pagina.elementos] == ["ISBN00", "ISBN01", "ISBN02", "ISBN03", "ISBN04"]
+        assert [l.isbn for l in siguiente.elementos] == ["ISBN05", "ISBN07", "ISBN08", "ISBN09", "ISBN10"]
+
+    def test_paginar_prestamos(self, biblioteca):
+        prestamos = [biblioteca.crear_prestamo(f"ISBN{i:02d}", f"U{i % 5:03d}") for i in range(12)]
+        biblioteca.devolver_prestamo(prestamos[3].id)
+
+        activos = recorrer_paginas(biblioteca.paginar_prestamos_activos, 5)
+        del_usuario = recorrer_paginas(lambda **k: biblioteca.paginar_prestamos_usuario("U001", **k), 1)
+        futuro = datetime.now() + timedelta(days=15)
+        vencidos = recorrer_paginas(lambda **k: biblioteca.paginar_prestamos_vencidos(fecha_actual=futuro, **k), 4)
+
+        assert [p.id for p in activos] == [p.id for p in biblioteca.listar_prestamos_activos()]
+        assert len(activos) == 11
+        assert [p.id for p in del_usuario] == [p.id for p in biblioteca.listar_prestamos_usuario("U001")]
+        assert [p.id for p in vencidos] == [p.id for p in biblioteca.listar_prestamos_vencidos(futuro)]
+        assert list(biblioteca.iterar_prestamos_vencidos(datetime.now())) == []
+
+    def test_vencidos_sin_recorrer_los_activos(self, monkeypatch):
+        biblioteca = Biblioteca()
+        for i in range(6):
+            biblioteca.agregar_libro(Libro(f"ISBN{i}", f"Libro {i}", "Autor"))
+            biblioteca.registrar_usuario(Usuario(f"U{i}", f"Usuario {i}"))
+        recientes = [biblioteca.crear_prestamo(f"ISBN{i}", f"U{i}") for i in range(5)]
+        # Restaurado del diario después de los demás pero con una fecha anterior
+        antiguo = Prestamo("P-ANTIGUO", "ISBN5", "U5", fecha_prestamo=datetime.now() - timedelta(days=20))
+        biblioteca._aplicar_evento('prestamo_creado', prestamo_a_dict(antiguo))
+        monkeypatch.setattr(biblioteca._secuencia_activos, "desde", None)
+
+        assert [p.id for p in biblioteca.paginar_prestamos_vencidos().elementos] == ["P-ANTIGUO"]
+        futuro = datetime.now() + timedelta(days=15)
+        vencidos = recorrer_paginas(lambda **k: biblioteca.paginar_prestamos_vencidos(fecha_actual=futuro, **k), 2)
+        assert [p.id for p in vencidos] == [p.id for p in recientes] + ["P-ANTIGUO"]
\ No newline at end of file
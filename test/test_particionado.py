@@ -0,0 +1,142 @@
+import pytest
+import threading
+from datetime import datetime, timedelta
+from src.biblioteca import Biblioteca, LibroNoDisponibleError, LibroNoExisteError, UsuarioNoExisteError
+from src.libro import Libro
+from src.particionado import BibliotecaParticionada, particion_de
+from src.usuario import Usuario
+
+def buscar_clave(prefijo, particion, particiones=3):
+    return next(f"{prefijo}{i}" for i in range(1000) if particion_de(f"{prefijo}{i}", particiones) == particion)
+
+class TestBibliotecaParticionada:
+
+    @pytest.fixture
+    def biblioteca(self):
+        with BibliotecaParticionada(particiones=3) as biblioteca:
+            biblioteca.agregar_libros_lote(Libro(f"ISBN{i}", f"Libro {i}", f"Autor {i % 3}") for i in range(12))
+            biblioteca.registrar_usuarios_lote(Usuario(f"U{i}", f"Usuario {i}") for i in range(6))
+            yield biblioteca
+
+    def test_reparto_estable(self):
+        assert particion_de("ISBN1", 4) == particion_de("ISBN1", 4)
+        assert {particion_de(f"ISBN{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+    def test_lotes_y_consultas_combinadas(self, biblioteca):
+        assert biblioteca.agregar_libros_lote([Libro("ISBN1", "Otro", "Otro"), Libro("ISBN99", "Nuevo", "Otro")]) \
+            == [False, True]
+        assert biblioteca.total_libros() == 13
+        assert biblioteca.total_usuarios() == 6
+        assert biblioteca.obtener_libro("ISBN3").titulo == "Libro 3"
+        assert [l.isbn for l in biblioteca.buscar_libros(autor="autor 1")] == ["ISBN1", "ISBN10", "ISBN4", "ISBN7"]
+        assert biblioteca.autocompletar("libro 1", limite=3) == ["Libro 1", "Libro 10", "Libro 11"]
+
+    def test_prestamo_entre_particiones(self, biblioteca):
+        isbn = buscar_clave("ISBN-A", 0)
+        usuario_id = buscar_clave("U-A", 1)
+        biblioteca.agregar_libro(Libro(isbn, "Clean Code", "Robert Martin"))
+        biblioteca.registrar_usuario(Usuario(usuario_id, "Juan Pérez"))
+
+        prestamo = biblioteca.crear_prestamo(isbn, usuario_id)
+
+        assert prestamo.id.startswith("0-")
+        assert biblioteca.obtener_libro(isbn).disponible == False
+        assert biblioteca.obtener_usuario(usuario_id).libros_prestados == [isbn]
+        assert [p.id for p in biblioteca.listar_prestamos_usuario(usuario_id)] == [prestamo.id]
+        assert biblioteca.eliminar_usuario(usuario_id) == False
+        assert biblioteca.eliminar_libro(isbn) == False
+
+        assert biblioteca.devolver_prestamo(prestamo.id) == True
+        assert biblioteca.devolver_prestamo(prestamo.id) == False
+        assert biblioteca.obtener_libro(isbn).disponible == True
+        assert biblioteca.obtener_usuario(usuario_id).libros_prestados == []
+        assert biblioteca.obtener_prestamo(prestamo.id).esta_activo() == False
+
+    def test_prestamo_dentro_de_una_particion(self, biblioteca):
+        isbn = buscar_clave("ISBN-B", 2)
+        usuario_id = buscar_clave("U-B", 2)
+        biblioteca.agregar_libro(Libro(isbn, "Refactoring", "Martin Fowler"))
+        biblioteca.registrar_usuario(Usuario(usuario_id, "María García"))
+
+        prestamo = biblioteca.crear_prestamo(isbn, usuario_id)
+
+        assert prestamo.id.startswith("2-")
+        biblioteca.agregar_ejemplares(isbn, 1)
+        with pytest.raises(ValueError, match="ya tiene"):
+            biblioteca.crear_prestamo(isbn, usuario_id)
+        assert biblioteca.obtener_libro(isbn).ejemplares_disponibles == 1
+
+    @pytest.mark.parametrize("isbn,usuario_id,error", [
+        ("ISBN-FALSO", "U1", LibroNoExisteError),
+        ("ISBN2", "U-FALSO", UsuarioNoExisteError),
+        ("ISBN0", "U1", LibroNoDisponibleError),
+    ])
+    def test_errores_liberan_el_ejemplar(self, biblioteca, isbn, usuario_id, error):
+        biblioteca.crear_prestamo("ISBN0", "U0")
+
+        with pytest.raises(error):
+            biblioteca.crear_prestamo(isbn, usuario_id)
+
+        assert biblioteca.obtener_libro("ISBN2").disponible == True
+        assert biblioteca.total_prestamos_activos() == 1
+
+    @pytest.mark.parametrize("particion_usuario", [0, 1])
+    def test_mismos_errores_que_biblioteca(self, biblioteca, particion_usuario):
+        # Con el libro y el usuario juntos o separados, la validación es la de Biblioteca
+        isbn = buscar_clave("ISBN-C", 0)
+        usuario_id = buscar_clave("U-C", particion_usuario)
+        local = Biblioteca()
+        for destino in (biblioteca, local):
+            destino.agregar_libro(Libro(isbn, "Clean Code", "Robert Martin", ejemplares=2))
+            destino.registrar_usuario(Usuario(usuario_id, "Juan Pérez"))
+            destino.crear_prestamo(isbn, usuario_id)
+
+        errores = []
+        for destino in (biblioteca, local):
+            with pytest.raises(ValueError) as error:
+                destino.crear_prestamo(isbn, usuario_id)
+            errores.append(str(error.value))
+
+        assert errores[0] == errores[1] == "Usuario ya tiene un ejemplar de Clean Code"
+        assert biblioteca.obtener_libro(isbn).ejemplares_disponibles == 1
+
+    def test_limite_del_usuario_en_otra_particion(self, biblioteca):
+        for i in range(Usuario.MAX_LIBROS):
+            biblioteca.crear_prestamo(f"ISBN{i}", "U0")
+
+        with pytest.raises(ValueError, match="límite"):
+            biblioteca.crear_prestamo("ISBN11", "U0")
+
+        assert biblioteca.obtener_libro("ISBN11").disponible == True
+        assert biblioteca.total_prestamos_activos() == Usuario.MAX_LIBROS
+
+    def test_vencidos_de_todas_las_particiones(self, biblioteca):
+        prestamos = [biblioteca.crear_prestamo(f"ISBN{i}", f"U{i}") for i in range(6)]
+
+        assert biblioteca.listar_prestamos_vencidos() == []
+        futuro = datetime.now() + timedelta(days=30)
+        assert [p.id for p in biblioteca.listar_prestamos_vencidos(futuro)] == [p.id for p in prestamos]
+        assert len({p.id.split("-")[0] for p in prestamos}) > 1
+
+    def test_identificador_de_prestamo_desconocido(self, biblioteca):
+        assert biblioteca.devolver_prestamo("sin-particion") == False
+        assert biblioteca.devolver_prestamo("7-no-existe") == False
+        assert biblioteca.obtener_prestamo("0-no-existe") is None
+
+    def test_un_solo_prestamo_por_ejemplar_con_hilos(self, biblioteca):
+        exitos = []
+
+        def pedir(usuario_id):
+            try:
+                exitos.append(biblioteca.crear_prestamo("ISBN5", usuario_id))
+            except LibroNoDisponibleError:
+                pass
+
+        hilos = [threading.Thread(target=pedir, args=(f"U{i}",)) for i in range(6)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        assert len(exitos) == 1
+        assert biblioteca.total_prestamos_activos() == 1
@@ -0,0 +1,226 @@
+import os
+import pytest
+import threading
+import time
+from datetime import datetime
+from src.libro import Libro
+from src.usuario import Usuario
+from src.persistencia import AlmacenPersistente
+
+class TestAlmacenPersistente:
+    
+    @pytest.fixture
+    def directorio(self, tmp_path):
+        return str(tmp_path / "datos")
+    
+    def poblar(self, biblioteca):
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Design Patterns", "Gang of Four"))
+        biblioteca.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.registrar_usuario(Usuario("U002", "María García"))
+        prestamo1 = biblioteca.crear_prestamo("ISBN1", "U001")
+        prestamo2 = biblioteca.crear_prestamo("ISBN2", "U002")
+        biblioteca.devolver_prestamo(prestamo1.id)
+        biblioteca.eliminar_libro("ISBN3")
+        return prestamo1, prestamo2
+    
+    def comprobar_estado(self, biblioteca, prestamo1, prestamo2):
+        assert biblioteca.total_libros() == 2
+        assert biblioteca.total_usuarios() == 2
+        assert biblioteca.total_prestamos_activos() == 1
+        assert biblioteca.obtener_libro("ISBN1").disponible == True
+        assert biblioteca.obtener_libro("ISBN2").disponible == False
+        assert biblioteca.obtener_usuario("U002").libros_prestados == ["ISBN2"]
+        assert biblioteca.listar_prestamos_usuario("U002") == [prestamo2]
+        assert biblioteca.obtener_prestamo(prestamo1.id).fecha_devolucion == prestamo1.fecha_devolucion
+        assert biblioteca.obtener_prestamo(prestamo2.id).fecha_prestamo == prestamo2.fecha_prestamo
+        assert [l.isbn for l in biblioteca.buscar_libros(disponible=True)] == ["ISBN1"]
+    
+    def test_reabrir_reproduce_diario(self, directorio):
+        with AlmacenPersistente(directorio) as biblioteca:
+            prestamos = self.poblar(biblioteca)
+        
+        with AlmacenPersistente(directorio) as biblioteca:
+            self.comprobar_estado(biblioteca, *prestamos)
+    
+    def test_reabrir_desde_instantanea_y_cola(self, directorio):
+        almacen = AlmacenPersistente(directorio)
+        biblioteca = almacen.abrir()
+        prestamos = self.poblar(biblioteca)
+        almacen.compactar()
+        biblioteca.registrar_usuario(Usuario("U003", "Ana López"))
+        almacen.cerrar()
+        
+        archivos = sorted(os.listdir(directorio))
+        assert len([a for a in archivos if a.startswith("instantanea-")]) == 1
+        assert len([a for a in archivos if a.startswith("diario-")]) == 1
+        
+        almacen = AlmacenPersistente(directorio)
+        biblioteca = almacen.abrir()
+        
+        assert biblioteca.obtener_usuario("U003") is not None
+        biblioteca.eliminar_usuario("U003")
+        self.comprobar_estado(biblioteca, *prestamos)
+        assert almacen.secuencia == 11
+        almacen.cerrar()
+    
+    def test_instantanea_automatica(self, directorio):
+        almacen = AlmacenPersistente(directorio, intervalo_grupo=0, registros_por_instantanea=4)
+        biblioteca = almacen.abrir()
+        prestamos = self.poblar(biblioteca)
+        almacen.cerrar()
+        
+        instantaneas = [a for a in os.listdir(directorio) if a.startswith("instantanea-")]
+        assert instantaneas == [f"instantanea-{9:020d}.jsonl"]
+        
+        with AlmacenPersistente(directorio) as biblioteca:
+            self.comprobar_estado(biblioteca, *prestamos)
+    
+    def test_ignora_registro_incompleto(self, directorio):
+        almacen = AlmacenPersistente(directorio, registros_por_grupo=1)
+        biblioteca = almacen.abrir()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        ruta = almacen._archivo.name
+        almacen.cerrar()
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            archivo.write('{"n": 2, "t": "libro_agr')
+        
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.total_libros() == 1
+    
+    def test_registro_incompleto_sin_registros_previos(self, directorio):
+        # El segmento posterior a la instantánea solo tiene una escritura a medias y al reabrir
+        # se vuelve a abrir el mismo archivo: lo nuevo no debe quedar pegado a ella
+        almacen = AlmacenPersistente(directorio, registros_por_grupo=1)
+        biblioteca = almacen.abrir()
+        biblioteca.agregar_libro(Libro("A", "Clean Code", "Robert Martin"))
+        almacen.compactar()
+        ruta = almacen._archivo.name
+        almacen.cerrar()
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            archivo.write('{"n": 2, "t": "libro_agr')
+        
+        with AlmacenPersistente(directorio, registros_por_grupo=1) as biblioteca:
+            biblioteca.agregar_libro(Libro("C", "Refactoring", "Martin Fowler"))
+            biblioteca.agregar_libro(Libro("D", "Design Patterns", "Gang of Four"))
+        
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert [l.isbn for l in biblioteca.buscar_libros()] == ["A", "C", "D"]
+    
+    def test_escritura_vuelve_con_su_registro_en_disco(self, directorio, monkeypatch):
+        sincronizados = []
+        fsync = os.fsync
+        almacen = AlmacenPersistente(directorio, intervalo_grupo=0)
+        monkeypatch.setattr(os, "fsync", lambda descriptor: (fsync(descriptor), sincronizados.append(almacen.secuencia)))
+        biblioteca = almacen.abrir()
+        
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        
+        assert sincronizados[-1] == almacen.secuencia == 1
+        almacen.cerrar()
+    
+    def test_durabilidad_asincrona(self, directorio, monkeypatch):
+        sincronizados = []
+        fsync = os.fsync
+        monkeypatch.setattr(os, "fsync", lambda descriptor: (fsync(descriptor), sincronizados.append(descriptor)))
+        almacen = AlmacenPersistente(directorio, intervalo_grupo=0, sincrono=False)
+        biblioteca = almacen.abrir()
+        sincronizados.clear()
+        
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        
+        assert sincronizados == []
+        almacen.cerrar()
+        assert len(sincronizados) == 1
+    
+    def test_escrituras_concurrentes_comparten_fsync(self, directorio, monkeypatch):
+        llamadas = []
+        fsync = os.fsync
+        
+        def fsync_lento(descriptor):
+            time.sleep(0.01)
+            fsync(descriptor)
+            llamadas.append(descriptor)
+        
+        almacen = AlmacenPersistente(directorio, intervalo_grupo=0)
+        biblioteca = almacen.abrir()
+        monkeypatch.setattr(os, "fsync", fsync_lento)
+        
+        # Altas de usuarios: solo toman su segmento, no el cerrojo del catálogo
+        def escribir(hilo):
+            for i in range(5):
+                biblioteca.registrar_usuario(Usuario(f"U{hilo}-{i}", f"Usuario {i}"))
+        
+        hilos = [threading.Thread(target=escribir, args=(h,)) for h in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert almacen._sincronizado == almacen.secuencia == 40
+        assert len(llamadas) < 40
+        almacen.cerrar()
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.total_usuarios() == 40
+    
+    def test_abrir_dos_veces(self, directorio):
+        almacen = AlmacenPersistente(directorio)
+        almacen.abrir()
+        
+        with pytest.raises(RuntimeError, match="ya está abierto"):
+            almacen.abrir()
+        almacen.cerrar()
+    
+    def test_reproduce_ejemplares(self, directorio):
+        with AlmacenPersistente(directorio) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin", ejemplares=2))
+            biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+            biblioteca.crear_prestamo("ISBN1", "U001")
+            biblioteca.agregar_ejemplares("ISBN1", 3)
+        
+        with AlmacenPersistente(directorio) as biblioteca:
+            libro = biblioteca.obtener_libro("ISBN1")
+            assert (libro.ejemplares, libro.ejemplares_disponibles) == (5, 4)
+    
+    def test_historial_archivado_no_se_reescribe(self, directorio):
+        almacen = AlmacenPersistente(directorio, intervalo_grupo=0)
+        biblioteca = almacen.abrir()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.registrar_usuario(Usuario("U001", "Juan Pérez"))
+        biblioteca.registrar_usuario(Usuario("U002", "María García"))
+        devueltos = []
+        for i in range(600):
+            prestamo = biblioteca.crear_prestamo("ISBN1", f"U00{1 + i % 2}")
+            biblioteca.devolver_prestamo(prestamo.id)
+            devueltos.append(prestamo.id)
+        activo = biblioteca.crear_prestamo("ISBN1", "U001")
+        esperadas = biblioteca.estadisticas()
+        almacen.compactar()
+        
+        segmentos = [a for a in os.listdir(directorio) if a.startswith("archivo-")]
+        assert len(segmentos) == 1
+        with open(os.path.join(directorio, segmentos[0]), "rb") as segmento:
+            contenido = segmento.read()
+        ruta_instantanea = [a for a in os.listdir(directorio) if a.startswith("instantanea-")][0]
+        with open(os.path.join(directorio, ruta_instantanea), encoding="utf-8") as instantanea:
+            # Solo el activo y los devueltos sin sellar (600 % 256) van en línea
+            assert sum('"prestamo"' in linea for linea in instantanea) == 1 + 600 % 256
+        
+        biblioteca.agregar_libro(Libro("ISBN2", "Refactoring", "Martin Fowler"))
+        almacen.compactar()
+        almacen.cerrar()
+        
+        # Sin bloques nuevos no hay segmento nuevo y el existente no se toca
+        assert [a for a in os.listdir(directorio) if a.startswith("archivo-")] == segmentos
+        with open(os.path.join(directorio, segmentos[0]), "rb") as segmento:
+            assert segmento.read() == contenido
+        
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.obtener_prestamo(devueltos[0]).fecha_devolucion is not None
+            assert biblioteca.obtener_prestamo(devueltos[-1]).fecha_devolucion is not None
+            assert biblioteca.obtener_prestamo(activo.id).esta_activo()
+            assert len(biblioteca._archivo) == 600
+            estadisticas = biblioteca.estadisticas()
+            assert estadisticas['usuarios_mas_activos'] == esperadas['usuarios_mas_activos']
+            assert estadisticas['prestamos_activos'] == 1
\ No newline at end of file
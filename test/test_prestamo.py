@@ -84,6 +84,29 @@ class TestPrestamo:
         
         assert dias == 0
     
+    @pytest.mark.parametrize("retraso,dias", [
+        (timedelta(days=-3), 0),
+        (timedelta(0), 0),
+        (timedelta(hours=23, minutes=59), 0),
+        (timedelta(days=1), 1),
+        (timedelta(days=6, hours=12), 6),
+    ])
+    def test_dias_vencido_y_multa(self, retraso, dias):
+        fecha_prestamo = datetime(2025, 10, 1, 10, 0, 0)
+        prestamo = Prestamo("P001", "978-0132350884", "U001", fecha_prestamo=fecha_prestamo)
+        
+        fecha = prestamo.fecha_limite + retraso
+        
+        assert prestamo.dias_vencido(fecha) == dias
+        assert prestamo.multa(fecha) == dias * Prestamo.MULTA_DIARIA
+    
+    def test_dias_vencido_devuelto(self):
+        prestamo = Prestamo("P001", "978-0132350884", "U001", fecha_prestamo=datetime.now() - timedelta(days=20))
+        prestamo.devolver()
+        
+        assert prestamo.dias_vencido() == 0
+        assert prestamo.multa() == 0
+    
     def test_fecha_limite_correcta(self):
         fecha_prestamo = datetime(2025, 10, 1, 10, 0, 0)
         prestamo = Prestamo("P001", "978-0132350884", "U001", fecha_prestamo=fecha_prestamo)
@@ -96,4 +119,11 @@ class TestPrestamo:
         prestamo1 = Prestamo("P001", "978-0132350884", "U001")
         prestamo2 = Prestamo("P001", "978-0201616224", "U002")
         
-        assert prestamo1 == prestamo2
\ No newline at end of file
+        assert prestamo1 == prestamo2
+    
+    def test_sin_dict_por_instancia(self):
+        prestamo = Prestamo("P001", "978-0132350884", "U001")
+        
+        assert not hasattr(prestamo, "__dict__")
+        with pytest.raises(AttributeError):
+            prestamo.atributo_nuevo = True
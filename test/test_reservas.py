@@ -0,0 +1,223 @@
+import pytest
+from datetime import datetime, timedelta
+from src.biblioteca import Biblioteca, LibroNoDisponibleError, LibroNoExisteError
+from src.libro import Libro
+from src.persistencia import AlmacenPersistente
+from src.reservas import ColaReservas
+from src.usuario import Usuario
+
+class TestColaReservas:
+
+    def test_posicion_tras_retirar_cabeza_y_medio(self):
+        cola = ColaReservas()
+        for usuario in ["A", "B", "C", "D"]:
+            cola.agregar("ISBN1", usuario)
+
+        cola.retirar("ISBN1", "A")
+        cola.retirar("ISBN1", "C")
+
+        assert cola.posicion("ISBN1", "B") == 1
+        assert cola.posicion("ISBN1", "D") == 2
+        assert cola.posicion("ISBN1", "A") is None
+        assert [r.usuario_id for r in cola.en_orden("ISBN1")] == ["B", "D"]
+
+    def test_cola_larga_recorta_cabeza(self):
+        cola = ColaReservas()
+        for i in range(100):
+            cola.agregar("ISBN1", f"U{i:03d}")
+        for i in range(60):
+            cola.retirar("ISBN1", f"U{i:03d}")
+
+        assert cola.posicion("ISBN1", "U060") == 1
+        assert cola.posicion("ISBN1", "U099") == 40
+        assert len(cola._colas["ISBN1"].tickets) < 100
+
+    def test_retirar_vencidas_solo_de_la_cabeza(self):
+        cola = ColaReservas()
+        inicio = datetime(2025, 1, 1)
+        cola.agregar("ISBN1", "A", fecha=inicio)
+        cola.agregar("ISBN1", "B", fecha=inicio)
+        cola.agregar("ISBN1", "C", fecha=inicio)
+        cola.ofrecer("ISBN1", 1, inicio)
+        cola.ofrecer("ISBN1", 2, inicio + timedelta(days=5))
+
+        vencidas = cola.retirar_vencidas("ISBN1", inicio + timedelta(days=ColaReservas.DIAS_RESERVA + 1))
+
+        assert [r.usuario_id for r in vencidas] == ["A"]
+        assert cola.posicion("ISBN1", "B") == 1
+        assert cola.obtener("ISBN1", "C").fecha_limite is None
+
+    def test_el_plazo_no_corre_en_la_cola(self):
+        cola = ColaReservas()
+        inicio = datetime(2025, 1, 1)
+        cola.agregar("ISBN1", "A", fecha=inicio)
+
+        assert cola.retirar_vencidas("ISBN1", inicio + timedelta(days=60)) == []
+        assert cola.ofrecer("ISBN1", 1, inicio + timedelta(days=60))[0].fecha_limite == \
+            inicio + timedelta(days=60 + ColaReservas.DIAS_RESERVA)
+        assert cola.ofrecer("ISBN1", 1, inicio + timedelta(days=61)) == []
+
+class TestReservasBiblioteca:
+
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Design Patterns", "Gang of Four"))
+        for i in range(4):
+            biblioteca.registrar_usuario(Usuario(f"U00{i}", f"Usuario {i}"))
+        return biblioteca
+
+    def test_devolucion_entrega_al_primero_de_la_cola(self, biblioteca):
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.reservar("ISBN1", "U001")
+        biblioteca.reservar("ISBN1", "U002")
+
+        assert biblioteca.posicion_reserva("ISBN1", "U002") == 2
+        assert biblioteca.devolver_prestamo(prestamo.id) == True
+
+        assert [p.libro_isbn for p in biblioteca.listar_prestamos_usuario("U001")] == ["ISBN1"]
+        assert biblioteca.posicion_reserva("ISBN1", "U001") is None
+        assert biblioteca.posicion_reserva("ISBN1", "U002") == 1
+        assert biblioteca.obtener_libro("ISBN1").disponible == False
+
+    def test_salta_usuarios_sin_cupo(self, biblioteca):
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.reservar("ISBN1", "U001")
+        biblioteca.reservar("ISBN1", "U002")
+        for i in range(Usuario.MAX_LIBROS):
+            isbn = f"EXTRA{i}"
+            biblioteca.agregar_libro(Libro(isbn, f"Extra {i}", "Autor"))
+            biblioteca.crear_prestamo(isbn, "U001")
+
+        biblioteca.devolver_prestamo(prestamo.id)
+
+        assert [p.libro_isbn for p in biblioteca.listar_prestamos_usuario("U002")] == ["ISBN1"]
+        assert biblioteca.posicion_reserva("ISBN1", "U001") == 1
+
+    def test_ejemplar_libre_queda_para_la_cola(self, biblioteca):
+        biblioteca.agregar_libro(Libro("ISBN3", "Refactoring", "Martin Fowler", ejemplares=1))
+        prestamo = biblioteca.crear_prestamo("ISBN3", "U000")
+        biblioteca.reservar("ISBN3", "U001")
+        for i in range(Usuario.MAX_LIBROS):
+            isbn = f"EXTRA{i}"
+            biblioteca.agregar_libro(Libro(isbn, f"Extra {i}", "Autor"))
+            biblioteca.crear_prestamo(isbn, "U001")
+        biblioteca.devolver_prestamo(prestamo.id)
+
+        with pytest.raises(LibroNoDisponibleError, match="reservado"):
+            biblioteca.crear_prestamo("ISBN3", "U002")
+
+        biblioteca.devolver_prestamo(biblioteca.listar_prestamos_usuario("U001")[0].id)
+
+        assert biblioteca.obtener_libro("ISBN3").disponible == False
+        assert biblioteca.listar_reservas("ISBN3") == []
+
+    def test_agregar_ejemplares_atiende_la_cola(self, biblioteca):
+        biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.reservar("ISBN1", "U001")
+        biblioteca.reservar("ISBN1", "U002")
+
+        biblioteca.agregar_ejemplares("ISBN1", 2)
+
+        assert biblioteca.listar_reservas("ISBN1") == []
+        assert biblioteca.obtener_libro("ISBN1").ejemplares_disponibles == 0
+
+    def test_reserva_antigua_recibe_la_devolucion(self, biblioteca):
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.reservar("ISBN1", "U001", fecha=datetime.now() - timedelta(days=10))
+
+        biblioteca.devolver_prestamo(prestamo.id)
+
+        assert [p.libro_isbn for p in biblioteca.listar_prestamos_usuario("U001")] == ["ISBN1"]
+
+    def test_plazo_de_recogida_vencido_no_bloquea(self, biblioteca):
+        prestamo = biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.reservar("ISBN1", "U001")
+        for i in range(Usuario.MAX_LIBROS):
+            isbn = f"EXTRA{i}"
+            biblioteca.agregar_libro(Libro(isbn, f"Extra {i}", "Autor"))
+            biblioteca.crear_prestamo(isbn, "U001")
+        biblioteca.devolver_prestamo(prestamo.id)
+
+        reserva = biblioteca.listar_reservas("ISBN1")[0]
+        assert reserva.fecha_limite is not None
+        with pytest.raises(LibroNoDisponibleError, match="reservado"):
+            biblioteca.crear_prestamo("ISBN1", "U002")
+
+        # Se simula que el plazo para recogerlo ya pasó
+        biblioteca._reservas.abrir_plazo("ISBN1", "U001", datetime.now() - timedelta(seconds=1))
+        assert biblioteca.crear_prestamo("ISBN1", "U002").usuario_id == "U002"
+        assert biblioteca.listar_reservas("ISBN1") == []
+
+    @pytest.mark.parametrize("isbn,usuario,error", [
+        ("ISBN-FALSO", "U001", LibroNoExisteError),
+        ("ISBN2", "U001", ValueError),
+        ("ISBN1", "U000", ValueError),
+    ])
+    def test_reservas_invalidas(self, biblioteca, isbn, usuario, error):
+        biblioteca.crear_prestamo("ISBN1", "U000")
+
+        with pytest.raises(error):
+            biblioteca.reservar(isbn, usuario)
+
+    def test_cancelar_y_eliminar_usuario(self, biblioteca):
+        biblioteca.crear_prestamo("ISBN1", "U000")
+        biblioteca.reservar("ISBN1", "U001")
+        biblioteca.reservar("ISBN1", "U002")
+        biblioteca.reservar("ISBN1", "U003")
+
+        assert biblioteca.cancelar_reserva("ISBN1", "U001") == True
+        assert biblioteca.cancelar_reserva("ISBN1", "U001") == False
+        biblioteca.eliminar_usuario("U002")
+
+        assert [r.usuario_id for r in biblioteca.listar_reservas("ISBN1")] == ["U003"]
+        assert biblioteca.posicion_reserva("ISBN1", "U003") == 1
+
+    def test_reproduccion_no_repite_entrega(self, tmp_path):
+        directorio = str(tmp_path / "datos")
+        with AlmacenPersistente(directorio) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+            for i in range(3):
+                biblioteca.registrar_usuario(Usuario(f"U00{i}", f"Usuario {i}"))
+            prestamo = biblioteca.crear_prestamo("ISBN1", "U000")
+            biblioteca.reservar("ISBN1", "U001")
+            biblioteca.reservar("ISBN1", "U002")
+            biblioteca.devolver_prestamo(prestamo.id)
+
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert [p.usuario_id for p in biblioteca.listar_prestamos_activos()] == ["U001"]
+            assert [r.usuario_id for r in biblioteca.listar_reservas("ISBN1")] == ["U002"]
+            assert biblioteca.reservar("ISBN1", "U000").ticket == 2
+
+        almacen = AlmacenPersistente(directorio)
+        biblioteca = almacen.abrir()
+        almacen.compactar()
+        almacen.cerrar()
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert [r.usuario_id for r in biblioteca.listar_reservas("ISBN1")] == ["U002", "U000"]
+            assert biblioteca.posicion_reserva("ISBN1", "U000") == 2
+
+    def test_plazo_de_recogida_sobrevive_al_reinicio(self, tmp_path):
+        directorio = str(tmp_path / "datos")
+        with AlmacenPersistente(directorio) as biblioteca:
+            biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+            biblioteca.registrar_usuario(Usuario("U000", "Usuario 0"))
+            biblioteca.registrar_usuario(Usuario("U001", "Usuario 1"))
+            prestamo = biblioteca.crear_prestamo("ISBN1", "U000")
+            biblioteca.reservar("ISBN1", "U001")
+            for i in range(Usuario.MAX_LIBROS):
+                biblioteca.agregar_libro(Libro(f"EXTRA{i}", f"Extra {i}", "Autor"))
+                biblioteca.crear_prestamo(f"EXTRA{i}", "U001")
+            biblioteca.devolver_prestamo(prestamo.id)
+            esperada = biblioteca.listar_reservas("ISBN1")
+
+        almacen = AlmacenPersistente(directorio)
+        biblioteca = almacen.abrir()
+        assert biblioteca.listar_reservas("ISBN1") == esperada
+        assert esperada[0].fecha_limite is not None
+        almacen.compactar()
+        almacen.cerrar()
+
+        with AlmacenPersistente(directorio) as biblioteca:
+            assert biblioteca.listar_reservas("ISBN1") == esperada
\ No newline at end of file
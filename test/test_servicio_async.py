@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import pytest
+from src.biblioteca import Biblioteca, LibroNoDisponibleError, LibroNoExisteError
+from src.libro import Libro
+from src.servicio_async import BibliotecaAsync
+from src.usuario import Usuario
+
+class TestBibliotecaAsync:
+    
+    @pytest.fixture
+    def biblioteca(self):
+        biblioteca = Biblioteca()
+        biblioteca.agregar_libro(Libro("ISBN1", "Clean Code", "Robert Martin"))
+        biblioteca.agregar_libro(Libro("ISBN2", "Design Patterns", "Gang of Four"))
+        for i in range(10):
+            biblioteca.registrar_usuario(Usuario(f"U{i}", f"Usuario {i}"))
+        return biblioteca
+    
+    def test_flujo_prestamo(self, biblioteca):
+        async def flujo():
+            async with BibliotecaAsync(biblioteca) as servicio:
+                prestamo = await servicio.crear_prestamo("ISBN1", "U0")
+                assert await servicio.total_prestamos_activos() == 1
+                assert [l.isbn for l in await servicio.buscar_libros(disponible=True)] == ["ISBN2"]
+                assert await servicio.devolver_prestamo(prestamo.id) == True
+                assert await servicio.devolver_prestamo(prestamo.id) == False
+                return await servicio.listar_prestamos_activos()
+        
+        assert asyncio.run(flujo()) == []
+    
+    def test_conserva_excepciones(self, biblioteca):
+        async def flujo():
+            async with BibliotecaAsync(biblioteca) as servicio:
+                await servicio.crear_prestamo("ISBN1", "U0")
+                with pytest.raises(LibroNoDisponibleError, match="no está disponible"):
+                    await servicio.crear_prestamo("ISBN1", "U1")
+                with pytest.raises(LibroNoExisteError):
+                    await servicio.crear_prestamo("ISBN-FALSO", "U1")
+                assert await servicio.registrar_usuario(Usuario("U99", "Nuevo")) == True
+        
+        asyncio.run(flujo())
+    
+    def test_escrituras_en_orden(self, biblioteca):
+        async def flujo():
+            async with BibliotecaAsync(biblioteca) as servicio:
+                tareas = [servicio.crear_prestamo("ISBN1", f"U{i}") for i in range(10)]
+                return await asyncio.gather(*tareas, return_exceptions=True)
+        
+        resultados = asyncio.run(flujo())
+        
+        assert resultados[0].usuario_id == "U0"
+        assert all(isinstance(r, LibroNoDisponibleError) for r in resultados[1:])
+    
+    def test_agrupa_lecturas_identicas(self, biblioteca):
+        llamadas = []
+        liberar = threading.Event()
+        original = biblioteca.buscar_libros
+        
+        def buscar_lento(**criterios):
+            llamadas.append(criterios)
+            liberar.wait(5)
+            return original(**criterios)
+        
+        biblioteca.buscar_libros = buscar_lento
+        
+        async def flujo():
+            async with BibliotecaAsync(biblioteca) as servicio:
+                tareas = [asyncio.ensure_future(servicio.buscar_libros(titulo="clean")) for _ in range(20)]
+                tareas.append(asyncio.ensure_future(servicio.buscar_libros(titulo="design")))
+                await asyncio.sleep(0.05)
+                liberar.set()
+                return await asyncio.gather(*tareas)
+        
+        resultados = asyncio.run(flujo())
+        
+        assert len(llamadas) == 2
+        assert all([l.isbn for l in r] == ["ISBN1"] for r in resultados[:20])
+        assert resultados[0] is not resultados[1]
+        assert [l.isbn for l in resultados[20]] == ["ISBN2"]
+    
+    def test_paginas_compartidas_no_se_alias(self, biblioteca):
+        async def flujo():
+            async with BibliotecaAsync(biblioteca) as servicio:
+                primera, segunda = await asyncio.gather(servicio.paginar_libros(limite=1),
+                                                        servicio.paginar_libros(limite=1))
+                primera.elementos.clear()
+                siguiente = await servicio.paginar_libros(limite=1, cursor=segunda.cursor)
+                return segunda, siguiente
+        
+        segunda, siguiente = asyncio.run(flujo())
+        
+        assert [l.isbn for l in segunda.elementos] == ["ISBN1"]
+        assert [l.isbn for l in siguiente.elementos] == ["ISBN2"]
+        assert siguiente.cursor is None
\ No newline at end of file
@@ -103,4 +103,11 @@ class TestUsuario:
         usuario1 = Usuario("U001", "Juan Pérez")
         usuario2 = Usuario("U001", "María García")
         
-        assert usuario1 == usuario2
\ No newline at end of file
+        assert usuario1 == usuario2
+    
+    def test_sin_dict_por_instancia(self):
+        usuario = Usuario("U001", "Juan Pérez")
+        
+        assert not hasattr(usuario, "__dict__")
+        with pytest.raises(AttributeError):
+            usuario.atributo_nuevo = True
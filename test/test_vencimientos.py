@@ -0,0 +1,147 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from src.prestamo import Prestamo
+from src.vencimientos import ColaVencimientos
+
+class TestColaVencimientos:
+    
+    @pytest.fixture
+    def fecha_base(self):
+        return datetime(2025, 10, 1, 10, 0, 0)
+    
+    @pytest.fixture
+    def cola(self, fecha_base):
+        cola = ColaVencimientos()
+        for i, dias in enumerate([5, 0, 3, 10, 1]):
+            cola.agregar(Prestamo(f"P{i}", f"ISBN{i}", "U001", fecha_prestamo=fecha_base + timedelta(days=dias)))
+        return cola
+    
+    @pytest.mark.parametrize("dias_despues,esperados", [
+        (0, []),
+        (14, []),
+        (15, ["P1"]),
+        (16, ["P1", "P4"]),
+        (18, ["P1", "P2", "P4"]),
+        (30, ["P0", "P1", "P2", "P3", "P4"]),
+    ])
+    def test_vencidos_en_orden_de_creacion(self, cola, fecha_base, dias_despues, esperados):
+        fecha = fecha_base + timedelta(days=dias_despues)
+        
+        vencidos = cola.vencidos(fecha)
+        
+        assert [p.id for p in vencidos] == esperados
+        assert all(p.esta_vencido(fecha) for p in vencidos)
+    
+    def test_limite_exacto_no_vencido(self, fecha_base):
+        cola = ColaVencimientos()
+        prestamo = Prestamo("P1", "ISBN1", "U001", fecha_prestamo=fecha_base)
+        cola.agregar(prestamo)
+        
+        assert cola.vencidos(prestamo.fecha_limite) == []
+        assert cola.vencidos(prestamo.fecha_limite + timedelta(seconds=1)) == [prestamo]
+    
+    def test_retirar_excluye_prestamo(self, cola, fecha_base):
+        cola.vencidos(fecha_base)
+        
+        assert cola.retirar("P1") == True
+        assert cola.retirar("P1") == False
+        
+        vencidos = cola.vencidos(fecha_base + timedelta(days=30))
+        
+        assert [p.id for p in vencidos] == ["P0", "P2", "P3", "P4"]
+        assert len(cola) == 4
+    
+    def test_retirar_todos_compacta(self, cola, fecha_base):
+        cola.vencidos(fecha_base)
+        for i in range(5):
+            cola.retirar(f"P{i}")
+        
+        assert cola.vencidos(fecha_base + timedelta(days=30)) == []
+        assert len(cola._heap) == 0
+    
+    def test_evaluar_igual_que_prestamo_a_prestamo(self, fecha_base):
+        aleatorio = random.Random(7)
+        cola = ColaVencimientos()
+        prestamos = {}
+        for i in range(500):
+            desfase = timedelta(days=aleatorio.randint(-40, 40), microseconds=aleatorio.randint(0, 86_399_999_999))
+            prestamo = Prestamo(f"P{i}", f"ISBN{i}", "U001", fecha_prestamo=fecha_base + desfase)
+            prestamos[prestamo.id] = prestamo
+            cola.agregar(prestamo)
+        for i in range(0, 500, 3):
+            cola.retirar(f"P{i}")
+            del prestamos[f"P{i}"]
+        
+        for fecha in (fecha_base, fecha_base + timedelta(days=20, microseconds=1), prestamos["P1"].fecha_limite):
+            evaluacion = cola.evaluar(fecha)
+            
+            assert sorted(evaluacion.ids) == sorted(prestamos)
+            for posicion, prestamo_id in enumerate(evaluacion.ids):
+                prestamo = prestamos[prestamo_id]
+                assert evaluacion.dias_restantes[posicion] == prestamo.dias_restantes(fecha)
+                assert evaluacion.dias_vencido[posicion] == prestamo.dias_vencido(fecha)
+                assert evaluacion.multas[posicion] == prestamo.multa(fecha)
+            assert evaluacion.vencidos == sum(1 for p in prestamos.values() if p.esta_vencido(fecha))
+            assert evaluacion.total_multas == sum(p.multa(fecha) for p in prestamos.values())
+    
+    def test_evaluar_cola_vacia(self, fecha_base):
+        evaluacion = ColaVencimientos().evaluar(fecha_base)
+        
+        assert evaluacion.ids == [] and len(evaluacion.multas) == 0
+        assert evaluacion.total_multas == 0
+    
+    def test_vencido_por_horas_cuenta_como_vencido(self, fecha_base):
+        cola = ColaVencimientos()
+        prestamo = Prestamo("P1", "ISBN1", "U001", fecha_prestamo=fecha_base)
+        cola.agregar(prestamo)
+        fecha = prestamo.fecha_limite + timedelta(hours=5)
+        
+        evaluacion = cola.evaluar(fecha)
+        
+        assert prestamo.esta_vencido(fecha) == True
+        assert evaluacion.vencidos == len(cola.vencidos(fecha)) == 1
+        assert list(evaluacion.dias_vencido) == [0]
+        assert evaluacion.total_multas == 0
+        assert cola.evaluar(prestamo.fecha_limite).vencidos == 0
+    
+    def test_agregar_de_nuevo_reemplaza_la_fecha_limite(self, fecha_base):
+        cola = ColaVencimientos()
+        cola.agregar(Prestamo("P1", "ISBN1", "U001", fecha_prestamo=fecha_base))
+        cola.agregar(Prestamo("P1", "ISBN1", "U001", fecha_prestamo=fecha_base + timedelta(days=10)))
+        
+        evaluacion = cola.evaluar(fecha_base + timedelta(days=20))
+        
+        assert evaluacion.ids == ["P1"]
+        assert list(evaluacion.dias_restantes) == [4]
+    
+    def test_numpy_coincide_con_python(self, fecha_base, monkeypatch):
+        numpy = pytest.importorskip("numpy")
+        import src.vencimientos as vencimientos
+        aleatorio = random.Random(11)
+        cola = ColaVencimientos()
+        for i in range(2000):
+            desfase = timedelta(days=aleatorio.randint(-40, 40), microseconds=aleatorio.randint(0, 86_399_999_999))
+            cola.agregar(Prestamo(f"P{i}", f"ISBN{i}", "U001", fecha_prestamo=fecha_base + desfase))
+        fecha = fecha_base + timedelta(days=15, hours=3)
+        
+        con_numpy = cola.evaluar(fecha)
+        monkeypatch.setattr(vencimientos, "numpy", None)
+        sin_numpy = cola.evaluar(fecha)
+        
+        assert isinstance(con_numpy.multas, numpy.ndarray)
+        assert con_numpy.ids == sin_numpy.ids
+        for columna in ("dias_restantes", "dias_vencido", "multas"):
+            assert list(getattr(con_numpy, columna)) == list(getattr(sin_numpy, columna))
+        assert (con_numpy.vencidos, con_numpy.total_multas) == (sin_numpy.vencidos, sin_numpy.total_multas)
+    
+    def test_sin_consultas_no_crece_sin_limite(self, fecha_base):
+        cola = ColaVencimientos()
+        for i in range(20_000):
+            cola.agregar(Prestamo(f"P{i}", f"ISBN{i}", "U001", fecha_prestamo=fecha_base + timedelta(seconds=i)))
+            if i >= 10:
+                cola.retirar(f"P{i - 10}")
+        
+        assert len(cola) == 10
+        assert len(cola._heap) + len(cola._pendientes) <= 4 * ColaVencimientos.MAX_PENDIENTES
+        assert [p.id for p in cola.vencidos(fecha_base + timedelta(days=30))] == [f"P{i}" for i in range(19_990, 20_000)]
\ No newline at end of file